@@ -3,22 +3,35 @@ Argos Core - FastAPI wrapper
 Exposes ArgosAgent as HTTP API without modifying agent.py
 """
 import asyncio
+import json
 import os
 import uuid
 from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
+from typing import Literal
 
 import httpx
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
 
 from fastmcp.utilities.lifespan import combine_lifespans
 
+from core.admission import AdmissionRejected
 from core.agent import ArgosAgent
+from core.checkpointer import PooledSqliteSaver
 from core.config import load_model_config
+from core.health import CircuitOpen, health_registry
+from core.loop_monitor import get_loop_monitor, start_loop_monitor
 from core.mcp_server import mcp
-from utils.logger_config import get_argos_logger
+from core.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, render as render_metrics
+from core.prefetch import prefetch_stats
+from core.request_context import CancelToken, DeadlineExceeded, cancel_scope, deadline_scope
+from core.singleflight import flight_key, get_flight, singleflight_stats
+from core.tool_cache import cache_stats
+from core.tracing import Trace, load_trace, slow_traces, to_chrome, trace_scope, tracing_stats
+from core.vram import get_vram_scheduler, keep_alive_for
+from utils.logger_config import get_argos_logger, logging_stats
 
 logger = get_argos_logger()
 _agent: ArgosAgent | None = None
@@ -55,7 +68,7 @@ async def _warmup_chat_model() -> None:
             await c.post(
                 f"{ollama_url}/api/generate",
                 json={"model": chat_model, "prompt": "hi", "stream": False,
-                      "options": {"num_predict": 1}, "keep_alive": -1},
+                      "options": {"num_predict": 1}, "keep_alive": keep_alive_for("chat")},
             )
         logger.info(f"Chat model warmed up: {chat_model}")
     except Exception as e:
@@ -68,20 +81,34 @@ async def lifespan(app: FastAPI):
     logger.info("Starting Argos API — initializing agent...")
     db_path = ArgosAgent.db_path()
     logger.info(f"Checkpoint DB: {db_path}")
-    async with AsyncSqliteSaver.from_conn_string(str(db_path)) as memory:
+    # WAL + 1 escritor + pool de lectores: threads concurrentes no hacen fila en una conexión.
+    async with PooledSqliteSaver.from_conn_string(str(db_path)) as memory:
         _agent = ArgosAgent(memory)
         logger.info("Agent ready.")
         await _warmup_chat_model()
         # Pre-warm knowledge index en background — no bloquea el startup
         asyncio.create_task(_warmup_knowledge())
+        # Prefijo del agente en el KV de cada llama-server cuando llama-swap lo recarga.
+        warmers = _agent.build_prefix_warmers()
+        app.state.prefix_warmers = warmers
+        # Sondeo de salud de los servicios downstream (backends AGENT, Ollama, bridge,
+        # Frigate): cierra o abre sus breakers sin esperar a que falle un turno.
+        background = [asyncio.create_task(w.run()) for w in warmers]
+        background.append(asyncio.create_task(health_registry().probe_loop()))
+        # Modo debug (ARGOS_LOOP_MONITOR=1): stack de lo que bloquee el loop > umbral.
+        monitor = start_loop_monitor()
         yield
+        for task in background:
+            task.cancel()
+        if monitor is not None:
+            monitor.stop()
     _agent = None
 
 
 # MCP server montado como sub-app ASGI (streamable-http).
 # path="/" interno + mount en "/mcp" → endpoint público POST /mcp, sin tapar
 # las rutas REST existentes (/chat, /health, /knowledge/query).
-# combine_lifespans corre el lifespan de Argos (AsyncSqliteSaver) Y el del
+# combine_lifespans corre el lifespan de Argos (PooledSqliteSaver) Y el del
 # session manager de FastMCP — sin este último el MCP no inicializa.
 mcp_app = mcp.http_app(path="/", transport="streamable-http")
 
@@ -95,23 +122,175 @@ app.mount("/mcp", mcp_app)
 class ChatRequest(BaseModel):
     message: str
     thread_id: str | None = None
+    # interactive = un humano esperando (Telegram/dashboard); background = jobs.
+    priority: Literal["interactive", "background"] = "interactive"
+    # Plazo total del turno en segundos (modelo + tools). None → ARGOS_DEADLINE_S.
+    deadline_s: float | None = Field(default=None, gt=0)
 
 
 class ChatResponse(BaseModel):
     response: str
     thread_id: str
     model: str | None = None  # qué modelo respondió (para debug/UI)
+    trace_id: str | None = None  # para buscar el turno en los logs y en /admin/traces
+
+
+_DISCONNECT_POLL_S = 0.5
+_DEFAULT_DEADLINE_S = float(os.getenv("ARGOS_DEADLINE_S", "240"))
+# Margen del corte duro sobre el plazo: los pasos ya se recortan solos a lo que queda.
+_DEADLINE_GRACE_S = 2.0
+# Errores que salen como 504: el plazo del request o el timeout de un cliente HTTP.
+_TIMEOUT_ERRORS = (DeadlineExceeded, httpx.TimeoutException, asyncio.TimeoutError)
+
+
+def _start_turn(request: ChatRequest, thread_id: str, token: CancelToken, trace: Trace, **kwargs) -> asyncio.Task:
+    """Tarea del turno con `token`, plazo y traza en su contexto (lo heredan grafo, tools e hilos)."""
+    deadline_s = request.deadline_s or _DEFAULT_DEADLINE_S
+    with cancel_scope(token), deadline_scope(deadline_s), trace_scope(trace):
+        task = asyncio.create_task(
+            _agent.run(request.message, thread_id=thread_id, priority=request.priority, **kwargs)  # type: ignore[union-attr]
+        )
+    task.add_done_callback(lambda t: trace.finish(_turn_status(t, token)))
+    # Corte duro: un paso que no respete su presupuesto (cola de admisión, hilo colgado) no estira el turno.
+    timer = asyncio.get_running_loop().call_later(
+        deadline_s + _DEADLINE_GRACE_S, _abort_turn, task, token, thread_id, "deadline_exceeded"
+    )
+    task.add_done_callback(lambda _: timer.cancel())
+    return task
+
+
+def _turn_status(task: asyncio.Task, token: CancelToken) -> str:
+    if task.cancelled():
+        return token.reason or "cancelled"
+    exc = task.exception()
+    return "ok" if exc is None else f"error:{type(exc).__name__}"
+
+
+def _new_trace(request: ChatRequest, thread_id: str, endpoint: str) -> Trace:
+    return Trace(endpoint, thread_id=thread_id, priority=request.priority)
+
+
+def _abort_turn(task: asyncio.Task, token: CancelToken, thread_id: str, reason: str = "client_disconnected") -> None:
+    if not task.done():
+        logger.info(f"Cancelling thread {thread_id}: {reason}")
+        token.cancel(reason)  # tools sync: dejan de hacer polling
+        task.cancel()         # modelo, HTTP en vuelo y tools async
+
+
+def _timeout_detail(exc: BaseException) -> str:
+    """Motivo del 504: plazo del request agotado o timeout propio del cliente HTTP/modelo."""
+    return "deadline_exceeded" if isinstance(exc, DeadlineExceeded) else "upstream_timeout"
+
+
+def _deadline_exceeded(token: CancelToken, task: asyncio.Task) -> bool:
+    return token.reason == "deadline_exceeded" and (task.cancelled() or isinstance(task.exception(), DeadlineExceeded))
 
 
 @app.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest) -> ChatResponse:
+async def chat(request: ChatRequest, http_request: Request, http_response: Response) -> ChatResponse:
     thread_id = request.thread_id or str(uuid.uuid4())
+    token = CancelToken()
+    trace = _new_trace(request, thread_id, "/chat")
+    trace_header = {"X-Trace-Id": trace.trace_id}
+    task = _start_turn(request, thread_id, token, trace)
     try:
-        response, model_used = await _agent.run(request.message, thread_id=thread_id)  # type: ignore[union-attr]
+        # Sin streaming no hay escritura que falle: preguntar por la desconexión.
+        while not task.done():
+            await asyncio.wait({task}, timeout=_DISCONNECT_POLL_S)
+            if not task.done() and await http_request.is_disconnected():
+                _abort_turn(task, token, thread_id)
+                await asyncio.gather(task, return_exceptions=True)
+                raise HTTPException(status_code=499, detail="client_disconnected", headers=trace_header)
+        if _deadline_exceeded(token, task):
+            logger.warning(f"Deadline exceeded on thread {thread_id}")
+            raise HTTPException(status_code=504, detail="deadline_exceeded", headers=trace_header)
+        response, model_used = task.result()
+    except HTTPException:
+        raise
+    except AdmissionRejected as e:
+        logger.warning(f"Agent saturated, rejecting thread {thread_id}: {e}")
+        raise HTTPException(
+            status_code=429,
+            detail={"error": "agent_saturated", "queue_depth": e.queue_depth, "retry_after": e.retry_after},
+            headers={"Retry-After": str(e.retry_after), **trace_header},
+        )
+    except CircuitOpen as e:
+        logger.warning(f"Service unavailable on thread {thread_id}: {e}")
+        retry_after = max(1, round(e.retry_in))
+        raise HTTPException(
+            status_code=503,
+            detail={"error": "service_unavailable", "service": e.name, "retry_after": retry_after},
+            headers={"Retry-After": str(retry_after), **trace_header},
+        )
+    except _TIMEOUT_ERRORS as e:
+        # Timeout del cliente HTTP (Ollama en el path CHAT, bridge…) = mismo 504 que el plazo.
+        logger.warning(f"Timeout on thread {thread_id}: {type(e).__name__}: {e}")
+        raise HTTPException(status_code=504, detail=_timeout_detail(e), headers=trace_header)
     except Exception as e:
         logger.error(f"Agent error on thread {thread_id}: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=str(e))
-    return ChatResponse(response=response, thread_id=thread_id, model=model_used)
+        raise HTTPException(status_code=500, detail=str(e), headers=trace_header)
+    http_response.headers.update(trace_header)
+    return ChatResponse(response=response, thread_id=thread_id, model=model_used, trace_id=trace.trace_id)
+
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest) -> StreamingResponse:
+    """Como /chat, pero NDJSON: eventos de progreso y al final `done` (o `error`).
+
+    Eventos: `loading_model` (el modelo elegido está frío, la carga es inevitable),
+    `queued` {position, queue_depth} (el turno AGENT espera un slot),
+    `done` {response, thread_id, model, trace_id}, `error` {error, ...}.
+    """
+    thread_id = request.thread_id or str(uuid.uuid4())
+    events: asyncio.Queue[dict] = asyncio.Queue()
+    token = CancelToken()
+    trace = _new_trace(request, thread_id, "/chat/stream")
+
+    async def _run() -> None:
+        turn = _start_turn(request, thread_id, token, trace, on_event=events.put_nowait)
+        try:
+            response, model_used = await turn
+            events.put_nowait({
+                "event": "done", "response": response, "thread_id": thread_id,
+                "model": model_used, "trace_id": trace.trace_id,
+            })
+        except asyncio.CancelledError:
+            if not (turn.done() and _deadline_exceeded(token, turn)):
+                raise
+            logger.warning(f"Deadline exceeded on thread {thread_id}")
+            events.put_nowait({"event": "error", "error": "deadline_exceeded"})
+        except _TIMEOUT_ERRORS as e:
+            logger.warning(f"Timeout on thread {thread_id}: {type(e).__name__}: {e}")
+            events.put_nowait({"event": "error", "error": _timeout_detail(e)})
+        except AdmissionRejected as e:
+            logger.warning(f"Agent saturated, rejecting thread {thread_id}: {e}")
+            events.put_nowait({
+                "event": "error", "error": "agent_saturated",
+                "queue_depth": e.queue_depth, "retry_after": e.retry_after,
+            })
+        except CircuitOpen as e:
+            logger.warning(f"Service unavailable on thread {thread_id}: {e}")
+            events.put_nowait({
+                "event": "error", "error": "service_unavailable",
+                "service": e.name, "retry_after": max(1, round(e.retry_in)),
+            })
+        except Exception as e:
+            logger.error(f"Agent error on thread {thread_id}: {e}", exc_info=True)
+            events.put_nowait({"event": "error", "error": str(e)})
+
+    async def _ndjson():
+        task = asyncio.create_task(_run())
+        try:
+            while True:
+                event = await events.get()
+                yield json.dumps(event, ensure_ascii=False) + "\n"
+                if event["event"] in ("done", "error"):
+                    break
+        finally:
+            # Cliente desconectado a mitad del turno: no seguir trabajando para nadie.
+            _abort_turn(task, token, thread_id)
+
+    return StreamingResponse(_ndjson(), media_type="application/x-ndjson", headers={"X-Trace-Id": trace.trace_id})
 
 
 @app.get("/knowledge/query")
@@ -119,13 +298,99 @@ async def knowledge_query(q: str, n: int = 6) -> dict:
     """Semantic search sobre proyectos de Chucho. Usado por el dispatcher."""
     from core.knowledge import query as kb_query
     loop = asyncio.get_event_loop()
-    context = await loop.run_in_executor(None, lambda: kb_query(q, n))
+    context = await get_flight("knowledge").do(
+        flight_key("/knowledge/query", {"q": q, "n": n}),
+        lambda: loop.run_in_executor(None, lambda: kb_query(q, n)),
+    )
     return {"context": context}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    """Métricas en formato de texto de Prometheus (core.metrics).
+
+    async: los gauges con `set_function` (cola de admisión) leen estado del event loop.
+    """
+    return PlainTextResponse(render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+
+@app.get("/admin/traces")
+def admin_traces(limit: int = 50) -> dict:
+    """Requests lentos guardados (ring buffer en disco), el más reciente primero."""
+    return {**tracing_stats(), "traces": slow_traces(max(1, min(limit, 500)))}
+
+
+@app.get("/admin/traces/{trace_id}")
+def admin_trace(trace_id: str) -> dict:
+    """Árbol de spans de un request lento."""
+    data = load_trace(trace_id)
+    if data is None:
+        raise HTTPException(status_code=404, detail="trace_not_found")
+    return data
+
+
+@app.get("/admin/traces/{trace_id}/chrome")
+def admin_trace_chrome(trace_id: str) -> Response:
+    """La misma traza en Trace Event Format: abrir en chrome://tracing o ui.perfetto.dev."""
+    data = load_trace(trace_id)
+    if data is None:
+        raise HTTPException(status_code=404, detail="trace_not_found")
+    return Response(
+        json.dumps(to_chrome(data), ensure_ascii=False),
+        media_type="application/json",
+        headers={"Content-Disposition": f'attachment; filename="argos-trace-{trace_id}.json"'},
+    )
+
+
+@app.get("/admin/loop-blocks")
+def admin_loop_blocks() -> dict:
+    """Bloqueos del event loop agregados por call site (requiere ARGOS_LOOP_MONITOR=1)."""
+    monitor = get_loop_monitor()
+    if monitor is None:
+        return {"enabled": False, "hint": "ARGOS_LOOP_MONITOR=1 para activarlo"}
+    return monitor.stats()
+
+
+@app.delete("/admin/loop-blocks")
+def admin_loop_blocks_reset() -> dict:
+    """Vacía los bloqueos acumulados (p.ej. tras un cambio, para medir de nuevo)."""
+    monitor = get_loop_monitor()
+    if monitor is not None:
+        monitor.reset()
+    return {"ok": True}
+
+
 @app.get("/health")
-def health() -> dict:
+async def health() -> dict:
+    # async a propósito: admisión, pool, afinidad y hedge son estado del event loop
+    # sin locks; leerlos desde el threadpool competiría con el loop que los muta.
+    registry = health_registry()
     return {
-        "status": "ok",
+        # Solo los servicios sondeados degradan el estado; los pasivos van aparte.
+        "status": "degraded" if registry.degraded() else "ok",
+        "passive_unavailable": registry.passive_unavailable(),
         "model": load_model_config().agent,
+        # Profundidad de cola y espera del path AGENT (control de admisión).
+        "admission": _agent.admission.stats() if _agent else None,
+        # Backends del path AGENT: salud, carga, latencia y afinidad thread → slot.
+        "backends": _agent.pool.stats() if _agent else None,
+        # Breakers por servicio downstream: estado cacheado, latencia y último error.
+        "services": registry.snapshot(),
+        # Metadatos de threads en memoria: aciertos evitan un aget_state por turno.
+        "thread_cache": _agent._threads.stats() if _agent else None,
+        # Mensajes ambiguos corridos por CHAT y AGENT a la vez, y quién ganó.
+        "hedge": _agent.hedge.stats() if _agent else None,
+        # Requests idénticos en vuelo coalescidos (chat, knowledge, tools MCP).
+        "singleflight": singleflight_stats(),
+        # Cache de tools idempotentes y lecturas especuladas antes de la tool call.
+        "tool_cache": cache_stats(),
+        "prefetch": prefetch_stats(),
+        # Modelos en VRAM según Ollama y llama-swap (cache corto) y rutas desviadas por frío.
+        "residency": _agent.residency.stats() if _agent else None,
+        # Tamaños, keep_alive decididos y descargas hechas para hacer lugar en la GPU.
+        "vram": get_vram_scheduler().stats(),
+        # Último precalentado del prefijo del agente por backend (restore desde disco o prefill).
+        "prefix_warmer": [w.stats() for w in getattr(app.state, "prefix_warmers", [])],
+        # Cola del logger asíncrono: registros pendientes de escribir y descartados por cola llena.
+        "logging": logging_stats(),
     }
@@ -0,0 +1,128 @@
+"""
+Benchmark: reparto del path AGENT entre varios backends OpenAI-compatibles.
+
+Levanta `--backends` servidores stub (benchmarks/stub_openai_server.py) en este mismo
+proceso, con latencias crecientes (`--delay-ms` × 1, 2, 3…), y corre `--threads`
+conversaciones concurrentes de `--turns` turnos a través de `BackendPool`, igual que
+`_call_model`: pick(thread_id) → track() → ChatOpenAI.ainvoke.
+
+Fases:
+  1. reparto   → turnos por backend y latencia p50/p95 (el más rápido recibe más).
+  2. expulsión → se "cae" el backend 0 (/admin/down): tras ARGOS_BREAKER_FAILURES
+     fallos se abre su circuito y sus threads migran.
+  3. re-admisión → vuelve (/admin/up) y una ronda de sondeo de core.health cierra
+     su circuito.
+
+No requiere GPU ni llama-server. Uso (desde la raíz del repo):
+    python benchmarks/bench_backend_pool.py [--backends 3] [--threads 12] [--turns 5]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import socket
+import statistics
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+import httpx
+import uvicorn
+from langchain_openai import ChatOpenAI
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from core.backend_pool import Backend, BackendPool  # noqa: E402
+from core.health import health_registry  # noqa: E402
+from stub_openai_server import create_app  # noqa: E402
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_stub(name: str, delay_ms: float) -> tuple[str, uvicorn.Server]:
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(create_app(name, delay_ms), host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}/v1", server
+
+
+async def _turn(pool: BackendPool, thread_id: str, served: Counter, latencies: list[float]) -> None:
+    tried: list[Backend] = []
+    while True:
+        backend = pool.pick(thread_id, exclude=tried)
+        tried.append(backend)
+        t0 = time.perf_counter()
+        try:
+            async with pool.track(backend):
+                await backend.llm.ainvoke([("user", f"turno de {thread_id}")])
+            break
+        except Exception:
+            if not pool.has_alternative(tried):
+                raise
+    served[backend.url] += 1
+    latencies.append(1000 * (time.perf_counter() - t0))
+
+
+async def _phase(pool: BackendPool, threads: int, turns: int) -> tuple[Counter, list[float]]:
+    served: Counter = Counter()
+    latencies: list[float] = []
+
+    async def _conversation(tid: str) -> None:
+        for _ in range(turns):
+            await _turn(pool, tid, served, latencies)
+
+    await asyncio.gather(*(_conversation(f"t{i}") for i in range(threads)))
+    return served, latencies
+
+
+def _report(title: str, pool: BackendPool, served: Counter, latencies: list[float]) -> None:
+    p95 = statistics.quantiles(latencies, n=20)[-1] if len(latencies) > 1 else latencies[0]
+    print(f"\n{title}: {len(latencies)} turnos, p50={statistics.median(latencies):.0f} ms p95={p95:.0f} ms")
+    for b in pool.backends:
+        print(f"  {b.url:<32} turnos={served[b.url]:>4} circuito={b.breaker.state:<9} ewma={1000 * b.ewma_s:>6.0f} ms")
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--backends", type=int, default=3)
+    ap.add_argument("--threads", type=int, default=12)
+    ap.add_argument("--turns", type=int, default=5)
+    ap.add_argument("--delay-ms", type=float, default=100.0)
+    ap.add_argument("--slots", type=int, default=2)
+    args = ap.parse_args()
+
+    stubs = [_start_stub(f"gpu{i}", args.delay_ms * (i + 1)) for i in range(args.backends)]
+    pool = BackendPool([
+        Backend(url, ChatOpenAI(model="stub", base_url=url, api_key="sk-local", max_retries=0), slots=args.slots)
+        for url, _ in stubs
+    ])
+
+    served, latencies = await _phase(pool, args.threads, args.turns)
+    _report("1. reparto", pool, served, latencies)
+
+    down_url = stubs[0][0]
+    async with httpx.AsyncClient() as client:
+        await client.post(f"{down_url[:-3]}/admin/down")
+        served, latencies = await _phase(pool, args.threads, args.turns)
+        _report("2. backend 0 caído", pool, served, latencies)
+
+        await client.post(f"{down_url[:-3]}/admin/up")
+        await health_registry().probe_all(client)
+        served, latencies = await _phase(pool, args.threads, args.turns)
+        _report("3. backend 0 re-admitido", pool, served, latencies)
+
+    for _, server in stubs:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,112 @@
+"""
+Benchmark: latencia por turno del path AGENT con N threads concurrentes.
+
+Compara el checkpointer histórico (AsyncSqliteSaver, 1 conexión) contra
+PooledSqliteSaver (WAL, 1 escritor + pool de lectores). El modelo es un stub
+async (sleep fijo) — lo que se mide es el costo del grafo + checkpoints.
+
+El stub reemplaza el `llm` de cada backend del pool (y el respaldo), no solo
+`llm_with_tools`: implementa `bind_tools`/`bind`/`astream`/`ainvoke`, así sirve con
+cualquier `AGENT_BACKEND` (openai hace streaming y bindea `id_slot` por thread) y con
+subconjuntos de tools o backends no primarios.
+
+Uso (desde la raíz del repo):
+    python benchmarks/bench_checkpoint_concurrency.py [--turns 10] [--history 30] [--model-ms 20]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from langchain_core.messages import AIMessage, AIMessageChunk  # noqa: E402
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver  # noqa: E402
+
+from core.agent import ArgosAgent  # noqa: E402
+from core.checkpointer import PooledSqliteSaver  # noqa: E402
+
+_CONCURRENCY = (1, 8, 32)
+
+
+_ANSWER = "respuesta stub " * 40
+
+
+class StubModel:
+    """Sustituye al modelo de cada backend: responde texto fijo tras `delay` segundos."""
+
+    def __init__(self, delay: float) -> None:
+        self.delay = delay
+
+    def bind_tools(self, tools, **kwargs) -> "StubModel":
+        return self
+
+    def bind(self, **kwargs) -> "StubModel":
+        return self
+
+    async def ainvoke(self, messages, *args, **kwargs) -> AIMessage:
+        await asyncio.sleep(self.delay)
+        return AIMessage(content=_ANSWER)
+
+    async def astream(self, messages, *args, **kwargs):
+        await asyncio.sleep(self.delay)
+        yield AIMessageChunk(content=_ANSWER)
+
+
+def _install_stub(agent: ArgosAgent, stub: StubModel) -> None:
+    for backend in (*agent.pool.backends, *([agent.pool.fallback] if agent.pool.fallback else [])):
+        backend.llm = stub
+    agent.llm_with_tools = stub
+    agent._bound.clear()
+
+
+def _p95(samples: list[float]) -> float:
+    return statistics.quantiles(samples, n=20)[-1] if len(samples) > 1 else samples[0]
+
+
+async def _run(saver_cls, db: Path, concurrency: int, turns: int, history: int, model_ms: float) -> list[float]:
+    async with saver_cls.from_conn_string(str(db)) as memory:
+        agent = ArgosAgent(memory)
+        _install_stub(agent, StubModel(model_ms / 1000))
+        threads = [f"bench-{concurrency}-{i}" for i in range(concurrency)]
+
+        # Historia previa: checkpoints de tamaño realista antes de medir.
+        for tid in threads:
+            for h in range(history):
+                await agent._run_agent(f"mensaje previo {h}", tid)
+
+        latencies: list[float] = []
+
+        async def worker(tid: str) -> None:
+            for t in range(turns):
+                t0 = time.perf_counter()
+                await agent._run_agent(f"turno {t}", tid)
+                latencies.append((time.perf_counter() - t0) * 1000)
+
+        await asyncio.gather(*(worker(tid) for tid in threads))
+        return latencies
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--turns", type=int, default=10)
+    ap.add_argument("--history", type=int, default=30)
+    ap.add_argument("--model-ms", type=float, default=20.0)
+    args = ap.parse_args()
+
+    print(f"turns={args.turns} history={args.history} model_ms={args.model_ms}")
+    print(f"{'saver':<20}{'threads':>8}{'p50 ms':>10}{'p95 ms':>10}")
+    for saver_cls in (AsyncSqliteSaver, PooledSqliteSaver):
+        for n in _CONCURRENCY:
+            with tempfile.TemporaryDirectory() as tmp:
+                lat = await _run(saver_cls, Path(tmp) / "bench.db", n, args.turns, args.history, args.model_ms)
+            print(f"{saver_cls.__name__:<20}{n:>8}{statistics.median(lat):>10.1f}{_p95(lat):>10.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,94 @@
+"""
+Benchmark: costo de import de la API (lo que se paga en cada arranque y redeploy).
+
+Cada medición es un proceso nuevo con `python -X importtime -c "import <módulo>"`,
+así no hay caché de módulos entre corridas. Del stderr de -X importtime se saca:
+
+  - el tiempo total de import (mejor de `--runs`, el más estable);
+  - los paquetes de primer nivel más caros (acumulado: incluye sus dependencias);
+  - los módulos propios (core.*, utils.*, api) más caros por tiempo propio;
+  - qué dependencias pesadas de tools quedaron cargadas al importar. ddgs, PyGithub,
+    duckdb y langchain_openai se importan en el primer uso de su tool/backend: si
+    alguna aparece acá, un import volvió a subir a nivel de módulo.
+
+Uso (desde la raíz del repo):
+    python benchmarks/bench_import_time.py [--module api] [--runs 5] [--top 12]
+"""
+from __future__ import annotations
+
+import argparse
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+_ROOT = Path(__file__).resolve().parents[1]
+
+# Solo deben cargarse cuando se usa la tool (o el backend) que las necesita.
+_LAZY = ("ddgs", "github", "duckdb", "langchain_openai")
+_OWN = ("api", "core", "utils")
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def _measure(module: str) -> list[tuple[int, int, int, str]]:
+    """(propio µs, acumulado µs, profundidad, módulo) por cada import del proceso."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=_ROOT, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        tail = proc.stderr.strip().splitlines()[-1:] or ["?"]
+        raise SystemExit(f"import {module} falló: {tail[0]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            rows.append((int(m[1]), int(m[2]), (len(m[3]) - 1) // 2, m[4]))
+    return rows
+
+
+def _report(module: str, rows: list[tuple[int, int, int, str]], top: int) -> None:
+    total = sum(r[0] for r in rows)
+    print(f"import {module}: {total / 1000:.0f} ms, {len(rows)} módulos")
+
+    # Un paquete aparece varias veces (submódulos importados desde distintos lugares):
+    # se suma el acumulado de cada entrada cuyo importador es otro paquete. -X importtime
+    # imprime en post-orden, así que se recorre al revés para conocer al importador.
+    packages: dict[str, int] = {}
+    stack: list[str] = []
+    for _own, cumulative, depth, name in reversed(rows):
+        del stack[depth:]
+        importer = stack[-1] if stack else None
+        stack.append(name)
+        root = name.split(".")[0]
+        if root not in _OWN and (importer is None or importer.split(".")[0] != root):
+            packages[root] = packages.get(root, 0) + cumulative
+    print(f"\n{'dependencia':<28}{'acumulado ms':>14}")
+    for name, us in sorted(packages.items(), key=lambda kv: kv[1], reverse=True)[:top]:
+        print(f"{name:<28}{us / 1000:>14.1f}")
+
+    own_rows = sorted((r for r in rows if r[3].split(".")[0] in _OWN), key=lambda r: r[0], reverse=True)
+    print(f"\n{'módulo propio':<28}{'propio ms':>11}{'acumulado ms':>14}")
+    for own, cumulative, _depth, name in own_rows[:top]:
+        print(f"{name:<28}{own / 1000:>11.1f}{cumulative / 1000:>14.1f}")
+
+    loaded = sorted({r[3].split(".")[0] for r in rows} & set(_LAZY))
+    print(f"\ndependencias de tools cargadas al importar: {', '.join(loaded) or 'ninguna'}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--module", default="api", help="módulo a importar (api, core.agent, core.tools…)")
+    ap.add_argument("--runs", type=int, default=5, help="procesos a medir; se reporta el más rápido")
+    ap.add_argument("--top", type=int, default=12)
+    args = ap.parse_args()
+
+    runs = [_measure(args.module) for _ in range(args.runs)]
+    totals = sorted(sum(r[0] for r in rows) / 1000 for rows in runs)
+    print(f"{args.runs} procesos: mejor {totals[0]:.0f} ms, mediana {totals[len(totals) // 2]:.0f} ms\n")
+    best = min(runs, key=lambda rows: sum(r[0] for r in rows))
+    _report(args.module, best, args.top)
+
+
+if __name__ == "__main__":
+    main()
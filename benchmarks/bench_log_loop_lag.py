@@ -0,0 +1,128 @@
+"""
+Benchmark: latencia del event loop con logging a archivo, inline vs cola.
+
+Un "request" simulado loguea `--lines` líneas JSON por turno (como el path AGENT:
+router, admisión, backend, tools) mientras un monitor mide cuánto se atrasa el loop
+respecto de un tick de 1 ms. Dos configuraciones de utils.logger_config:
+
+  inline  → ARGOS_LOG_ASYNC=0: json.dumps + write() en el hilo del loop.
+  cola    → QueueHandler + QueueListener: el loop solo encola.
+
+`--disk-ms` agrega una demora por write() al handler de archivo para emular un disco
+lento o compartido (NFS, volumen de Docker con la GPU escribiendo checkpoints): ahí
+es donde el logging inline frena todos los requests.
+
+Reporta lag p50/p99/máx del loop, líneas/s y registros descartados por cola llena.
+
+Uso (desde la raíz del repo):
+    python benchmarks/bench_log_loop_lag.py [--seconds 3] [--turns-per-s 200] [--lines 8] [--disk-ms 0.5]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from utils import logger_config  # noqa: E402
+
+_TICK_S = 0.001
+
+
+def _slow_disk(handler: logging.Handler, delay_s: float) -> None:
+    """Envuelve emit() del handler de archivo con una demora fija por registro."""
+    if delay_s <= 0:
+        return
+    emit = handler.emit
+
+    def slow_emit(record: logging.LogRecord) -> None:
+        time.sleep(delay_s)
+        emit(record)
+
+    handler.emit = slow_emit  # type: ignore[method-assign]
+
+
+def _file_handler(logger: logging.Logger) -> logging.Handler:
+    listener = logger_config._listener
+    handlers = listener.handlers if listener is not None else logger.handlers
+    return next(h for h in handlers if isinstance(h, logging.FileHandler))
+
+
+async def _monitor(lags: list[float], stop: asyncio.Event) -> None:
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        t0 = loop.time()
+        await asyncio.sleep(_TICK_S)
+        lags.append(1000 * max(0.0, loop.time() - t0 - _TICK_S))
+
+
+async def _load(logger: logging.Logger, seconds: float, turns_per_s: float, lines: int) -> int:
+    written = 0
+    deadline = time.perf_counter() + seconds
+    turn = 0
+    while time.perf_counter() < deadline:
+        for i in range(lines):
+            logger.info(
+                "[AGENT path] thread=%s paso=%d", f"bench-{turn}", i,
+                extra={"extra_fields": {"trace_id": f"{turn:016x}", "backend": "http://gpu0:8080/v1"}},
+            )
+        written += lines
+        turn += 1
+        await asyncio.sleep(1 / turns_per_s)
+    return written
+
+
+async def _run(mode: str, log_file: Path, args: argparse.Namespace) -> dict[str, float]:
+    logger = logger_config.setup_argos_logging(
+        log_file=str(log_file), enable_console=False, use_queue=mode == "cola"
+    )
+    _slow_disk(_file_handler(logger), args.disk_ms / 1000)
+
+    lags: list[float] = []
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(_monitor(lags, stop))
+    t0 = time.perf_counter()
+    written = await _load(logger, args.seconds, args.turns_per_s, args.lines)
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    await monitor
+
+    dropped = logger_config.logging_stats()["dropped"]
+    logger_config.stop_argos_logging()  # drena la cola antes de medir el siguiente modo
+    lags.sort()
+    return {
+        "p50": statistics.median(lags),
+        "p99": lags[int(0.99 * (len(lags) - 1))],
+        "max": lags[-1],
+        "lines_s": written / elapsed,
+        "dropped": dropped,
+    }
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--seconds", type=float, default=3.0)
+    ap.add_argument("--turns-per-s", type=float, default=200.0)
+    ap.add_argument("--lines", type=int, default=8, help="líneas de log por turno")
+    ap.add_argument("--disk-ms", type=float, default=0.5, help="demora simulada por write()")
+    args = ap.parse_args()
+
+    print(f"{args.turns_per_s:.0f} turnos/s × {args.lines} líneas, disco +{args.disk_ms} ms/write, {args.seconds}s")
+    print(f"{'modo':<8}{'lag p50 ms':>12}{'p99 ms':>9}{'máx ms':>9}{'líneas/s':>10}{'descartes':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("inline", "cola"):
+            r = await _run(mode, Path(tmp) / f"{mode}.log", args)
+            print(
+                f"{mode:<8}{r['p50']:>12.2f}{r['p99']:>9.2f}{r['max']:>9.2f}"
+                f"{r['lines_s']:>10.0f}{r['dropped']:>11.0f}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,115 @@
+"""
+Benchmark: time-to-first-token del path AGENT tras una recarga del modelo en llama-swap.
+
+Escenarios (cada uno empieza con `GET /unload` salvo "hot"):
+  cold      → el primer request real carga el modelo y procesa todo el prefijo.
+  prefill   → modelo cargado + PrefixWarmer sin archivo de slot (prefill de 1 token),
+              luego el request real.
+  restore   → modelo cargado + PrefixWarmer restaurando el KV guardado del prefijo.
+  hot       → request inmediato con el modelo ya caliente (referencia).
+
+Mide TTFT desde el cliente (primer chunk del stream) y `prompt_n` / `prompt_ms` que
+reporta llama-server. Requiere llama-swap + llama-server reales (backend openai);
+para "restore" el llama-server debe correr con `--slot-save-path`.
+
+Uso (desde la raíz del repo):
+    AGENT_BACKEND=openai python benchmarks/bench_prefix_warm.py [--runs 3]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.config import load_model_config  # noqa: E402
+from core.prefix_warmer import PrefixWarmer  # noqa: E402
+from core.prompts import get_system_prompt  # noqa: E402
+from core.tools import ARGOS_TOOLS  # noqa: E402
+
+_QUESTION = "¿Qué archivos hay en /projects/asmodeus y cuál es el estado actual del proyecto?"
+_EXTRA_BODY = {"chat_template_kwargs": {"enable_thinking": False}}
+
+
+async def _ttft(client: httpx.AsyncClient, warmer: PrefixWarmer) -> tuple[float, dict]:
+    body = {
+        "model": warmer.model,
+        "messages": [warmer._messages[0], {"role": "user", "content": _QUESTION}],
+        "tools": warmer._tools,
+        "max_tokens": 16,
+        "stream": True,
+        "cache_prompt": True,
+        **_EXTRA_BODY,
+    }
+    t0 = time.perf_counter()
+    first: float | None = None
+    timings: dict = {}
+    async with client.stream("POST", f"{warmer.base_url}/chat/completions", json=body) as r:
+        r.raise_for_status()
+        async for line in r.aiter_lines():
+            if not line.startswith("data: ") or line == "data: [DONE]":
+                continue
+            if first is None:
+                first = time.perf_counter() - t0
+            timings = json.loads(line[6:]).get("timings", timings)
+    return 1000 * (first or time.perf_counter() - t0), timings
+
+
+async def _unload_and_load(client: httpx.AsyncClient, warmer: PrefixWarmer) -> None:
+    await client.get(f"{warmer.root}/unload")
+    # Carga el modelo con un request mínimo SIN el prefijo del agente.
+    await client.post(
+        f"{warmer.base_url}/chat/completions",
+        json={"model": warmer.model, "messages": [{"role": "user", "content": "hi"}], "max_tokens": 1},
+    )
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=3)
+    args = ap.parse_args()
+
+    cfg = load_model_config()
+    warmer = PrefixWarmer(cfg.agent_base_url, cfg.agent, get_system_prompt(), ARGOS_TOOLS, extra_body=_EXTRA_BODY)
+    results: dict[str, list[tuple[float, dict]]] = {k: [] for k in ("cold", "prefill", "restore", "hot")}
+
+    async with httpx.AsyncClient(timeout=600.0) as client:
+        for _ in range(args.runs):
+            await client.get(f"{warmer.root}/unload")
+            results["cold"].append(await _ttft(client, warmer))
+
+            await _unload_and_load(client, warmer)
+            warmer._slots_supported = False  # forzar prefill
+            await warmer.warm(client)
+            results["prefill"].append(await _ttft(client, warmer))
+
+            warmer._slots_supported = True
+            await warmer.prefill(client, 0)
+            await warmer._slot_action(client, 0, "save")
+            await _unload_and_load(client, warmer)
+            if (await warmer.warm(client))["mode"] == "restore":
+                results["restore"].append(await _ttft(client, warmer))
+
+            results["hot"].append(await _ttft(client, warmer))
+
+    print(f"model={cfg.agent} runs={args.runs} prefix_file={warmer.filename}")
+    print(f"{'escenario':<10}{'TTFT p50 ms':>14}{'prompt_n':>10}{'prompt_ms':>11}")
+    for name, samples in results.items():
+        if not samples:
+            print(f"{name:<10}{'n/a (sin --slot-save-path)':>35}")
+            continue
+        ttft = statistics.median(s[0] for s in samples)
+        prompt_n = statistics.median(s[1].get("prompt_n", 0) for s in samples)
+        prompt_ms = statistics.median(s[1].get("prompt_ms", 0.0) for s in samples)
+        print(f"{name:<10}{ttft:>14.1f}{prompt_n:>10.0f}{prompt_ms:>11.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,87 @@
+"""
+Benchmark: prefill por turno en threads largos, con y sin afinidad thread → slot.
+
+Simula `--threads` conversaciones intercaladas (round robin) contra el llama-server
+del agente. Cada turno agrega una pregunta + respuesta a la historia del thread y
+manda el request completo, como hace el grafo. Sin afinidad el servidor elige slot
+libremente; con afinidad cada thread usa el slot de `SlotAffinity`.
+
+Reporta `prompt_n` (tokens reprocesados) y `prompt_ms` de llama-server por turno.
+Requiere llama-server real con `-np` >= 2 (backend openai). Con más threads que
+slots se ve también el costo de la reasignación LRU.
+
+Uso (desde la raíz del repo):
+    AGENT_BACKEND=openai python benchmarks/bench_slot_affinity.py [--threads 4] [--turns 8]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import sys
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.config import load_model_config  # noqa: E402
+from core.prompts import get_system_prompt  # noqa: E402
+from core.slot_affinity import SlotAffinity  # noqa: E402
+
+_EXTRA_BODY = {"chat_template_kwargs": {"enable_thinking": False}}
+# Relleno por turno para que la historia crezca como en una sesión técnica real.
+_FILLER = "Contexto del paso anterior: " + "línea de log del contenedor con detalles. " * 40
+
+
+async def _turn(client: httpx.AsyncClient, cfg, messages: list[dict], slot: int | None) -> dict:
+    body = {
+        "model": cfg.agent,
+        "messages": messages,
+        "max_tokens": 32,
+        "temperature": 0.0,
+        "cache_prompt": True,
+        **_EXTRA_BODY,
+    }
+    if slot is not None:
+        body["id_slot"] = slot
+    r = await client.post(f"{cfg.agent_base_url.rstrip('/')}/chat/completions", json=body)
+    r.raise_for_status()
+    data = r.json()
+    messages.append({"role": "assistant", "content": data["choices"][0]["message"].get("content") or ""})
+    return data.get("timings", {})
+
+
+async def _run(cfg, threads: int, turns: int, affinity: SlotAffinity | None) -> list[dict]:
+    histories = {f"t{i}": [{"role": "system", "content": get_system_prompt()}] for i in range(threads)}
+    samples: list[dict] = []
+    async with httpx.AsyncClient(timeout=600.0) as client:
+        for turn in range(turns):
+            for tid, messages in histories.items():
+                messages.append({"role": "user", "content": f"{_FILLER}\nTurno {turn} del thread {tid}: resume."})
+                slot = affinity.slot_for(tid) if affinity else None
+                timings = await _turn(client, cfg, messages, slot)
+                if turn > 0:  # el primer turno siempre es prefill completo
+                    samples.append(timings)
+    return samples
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--threads", type=int, default=4)
+    ap.add_argument("--turns", type=int, default=8)
+    args = ap.parse_args()
+
+    cfg = load_model_config()
+    print(f"model={cfg.agent} slots={cfg.agent_parallel} threads={args.threads} turns={args.turns}")
+    print(f"{'modo':<14}{'prompt_n p50':>14}{'prompt_ms p50':>15}{'prompt_ms p95':>15}")
+    for name, affinity in (("sin afinidad", None), ("con afinidad", SlotAffinity(cfg.agent_parallel))):
+        samples = await _run(cfg, args.threads, args.turns, affinity)
+        prompt_n = statistics.median(s.get("prompt_n", 0) for s in samples)
+        ms = [s.get("prompt_ms", 0.0) for s in samples]
+        p95 = statistics.quantiles(ms, n=20)[-1] if len(ms) > 1 else ms[0]
+        print(f"{name:<14}{prompt_n:>14.0f}{statistics.median(ms):>15.1f}{p95:>15.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
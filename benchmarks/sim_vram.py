@@ -0,0 +1,120 @@
+"""
+Simulación: residencia en VRAM con keep_alive fijos vs `VramScheduler`.
+
+Corre la misma jornada contra una GPU simulada (`SimulatedBackend`, `--vram-gb`):
+chat, turnos del agente con un `decarabia_analyze` en medio, un lote de imágenes y
+ratos ociosos. Dos políticas:
+
+  fija        → los keep_alive de antes: chat/embed -1, visión sin keep_alive
+                (default de Ollama, 5 min), agente con el ttl de llama-swap (600 s).
+  scheduler   → `VramScheduler` como lo usa el servidor: busy() durante el turno del
+                agente (core.agent), busy()+prepare() en cada `decarabia_analyze`
+                (core.mcp_vision), batch() cuando una ronda de tools trae varias
+                imágenes (core.agent `_call_tools`), keep_alive decidido por rol.
+
+El "lote" de la jornada es esa ronda: el modelo pidió N `decarabia_analyze` en un
+mismo mensaje. Imágenes sueltas en rondas distintas NO forman lote en el servidor
+(cada una descarga visión al terminar); la jornada las modela como `vision` o
+`agent_vision`. Reporta cargas en frío, llamadas con capas en CPU (offload),
+descargas y segundos de espera acumulados. Sin hardware ni red.
+
+Uso (desde la raíz del repo):
+    python benchmarks/sim_vram.py [--vram-gb 32] [--days 1]
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from contextlib import nullcontext
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.config import ModelConfig  # noqa: E402
+from core.vram import SimulatedBackend, VramScheduler, specs_from_config  # noqa: E402
+
+_CFG = ModelConfig(
+    agent="qwen3.6-35b-a3b", chat="qwen3.5:0.8b", vision="gemma4:26b", embed="nomic-embed-text",
+    ollama_base_url="sim", agent_backend="openai", agent_base_url="sim", agent_parallel=1,
+)
+_SWAP_TTL = 600
+_LOAD_S = {_CFG.agent: 15.0, _CFG.vision: 9.0, _CFG.chat: 1.0, _CFG.embed: 0.5}
+
+# (acción, argumento): chat | embed | agent <n llamadas> | agent_vision <n> (turno con
+# decarabia en medio) | vision | batch <n imágenes> | idle <s>
+_DAY = [
+    ("embed", 0), ("chat", 0), ("chat", 0),
+    ("agent_vision", 5),
+    ("idle", 60), ("chat", 0),
+    ("agent", 4),
+    ("idle", 120),
+    ("batch", 6),                                # ronda con 6 decarabia_analyze
+    ("agent", 3), ("chat", 0),
+    ("idle", 400),
+    ("vision", 0), ("agent", 3), ("embed", 0),
+    ("idle", 900), ("agent", 2), ("chat", 0),
+]
+
+
+def _run(policy: str, vram_gb: float, days: int) -> SimulatedBackend:
+    specs = specs_from_config(_CFG)
+    gpu = SimulatedBackend(vram_gb, {s.model: s.gb for s in specs}, _LOAD_S)
+    sched = VramScheduler(specs, {"ollama": gpu, "swap": gpu}, vram_gb=vram_gb)
+    model = {s.role: s.model for s in specs}
+
+    def keep(role: str) -> int | None:
+        if role == "agent":
+            return _SWAP_TTL
+        if policy == "fija":
+            return None if role == "vision" else -1
+        return sched.keep_alive(role)
+
+    def vision_call() -> None:
+        if policy == "scheduler":
+            with sched.busy("vision"):
+                sched.prepare("vision")
+                gpu.request(model["vision"], keep("vision"), 6.0)
+        else:
+            gpu.request(model["vision"], keep("vision"), 6.0)
+
+    def agent_turn(calls: int, with_vision: bool = False) -> None:
+        with sched.busy("agent") if policy == "scheduler" else nullcontext():
+            for i in range(calls):
+                gpu.request(model["agent"], keep("agent"), 2.0)
+                if with_vision and i == calls // 2:
+                    vision_call()
+
+    for _ in range(days):
+        for action, arg in _DAY:
+            if action == "idle":
+                gpu.advance(arg)
+            elif action in ("chat", "embed"):
+                gpu.request(model[action], keep(action), 0.5)
+            elif action == "vision":
+                vision_call()
+            elif action in ("agent", "agent_vision"):
+                agent_turn(arg, with_vision=action == "agent_vision")
+            elif action == "batch":
+                with sched.batch("vision") if policy == "scheduler" else nullcontext():
+                    for _ in range(arg):
+                        vision_call()
+        gpu.advance(3600)
+    return gpu
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--vram-gb", type=float, default=32.0)
+    ap.add_argument("--days", type=int, default=1)
+    args = ap.parse_args()
+
+    print(f"VRAM={args.vram_gb} GB  días={args.days}")
+    print(f"{'política':<11}{'cargas frío':>12}{'offload':>9}{'descargas':>11}{'espera s':>10}")
+    for policy in ("fija", "scheduler"):
+        gpu = _run(policy, args.vram_gb, args.days)
+        c = gpu.counts
+        print(f"{policy:<11}{c['cold_loads']:>12}{c['offloaded_calls']:>9}{c['unloads']:>11}{gpu.stall_s:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
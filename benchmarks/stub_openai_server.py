@@ -0,0 +1,100 @@
+"""
+Servidor stub OpenAI-compatible para probar el pool de backends AGENT sin GPU.
+
+Expone lo mínimo que usan ChatOpenAI y el sondeo de `BackendPool`:
+  GET  /v1/models              → lista con un modelo (503 si está "caído")
+  POST /v1/chat/completions    → respuesta fija tras `delay_ms` (también SSE con stream=true)
+  POST /admin/down | /admin/up → simula caída / vuelta del backend
+
+Uso (desde la raíz del repo), p.ej. dos "GPUs" con latencias distintas:
+    python benchmarks/stub_openai_server.py --port 9101 --delay-ms 150
+    python benchmarks/stub_openai_server.py --port 9102 --delay-ms 400
+    AGENT_BACKEND=openai AGENT_BASE_URL=http://localhost:9101/v1,http://localhost:9102/v1 uvicorn api:app
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+def create_app(name: str = "stub", delay_ms: float = 100.0) -> FastAPI:
+    app = FastAPI()
+    app.state.up = True
+    app.state.delay_ms = delay_ms
+    app.state.served = 0
+
+    def _down() -> JSONResponse:
+        return JSONResponse({"error": {"message": f"{name} down"}}, status_code=503)
+
+    @app.get("/v1/models")
+    async def models():
+        if not app.state.up:
+            return _down()
+        return {"object": "list", "data": [{"id": name, "object": "model"}]}
+
+    @app.post("/v1/chat/completions")
+    async def completions(request: Request):
+        if not app.state.up:
+            return _down()
+        body = await request.json()
+        await asyncio.sleep(app.state.delay_ms / 1000)
+        app.state.served += 1
+        cid = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        content = f"respuesta de {name}"
+        model = body.get("model", name)
+        if not body.get("stream"):
+            return {
+                "id": cid,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+            }
+
+        async def _sse():
+            for delta, finish in (({"role": "assistant", "content": content}, None), ({}, "stop")):
+                chunk = {
+                    "id": cid,
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(_sse(), media_type="text/event-stream")
+
+    @app.post("/admin/down")
+    async def down():
+        app.state.up = False
+        return {"up": False}
+
+    @app.post("/admin/up")
+    async def up():
+        app.state.up = True
+        return {"up": True}
+
+    @app.get("/admin/stats")
+    async def stats():
+        return {"name": name, "up": app.state.up, "served": app.state.served}
+
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--port", type=int, default=9101)
+    ap.add_argument("--delay-ms", type=float, default=100.0)
+    ap.add_argument("--name", default=None)
+    args = ap.parse_args()
+    uvicorn.run(create_app(args.name or f"stub-{args.port}", args.delay_ms), host="127.0.0.1", port=args.port)
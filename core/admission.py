@@ -0,0 +1,181 @@
+"""
+Argos Core - Control de admisión del path AGENT.
+
+llama-swap sirve el modelo agente desde UN llama-server: si Telegram, el dashboard
+y los clientes MCP disparan queries AGENT a la vez compiten por el mismo slot sin
+ningún orden y una ráfaga empuja a todos más allá de su timeout.
+
+`AdmissionController` va delante del grafo en `ArgosAgent.run`:
+  - `slots` ejecuciones simultáneas (= slots paralelos del backend, `agent_parallel`);
+  - cola acotada (`max_queue`): con los slots ocupados y la cola llena →
+    `AdmissionRejected` (HTTP 429 + Retry-After). Con un slot libre nunca se rechaza
+    (también con `ARGOS_AGENT_QUEUE=0`: sin cola, solo se rechaza lo que esperaría);
+  - posición en cola: quien tiene que esperar un slot recibe su lugar por
+    `on_queued(posición)` (el stream lo manda como evento `queued`);
+  - prioridades: "interactive" (chat de un humano) antes que "background" (jobs);
+  - serialización por thread_id: el mismo thread nunca corre dos turnos a la vez
+    (dos turnos concurrentes sobre un checkpoint se pisarían la historia).
+
+Todo corre en el event loop (sin locks de threading): los lectores (`/health`,
+`/metrics`) también son async, nunca leen desde el threadpool.
+"""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable
+
+PRIORITIES: dict[str, int] = {"interactive": 0, "background": 10}
+
+_MAX_QUEUE = int(os.getenv("ARGOS_AGENT_QUEUE", "16"))
+_WAIT_SAMPLES = 512
+
+
+class AdmissionRejected(Exception):
+    """Cola llena. `queue_depth` y `retry_after` (s) van en la respuesta 429."""
+
+    def __init__(self, queue_depth: int, retry_after: int) -> None:
+        super().__init__(f"agente saturado: {queue_depth} requests en cola")
+        self.queue_depth = queue_depth
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Semáforo con prioridades + cola acotada + lock por thread_id."""
+
+    def __init__(self, slots: int = 1, max_queue: int = _MAX_QUEUE) -> None:
+        self.slots = max(1, slots)
+        self.max_queue = max(0, max_queue)
+        self._active = 0
+        self._pending = 0
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._thread_locks: dict[str, tuple[asyncio.Lock, int]] = {}
+        self._waits: deque[float] = deque(maxlen=_WAIT_SAMPLES)
+        self._service_ewma = 5.0  # s por turno AGENT — semilla para Retry-After
+        self.admitted = 0
+        self.rejected = 0
+
+    # ── API ─────────────────────────────────────────────────────────────────
+
+    @property
+    def queue_depth(self) -> int:
+        return self._pending
+
+    def has_capacity(self) -> bool:
+        """True si un request nuevo entraría ya, sin hacer cola."""
+        return self._active < self.slots and self._pending == 0
+
+    @asynccontextmanager
+    async def admit(
+        self,
+        thread_id: str,
+        priority: str = "interactive",
+        on_queued: Callable[[int], None] | None = None,
+    ) -> AsyncIterator[float]:
+        """Espera turno (thread + slot). Cede los segundos esperados en cola.
+
+        Si hay que esperar un slot, `on_queued(posición)` recibe el lugar en la cola
+        (1 = el próximo), contando a los de igual o mayor prioridad que llegaron antes.
+        """
+        # En espera = los que no entran en los slots (pendientes incluidos: ya van a ocuparlos).
+        if self._active + self._pending >= self.slots + self.max_queue:
+            self.rejected += 1
+            raise AdmissionRejected(self._pending, self._retry_after())
+
+        prio = PRIORITIES.get(priority, PRIORITIES["background"])
+        t0 = time.monotonic()
+        self._pending += 1
+        lock = self._ref_thread(thread_id)
+        try:
+            await lock.acquire()
+        except BaseException:
+            self._pending -= 1
+            self._unref_thread(thread_id)
+            raise
+
+        try:
+            try:
+                await self._acquire_slot(prio, on_queued)
+            finally:
+                self._pending -= 1
+            waited = time.monotonic() - t0
+            self._waits.append(waited)
+            self.admitted += 1
+            started = time.monotonic()
+            try:
+                yield waited
+            finally:
+                self._service_ewma = 0.8 * self._service_ewma + 0.2 * (time.monotonic() - started)
+                self._release_slot()
+        finally:
+            lock.release()
+            self._unref_thread(thread_id)
+
+    def stats(self) -> dict[str, float | int]:
+        waits = sorted(self._waits)
+        p95 = waits[int(0.95 * (len(waits) - 1))] if waits else 0.0
+        return {
+            "slots": self.slots,
+            "active": self._active,
+            "queue_depth": self._pending,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "wait_ms_avg": round(1000 * sum(waits) / len(waits), 1) if waits else 0.0,
+            "wait_ms_p95": round(1000 * p95, 1),
+            "wait_ms_max": round(1000 * waits[-1], 1) if waits else 0.0,
+        }
+
+    # ── Internos ────────────────────────────────────────────────────────────
+
+    def _retry_after(self) -> int:
+        return max(1, round(self._service_ewma * (self._pending + 1) / self.slots))
+
+    def _ref_thread(self, thread_id: str) -> asyncio.Lock:
+        lock, refs = self._thread_locks.get(thread_id, (None, 0))
+        lock = lock or asyncio.Lock()
+        self._thread_locks[thread_id] = (lock, refs + 1)
+        return lock
+
+    def _unref_thread(self, thread_id: str) -> None:
+        lock, refs = self._thread_locks[thread_id]
+        if refs <= 1:
+            del self._thread_locks[thread_id]
+        else:
+            self._thread_locks[thread_id] = (lock, refs - 1)
+
+    async def _acquire_slot(self, prio: int, on_queued: Callable[[int], None] | None = None) -> None:
+        # Descartar waiters cancelados: si solo quedan muertos, el slot libre es nuestro.
+        if any(f.done() for _, _, f in self._waiters):
+            self._waiters = [w for w in self._waiters if not w[2].done()]
+            heapq.heapify(self._waiters)
+        if self._active < self.slots and not self._waiters:
+            self._active += 1
+            return
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (prio, next(self._seq), fut))
+        if on_queued is not None:
+            # El recién llegado va detrás de todos los de su prioridad (o mejor): él incluido.
+            on_queued(sum(1 for p, _, f in self._waiters if p <= prio and not f.done()))
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # El slot ya nos fue cedido justo antes de cancelar → devolverlo.
+                self._release_slot()
+            raise
+
+    def _release_slot(self) -> None:
+        # Ceder el slot al siguiente vivo de mayor prioridad; si no hay, liberarlo.
+        while self._waiters:
+            _, _, fut = heapq.heappop(self._waiters)
+            if not fut.done():
+                fut.set_result(None)
+                return
+        self._active -= 1
@@ -5,77 +5,80 @@ Arquitectura de dos caminos:
   CHAT  → qwen3:1.7b sin tools  → respuesta en ~1s
   AGENT → qwen3-coder con tools → respuesta en ~5-8s
 
-El router es heurístico (keywords) — 0ms de overhead.
+Antes del router, las órdenes inequívocas (luces, hora, snapshot) van por el
+fast-path de core.intents: tool directa + plantilla, sin LLM.
+
+El router es heurístico (keywords) — 0ms de overhead. Los mensajes que solo
+tocan keywords ambiguas (banda de incertidumbre) van por HEDGE: CHAT y AGENT en
+paralelo, gana el primero que decida (ver `_run_hedged`). Si el modelo agente no
+está cargado (core.residency), esos mensajes van solo por CHAT: no vale una carga
+en frío de ~15 s por un mensaje dudoso.
+
+Con backend openai el nodo agent hace streaming y las tool calls de solo lectura
+arrancan apenas sus argumentos están completos (ver `_stream_model`).
 """
+import asyncio
+import json
 import os
+import time
+from contextvars import ContextVar
 from datetime import datetime
 from pathlib import Path
-from typing import Annotated, TypedDict, List
+from typing import Annotated, Any, Callable, TypedDict, List
 
 import httpx
 from langgraph.graph import StateGraph, END, START
 from langgraph.graph.message import add_messages
-from langgraph.prebuilt import ToolNode, tools_condition
+from langgraph.prebuilt import tools_condition
 from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
 from langchain_ollama import ChatOllama
-from langchain_core.messages import SystemMessage, HumanMessage, BaseMessage
+from langchain_core.messages import AIMessage, AIMessageChunk, SystemMessage, HumanMessage, BaseMessage, ToolMessage
+from langchain_core.messages.utils import message_chunk_to_message
+from langchain_core.runnables import Runnable, RunnableConfig
 
+from core.admission import AdmissionController, AdmissionRejected
+from core.backend_pool import Backend, BackendPool
 from core.config import load_model_config
+from core.health import register_service
+from core.hedging import HedgeBudget
+from core.intents import FAST_PATH_MODEL, match_intent, run_intent
+from core.metrics import counter, gauge, histogram
+from core.prefetch import start_prefetch
+from core.prefix_warmer import PrefixWarmer
 from core.prompts import get_system_prompt, get_chat_prompt
-from core.tools import ARGOS_TOOLS
+from core.request_context import DeadlineExceeded, budget, current_token, remaining
+from core.residency import COLD_LOAD_S, ResidencyMonitor
+from core.singleflight import flight_key, get_flight
+from core.thread_cache import ThreadStateCache
+from core.tool_exec import ParallelToolNode
+from core.tool_select import AGENT_KEYWORDS, select_tool_names, user_question
+from core.tracing import annotate_trace, span
+from core.tools import argos_tools
+from core.vram import get_vram_scheduler, keep_alive_for
 from utils.logger_config import get_argos_logger
 
 logger = get_argos_logger()
 
-# Palabras clave que indican que el usuario quiere una tarea técnica con tools.
-# Todo lo demás va al path de chat rápido.
-_AGENT_KEYWORDS = (
-    # Archivos y sistema
-    "archivo", "file", "directorio", "folder", "carpeta",
-    "lee ", "leer", "read", "write", "escribe", "guardar", "save",
-    "lista los", "list ", "listame",
-    # GitHub
-    "github", "repo", "repositorio", "issue", "pull request", "commit",
-    # Web
-    "busca en internet", "busca en la web", "web search", "busca online",
-    "investiga en internet", "googlea",
-    # Código / técnico
-    "código", "codigo", "script", "programa", "función", "funcion",
-    "class ", "clase ", "import ", "instala", "dependencia",
-    "docker", "contenedor", "container",
-    "error en", "bug en", "debug",
-    "refactor", "implementa", "crea el archivo", "crea un script",
-    # Matemáticas (1.7B falla en aritmética, mejor el modelo pesado)
-    "cuanto es ", "calcula ", "cuánto es ", "resultado de ",
-    "multiplica", "divide", "suma ", "resta ",
-    # Terminal / comandos
-    "ejecuta", "corre el comando", "run ", "terminal", "bash", "shell",
-    "git log", "git status", "git diff", "grep ", "find ",
-    "pytest", "python ", "pip ", "uv ",
-    "correr", "ejecutar", "comando",
-    # Ecosistema / proyectos de Chucho
-    "mi proyecto", "mis proyectos", "ecosistema", "el ecosistema",
-    "quién es", "quien es", "quién hace", "quien hace",
-    "qué hace", "que hace", "qué puede", "que puede",
-    "encargado", "responsable", "subagente",
-    "estado actual", "actualmente", "pendiente", "fase",
-    "bug", "falla", "error actual",
-    "orobas", "asmodeus_app", "asmodeus app", "app móvil", "app movil",
-    "pixel 9", "la app", "el app",
-    "vigilanc", "amon", "baael", "vassago", "furfur", "malphas",
-    "industrial index", "r-66", "papier",
-    "telegram-sum", "telegram summ",
-    "cómo funciona", "como funciona",
-    "qué es el ecosistema", "háblame de", "hablame de",
-    "cuéntame sobre", "cuentame sobre",
-    "project map", "handoff", "sessions",
-    # Manos del ecosistema (Plan Jarvis) — acciones que requieren tools
-    "luz", "luces", "enciende", "apaga", "prende", "brillo", "escena",
-    "cámara", "camara", "foto", "snapshot", "captura", "vigilancia",
-    "analiza la imagen", "analiza esta imagen", "describe la imagen",
-    "genera una imagen", "genera imagen", "dibuja", "crea una imagen",
-    "qué hora", "que hora", "fecha de hoy",
+_CHAT_SECONDS = histogram(
+    "argos_chat_seconds", "Latencia del turno de /chat por path (fast/chat/agent/hedge)", ("path", "status")
 )
+_ROUTE_DECISIONS = counter(
+    "argos_route_decisions_total", "Decisiones del router por path final y motivo", ("path", "reason")
+)
+_MODEL_SECONDS = histogram(
+    "argos_model_call_seconds", "Latencia de cada llamada al modelo", ("role", "backend")
+)
+_MODEL_ERRORS = counter("argos_model_errors_total", "Llamadas al modelo fallidas", ("role", "backend"))
+_MODEL_TOKENS = counter(
+    "argos_model_tokens_total", "Tokens procesados por el modelo (prompt/completion)", ("role", "kind")
+)
+_QUEUE_DEPTH = gauge("argos_agent_queue_depth", "Requests AGENT esperando turno en la cola de admisión")
+_ACTIVE = gauge("argos_agent_active", "Turnos AGENT en curso")
+
+# Palabras clave que indican que el usuario quiere una tarea técnica con tools.
+# Todo lo demás va al path de chat rápido. Salen de las categorías de core.tool_select
+# (una sola tabla): la keyword que enruta a AGENT es la misma que elige las tools.
+_AGENT_KEYWORDS = AGENT_KEYWORDS
 
 
 import re as _re
@@ -88,18 +91,93 @@ def _clean_chat_response(text: str) -> str:
     return _TIMESTAMP_RE.sub("", text).strip()
 
 
-_USER_QUESTION_MARKER = "[Pregunta del usuario]"
+# Keywords de _AGENT_KEYWORDS que aparecen seguido en charla casual. Un mensaje que
+# solo toca estas cae en la banda de incertidumbre → HEDGE (CHAT y AGENT a la vez).
+_HEDGE_KEYWORDS = frozenset({
+    "quién es", "quien es", "qué hace", "que hace", "qué puede", "que puede",
+    "actualmente", "pendiente", "fase", "falla", "bug",
+    "cómo funciona", "como funciona", "háblame de", "hablame de",
+    "cuéntame sobre", "cuentame sobre",
+    "read", "save", "list ", "run ", "programa", "clase ", "correr",
+    "foto", "captura", "escena", "plano", "planos",
+})
+
+
+# El web UI inyecta contexto antes del marcador — evaluar solo la pregunta real
+_user_question = user_question
 
 
 def _is_agent_query(text: str) -> bool:
     """True si el mensaje requiere tools o razonamiento técnico pesado."""
-    # El web UI inyecta contexto antes del marcador — evaluar solo la pregunta real
-    if _USER_QUESTION_MARKER in text:
-        text = text.split(_USER_QUESTION_MARKER, 1)[1]
-    t = text.lower()
+    t = _user_question(text)
     return any(kw in t for kw in _AGENT_KEYWORDS)
 
 
+def _turn_status(exc: BaseException) -> str:
+    """Etiqueta `status` de argos_chat_seconds para un turno que terminó con `exc`."""
+    if isinstance(exc, asyncio.CancelledError):
+        return "cancelled"
+    if isinstance(exc, (DeadlineExceeded, asyncio.TimeoutError)):
+        return "deadline"
+    if isinstance(exc, AdmissionRejected):
+        return "rejected"
+    return "error"
+
+
+def _stream_unsupported(exc: BaseException) -> bool:
+    """True si el error dice que el backend no soporta streaming (no un fallo del backend)."""
+    if isinstance(exc, NotImplementedError):
+        return True
+    status = getattr(exc, "status_code", None)
+    return status in (400, 422, 501) and "stream" in str(exc).lower()
+
+
+def _count_tokens(role: str, prompt: int | None, completion: int | None) -> None:
+    if prompt:
+        _MODEL_TOKENS.inc(prompt, role=role, kind="prompt")
+    if completion:
+        _MODEL_TOKENS.inc(completion, role=role, kind="completion")
+
+
+def _route(text: str) -> str:
+    """"agent" | "hedge" | "chat". hedge = solo keywords ambiguas (_HEDGE_KEYWORDS)."""
+    t = _user_question(text)
+    hits = [kw for kw in _AGENT_KEYWORDS if kw in t]
+    if not hits:
+        return "chat"
+    return "hedge" if all(kw in _HEDGE_KEYWORDS for kw in hits) else "agent"
+
+
+# Futuro que el nodo agent resuelve con su primera decisión (¿emitió tool calls?)
+# cuando el turno corre como hedge. ContextVar: los nodos heredan el contexto del run.
+_HEDGE_PROBE: ContextVar[asyncio.Future | None] = ContextVar("argos_hedge_probe", default=None)
+
+
+def _resolve_hedge_probe(uses_tools: bool) -> None:
+    probe = _HEDGE_PROBE.get()
+    if probe is not None and not probe.done():
+        probe.set_result(uses_tools)
+
+
+_STREAM_TOOLS = os.getenv("ARGOS_STREAM_TOOLS", "1") == "1"
+
+# Cuerpo extra de cada request al backend openai (thinking OFF). El precalentado del
+# prefijo lo reutiliza: el prefijo calentado debe ser byte a byte el del agente.
+_AGENT_EXTRA_BODY = {"chat_template_kwargs": {"enable_thinking": False}}
+
+# Plazo del request (core.request_context): si lo que queda no cubre
+# `_FINAL_ROUND_FACTOR` llamadas al modelo, la llamada va sin tools → respuesta final.
+_MIN_MODEL_S = float(os.getenv("ARGOS_MIN_MODEL_S", "8"))
+_FINAL_ROUND_FACTOR = 2.0
+_OUT_OF_TIME_NOTE = (
+    "[Sistema] Se acaba el tiempo de este turno: no llames más herramientas, "
+    "responde ya con lo que tienes e indica qué quedó sin verificar."
+)
+
+# Subconjunto de tools del turno AGENT en curso (core.tool_select). None = todas.
+_TOOL_SUBSET: ContextVar[frozenset[str] | None] = ContextVar("argos_tool_subset", default=None)
+
+
 class AgentState(TypedDict):
     messages: Annotated[List[BaseMessage], add_messages]
 
@@ -120,53 +198,115 @@ class ArgosAgent:
 
         logger.info(f"Agent model: {agent_model} | Chat model: {chat_model}")
 
+        # Breaker de Ollama (chat, visión, embeddings), sondeado en segundo plano.
+        self._ollama = register_service("ollama", f"{ollama_url}/api/version")
+
         # ── Chat path: ligero, sin tools, thinking desactivado ──────────────
         self.llm_chat = ChatOllama(
             model=chat_model,
             base_url=ollama_url,
             temperature=0.3,
             num_ctx=8192,
-            keep_alive=-1,
+            keep_alive=keep_alive_for("chat"),
             think=False,
         )
 
         # ── Agent path: pesado, con tools ───────────────────────────────────
         # Backend configurable: "openai" (llama-server, rápido, tool-calling fix)
         # o "ollama" (qwen3-coder-next, default histórico). CHAT y visión siempre Ollama.
-        llm_agent = self._build_agent_llm(agent_model, ollama_url)
-        self.llm_with_tools = llm_agent.bind_tools(ARGOS_TOOLS)
+        # Con varias agent_base_url el path AGENT reparte entre ellas (core.backend_pool);
+        # cada backend openai fija cada thread a uno de sus slots.
+        self.pool = self._build_agent_pool(agent_model, ollama_url)
+        # Las tools (y las manos MCP adaptadas) se arman acá, no al importar core.tools.
+        self.tools = argos_tools()
+        self.llm_with_tools = self.pool.primary.llm.bind_tools(self.tools)
+        # Variantes pre-bindeadas por backend y subconjunto de tools (mismo subconjunto → mismo prefijo).
+        self._bound: dict[tuple[str, frozenset[str] | None], Runnable] = {}
+        self._tool_node = ParallelToolNode(self.tools, allowed=self._turn_tools)
+        # openai (llama-server): streaming + despacho anticipado de tool calls.
+        self._stream_tools = self._cfg.agent_backend == "openai" and _STREAM_TOOLS
         self.app = self._build_brain(memory)
+        # Metadatos por thread (existe, nº de mensajes): evita aget_state en threads calientes.
+        self._threads = ThreadStateCache()
+        # Cola con prioridades delante del modelo agente (N slots por backend).
+        self.admission = AdmissionController(slots=self.pool.capacity)
+        _QUEUE_DEPTH.set_function(lambda: self.admission.queue_depth)
+        _ACTIVE.set_function(lambda: self.admission.stats()["active"])
+        # Qué modelos están en VRAM (Ollama /api/ps + llama-swap /running), cache corto.
+        agent_urls = self._cfg.agent_base_urls if self._cfg.agent_backend == "openai" else ()
+        self.residency = ResidencyMonitor(ollama_url, agent_urls)
+        # Cupo de hedges CHAT+AGENT para mensajes ambiguos.
+        self.hedge = HedgeBudget()
         logger.info("Agent brain compiled.")
 
-    def _build_agent_llm(self, agent_model: str, ollama_url: str):
-        """Construye el LLM del path AGENT según `agent_backend`.
+    def _build_agent_pool(self, agent_model: str, ollama_url: str) -> BackendPool:
+        """Construye los backends del path AGENT según `agent_backend`.
 
-        openai → llama-server (qwen3.6-35B-A3B): tool-calling confiable + ~180 tok/s,
-                 thinking OFF vía chat_template_kwargs. api_key dummy (llama-server lo ignora).
-        ollama → ChatOllama histórico (fallback seguro).
+        openai → un llama-server (qwen3.6-35B-A3B) por cada `agent_base_urls`:
+                 tool-calling confiable + ~180 tok/s, thinking OFF vía chat_template_kwargs.
+                 Respaldo Ollama opcional (`agent_fallback_model`).
+        ollama → ChatOllama histórico (fallback seguro), backend único.
         """
         if self._cfg.agent_backend == "openai":
-            from langchain_openai import ChatOpenAI
-
-            logger.info("Agent backend: openai (llama-server) @ %s", self._cfg.agent_base_url)
-            return ChatOpenAI(
-                model=agent_model,
-                base_url=self._cfg.agent_base_url,
-                api_key="sk-local",  # llama-server ignora la key
-                temperature=0.1,
-                timeout=180,
-                extra_body={"chat_template_kwargs": {"enable_thinking": False}},
-            )
+            backends = [
+                Backend(url, self._build_agent_llm(agent_model, url), slots=self._cfg.agent_parallel)
+                for url in self._cfg.agent_base_urls
+            ]
+            logger.info("Agent backend: openai (llama-server) @ %s", ", ".join(b.url for b in backends))
+            fallback = None
+            if self._cfg.agent_fallback_model:
+                logger.info("Agent fallback: ollama %s @ %s", self._cfg.agent_fallback_model, ollama_url)
+                fallback = Backend(
+                    ollama_url, self._build_ollama_agent(self._cfg.agent_fallback_model, ollama_url),
+                    kind="ollama", probe_url=f"{ollama_url}/api/version",
+                )
+            return BackendPool(backends, fallback)
 
         logger.info("Agent backend: ollama @ %s", ollama_url)
+        return BackendPool([
+            Backend(ollama_url, self._build_ollama_agent(agent_model, ollama_url),
+                    kind="ollama", probe_url=f"{ollama_url}/api/version"),
+        ])
+
+    @staticmethod
+    def _build_agent_llm(agent_model: str, base_url: str):
+        from langchain_openai import ChatOpenAI
+
+        return ChatOpenAI(
+            model=agent_model,
+            base_url=base_url,
+            api_key="sk-local",  # llama-server ignora la key
+            temperature=0.1,
+            timeout=180,
+            stream_usage=True,  # tokens del turno también con streaming (métricas)
+            extra_body=_AGENT_EXTRA_BODY,
+        )
+
+    @staticmethod
+    def _build_ollama_agent(agent_model: str, ollama_url: str) -> ChatOllama:
         return ChatOllama(
             model=agent_model,
             base_url=ollama_url,
             temperature=0.1,
             num_ctx=8192,
-            keep_alive=300,  # 5 min — libera VRAM si no hay queries AGENT activas
+            keep_alive=keep_alive_for("agent"),  # core.vram: libera VRAM si no hay queries AGENT
         )
 
+    def build_prefix_warmers(self) -> list[PrefixWarmer]:
+        """Un warmer del prefijo estático (system prompt + tools) por backend openai."""
+        return [
+            PrefixWarmer(
+                b.url,
+                self._cfg.agent,
+                get_system_prompt(),
+                self.tools,
+                slots=b.capacity,
+                extra_body=_AGENT_EXTRA_BODY,
+            )
+            for b in self.pool.backends
+            if b.kind == "openai"
+        ]
+
     @staticmethod
     def db_path() -> Path:
         p = Path(os.getenv("CHECKPOINT_DB", "/data/argos/checkpoints.db"))
@@ -175,13 +315,152 @@ class ArgosAgent:
 
     # ── LangGraph nodes (agent path) ────────────────────────────────────────
 
-    async def _call_model(self, state: AgentState) -> dict:
-        return {"messages": [await self.llm_with_tools.ainvoke(state["messages"])]}
+    def _turn_tools(self) -> frozenset[str] | None:
+        """Tools bindeadas en el turno en curso (core.tool_select), None = todas."""
+        names = _TOOL_SUBSET.get()
+        return None if names is not None and len(names) >= len(self.tools) else names
+
+    def _bound_llm(self, backend: Backend) -> Runnable:
+        """Modelo del backend bindeado solo con las tools del turno, en orden canónico de ARGOS_TOOLS."""
+        names = self._turn_tools()
+        if names is None and backend is self.pool.primary:
+            return self.llm_with_tools
+        llm = self._bound.get((backend.url, names))
+        if llm is None:
+            tools = self.tools if names is None else [t for t in self.tools if t.name in names]
+            llm = self._bound[(backend.url, names)] = backend.llm.bind_tools(tools)
+        return llm
+
+    def _with_turn_prompt(self, messages: list[BaseMessage]) -> list[BaseMessage]:
+        """Cambia el system prompt guardado por el que lista solo las tools del turno.
+
+        El thread persiste el prompt completo; el subconjunto se aplica por llamada.
+        """
+        names = self._turn_tools()
+        if names is None or not messages or not isinstance(messages[0], SystemMessage):
+            return messages
+        return [SystemMessage(content=get_system_prompt(names)), *messages[1:]]
+
+    async def _call_model(self, state: AgentState, config: RunnableConfig) -> dict:
+        thread_id = config.get("configurable", {}).get("thread_id")
+        tried: list[Backend] = []
+        while True:
+            backend = self.pool.pick(thread_id, exclude=tried)
+            tried.append(backend)
+            messages = self._with_turn_prompt(state["messages"])
+            left = remaining()
+            final_round = left is not None and left < _FINAL_ROUND_FACTOR * max(backend.ewma_s, _MIN_MODEL_S)
+            if final_round:
+                # No alcanza para otra ronda de tools + otra llamada: cerrar con lo que hay.
+                llm = backend.llm
+                messages = [*messages, HumanMessage(content=_OUT_OF_TIME_NOTE)]
+                logger.info(f"Plazo casi agotado ({left:.1f}s): ronda final sin tools (thread={thread_id})")
+            else:
+                llm = self._bound_llm(backend)
+            if backend.slots is not None and backend.slots.enabled and thread_id:
+                slot = backend.slots.slot_for(thread_id)
+                llm = llm.bind(extra_body={**_AGENT_EXTRA_BODY, "id_slot": slot, "cache_prompt": True})
+            t0 = time.perf_counter()
+            try:
+                with span("model", backend=backend.url, final_round=final_round) as model_span:
+                    async with self.pool.track(backend):
+                        if self._stream_tools and backend.kind == "openai":
+                            call = self._stream_model(llm, messages, config)
+                        else:
+                            call = llm.ainvoke(messages)
+                        response = await asyncio.wait_for(call, timeout=remaining())
+                break
+            except asyncio.TimeoutError:
+                # Plazo vencido (el timeout propio del cliente HTTP es otra excepción).
+                current_token().cancel("deadline_exceeded")
+                raise DeadlineExceeded(f"plazo del request agotado esperando al modelo ({backend.url})")
+            except Exception as e:
+                _MODEL_ERRORS.inc(role="agent", backend=backend.url)
+                # Otro backend sano (o el respaldo) → reintentar ahí; si no, el error sube.
+                if len(tried) > len(self.pool.backends) or not self.pool.has_alternative(tried):
+                    raise
+                logger.warning(f"Backend AGENT {backend.url} falló ({type(e).__name__}: {e}); reintento en otro")
+        _MODEL_SECONDS.observe(time.perf_counter() - t0, role="agent", backend=backend.url)
+        usage = getattr(response, "usage_metadata", None) or {}
+        _count_tokens("agent", usage.get("input_tokens"), usage.get("output_tokens"))
+        model_span.set(
+            prompt_tokens=usage.get("input_tokens"),
+            completion_tokens=usage.get("output_tokens"),
+            tool_calls=[tc["name"] for tc in getattr(response, "tool_calls", None) or []],
+        )
+        _resolve_hedge_probe(bool(getattr(response, "tool_calls", None)))
+        return {"messages": [response]}
+
+    async def _stream_model(self, llm: Runnable, messages: list[BaseMessage], config: RunnableConfig) -> BaseMessage:
+        """Streaming del backend openai: cada tool call se despacha apenas sus args están completos.
+
+        Una tool call está completa cuando el stream empieza la siguiente (índice mayor)
+        — la última sale con el mensaje final y la corre el nodo tools como siempre. El
+        mensaje devuelto es el mismo AIMessage que daría ainvoke (chunks concatenados).
+        """
+        dispatched: list[str] = []
+        acc: AIMessageChunk | None = None
+        pending: int | None = None  # índice de la tool call que se está generando
+        try:
+            async for chunk in llm.astream(messages):
+                acc = chunk if acc is None else acc + chunk
+                for tc in chunk.tool_call_chunks:
+                    _resolve_hedge_probe(True)
+                    index = tc.get("index")
+                    if pending is not None and index is not None and index != pending:
+                        self._dispatch_complete(acc, pending, config, dispatched)
+                    if index is not None:
+                        pending = index
+        except Exception as e:
+            # Lo despachado es de solo lectura: se descarta. Solo si el backend no soporta
+            # streaming se repite sin stream; otro error sube a _call_model (breaker/reintento).
+            self._tool_node.discard_early(dispatched)
+            if not _stream_unsupported(e):
+                raise
+            logger.warning(f"Backend sin streaming ({type(e).__name__}: {e}); reintento con ainvoke")
+            return await llm.ainvoke(messages)
+        except BaseException:
+            self._tool_node.discard_early(dispatched)
+            raise
+        if acc is None:
+            return await llm.ainvoke(messages)
+        return message_chunk_to_message(acc)
+
+    def _dispatch_complete(
+        self, acc: AIMessageChunk, index: int, config: RunnableConfig, dispatched: list[str]
+    ) -> None:
+        tc = next((c for c in acc.tool_call_chunks if c.get("index") == index), None)
+        if tc is None or not tc.get("id") or not tc.get("name"):
+            return
+        try:
+            args = json.loads(tc.get("args") or "{}")
+        except ValueError:
+            return  # args malformados: el nodo tools reporta el error como siempre
+        if not isinstance(args, dict):
+            return
+        call = {"name": tc["name"], "args": args, "id": tc["id"], "type": "tool_call"}
+        if self._tool_node.dispatch_early(call, config):
+            dispatched.append(tc["id"])
+
+    async def _call_tools(self, state: AgentState, config: RunnableConfig) -> dict:
+        """Nodo tools. Varias `decarabia_analyze` en la ronda → un lote de visión (core.vram):
+        gemma se carga una vez para todas las imágenes y se descarga antes de volver al agente."""
+        last = state["messages"][-1]
+        images = sum(1 for c in getattr(last, "tool_calls", None) or [] if c["name"] == "decarabia_analyze")
+        if images < 2:
+            return await self._tool_node(state, config)
+        vram = get_vram_scheduler()
+        await asyncio.to_thread(vram.begin_batch, "vision")
+        try:
+            return await self._tool_node(state, config)
+        finally:
+            await asyncio.to_thread(vram.end_batch, "vision")
 
     def _build_brain(self, memory: AsyncSqliteSaver):
         workflow = StateGraph(AgentState)
         workflow.add_node("agent", self._call_model)
-        workflow.add_node("tools", ToolNode(ARGOS_TOOLS))
+        # Tool calls paralelas concurrentes, con timeout y cupo por tool (core.tool_exec).
+        workflow.add_node("tools", self._call_tools)
         workflow.add_edge(START, "agent")
         workflow.add_conditional_edges("agent", tools_condition)
         workflow.add_edge("tools", "agent")
@@ -189,57 +468,287 @@ class ArgosAgent:
 
     # ── Entry point ─────────────────────────────────────────────────────────
 
-    async def run(self, user_input: str, thread_id: str) -> tuple[str, str]:
-        """Retorna (response, model_used)."""
+    async def run(
+        self,
+        user_input: str,
+        thread_id: str,
+        priority: str = "interactive",
+        on_event: Callable[[dict[str, Any]], None] | None = None,
+    ) -> tuple[str, str]:
+        """Retorna (response, model_used).
+
+        `priority` ("interactive" | "background") ordena la cola del path AGENT.
+        `on_event` recibe eventos de progreso: `loading_model` cuando el modelo
+        elegido está frío y la carga es inevitable, `queued` con la posición en la
+        cola del agente cuando hay que esperar un slot.
+        Lanza AdmissionRejected si la cola del agente está llena.
+        """
+        t0 = time.perf_counter()
+        turn = {"path": "fast", "status": "ok"}
+        try:
+            return await self._route_turn(user_input, thread_id, priority, on_event, turn)
+        except BaseException as e:
+            turn["status"] = _turn_status(e)
+            raise
+        finally:
+            _CHAT_SECONDS.observe(time.perf_counter() - t0, path=turn["path"], status=turn["status"])
+            annotate_trace(path=turn["path"])
+
+    async def _route_turn(
+        self,
+        user_input: str,
+        thread_id: str,
+        priority: str,
+        on_event: Callable[[dict[str, Any]], None] | None,
+        turn: dict[str, str],
+    ) -> tuple[str, str]:
+        """Cuerpo de `run`: decide el path (lo deja en `turn["path"]` para las métricas) y lo corre."""
+        # Órdenes inequívocas (luces, hora, cámara): tool directa, sin LLM.
+        intent = match_intent(user_input)
+        if intent is not None:
+            logger.info(f"[FAST path] intent={intent.name} thread={thread_id}")
+            _ROUTE_DECISIONS.inc(path="fast", reason="intent")
+            return await run_intent(intent), FAST_PATH_MODEL
+
         now = datetime.now().strftime("%Y-%m-%d %H:%M")
         stamped_input = f"[{now}] {user_input}"
 
-        if _is_agent_query(user_input):
-            logger.info(f"[AGENT path] thread={thread_id}")
-            response = await self._run_agent(stamped_input, thread_id)
+        route = _route(user_input)
+        reason = "keywords"
+        if route == "hedge":
+            if not self.pool.has_alternative():
+                logger.info(f"[HEDGE→CHAT] agente con el circuito abierto, thread={thread_id}")
+                route, reason = "chat", "circuit_open"
+            elif not await self._agent_warm():
+                logger.info(f"[HEDGE→CHAT] agente frío, thread={thread_id}")
+                route, reason = "chat", "agent_cold"
+            elif self.hedge.try_acquire(backend_free=self.admission.has_capacity()):
+                logger.info(f"[HEDGE path] thread={thread_id}")
+                turn["path"] = "hedge"
+                _ROUTE_DECISIONS.inc(path="hedge", reason="ambiguous")
+                return await self._run_hedged(stamped_input, thread_id, priority)
+            else:
+                route, reason = "chat", "hedge_budget"  # sin presupuesto: el agente no se toca para un mensaje dudoso
+
+        turn["path"] = route
+        _ROUTE_DECISIONS.inc(path=route, reason=reason)
+        if route == "agent":
+            logger.info(f"[AGENT path] thread={thread_id} priority={priority}")
+            if on_event is not None and not await self._agent_warm():
+                on_event({"event": "loading_model", "model": self._cfg.agent, "eta_s": COLD_LOAD_S})
+            response = await self._agent_turn(stamped_input, thread_id, priority, on_event)
             return response, self._cfg.agent
         else:
             logger.info(f"[CHAT path] thread={thread_id}")
-            response = await self._run_chat(stamped_input)
+            if on_event is not None and not await self.residency.is_warm(self._cfg.chat):
+                on_event({"event": "loading_model", "model": self._cfg.chat, "eta_s": None})
+            # Stateless: un doble submit idéntico comparte la misma llamada al modelo. La
+            # llamada compartida no ve el plazo de este request: se aplica sobre la espera.
+            try:
+                response = await asyncio.wait_for(
+                    get_flight("chat").do(
+                        flight_key("chat", user_input, thread_id),
+                        lambda: self._run_chat(stamped_input),
+                    ),
+                    timeout=remaining(),
+                )
+            except asyncio.TimeoutError:
+                current_token().cancel("deadline_exceeded")
+                raise DeadlineExceeded("plazo del request agotado esperando al modelo de chat")
             return response, self._cfg.chat
 
+    async def _agent_warm(self) -> bool:
+        return await self.residency.is_warm(self._cfg.agent, self.pool.primary.kind)
+
+    async def _agent_turn(
+        self,
+        stamped_input: str,
+        thread_id: str,
+        priority: str,
+        on_event: Callable[[dict[str, Any]], None] | None = None,
+    ) -> str:
+        def queued(position: int) -> None:
+            annotate_trace(queue_position=position)
+            if on_event is not None:
+                on_event({"event": "queued", "position": position, "queue_depth": self.admission.queue_depth})
+
+        async with self.admission.admit(thread_id, priority, on_queued=queued) as waited:
+            annotate_trace(queued_s=round(waited, 3))
+            if waited > 0.5:
+                logger.info(f"AGENT admitido tras {waited:.1f}s en cola (thread={thread_id})")
+            token = _TOOL_SUBSET.set(select_tool_names(stamped_input))
+            try:
+                # project_map probable corre en paralelo con la primera llamada al modelo.
+                start_prefetch(stamped_input, self._tool_node)
+                # En uso: un decarabia_analyze a mitad del turno no descarga al agente.
+                # turn(): las tools adelantadas por el stream no sobreviven al turno.
+                with self.pool.pin(thread_id), get_vram_scheduler().busy("agent"), self._tool_node.turn():
+                    return await self._run_agent(stamped_input, thread_id)
+            finally:
+                _TOOL_SUBSET.reset(token)
+
+    async def _run_hedged(self, stamped_input: str, thread_id: str, priority: str) -> tuple[str, str]:
+        """CHAT y AGENT en paralelo para un mensaje ambiguo.
+
+        - El agente emite tool calls primero → se cancela el chat, gana el agente.
+        - El agente termina sin tools antes que el chat → gana el agente (ya respondió).
+        - El chat termina primero → se cancela el agente y la respuesta del chat
+          se registra en el thread para no dejar la pregunta huérfana.
+        """
+        loop = asyncio.get_running_loop()
+        probe: asyncio.Future = loop.create_future()
+
+        async def agent_run() -> str:
+            _HEDGE_PROBE.set(probe)
+            with span("hedge:agent"):
+                return await self._agent_turn(stamped_input, thread_id, priority)
+
+        async def chat_run() -> str:
+            with span("hedge:chat"):
+                return await self._run_chat(stamped_input)
+
+        agent = asyncio.create_task(agent_run())
+        chat = asyncio.create_task(chat_run())
+        winner: str | None = None  # None: ambos fallaron o el turno se canceló
+        try:
+            while True:
+                pending = {t for t in (agent, chat, probe) if not t.done()}
+                if pending:
+                    await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+
+                if probe.done() and probe.result() and not agent.done():
+                    chat.cancel()
+                    answer = await agent
+                    winner = "agent"
+                    return answer, self._cfg.agent
+                if agent.done() and agent.exception() is None:
+                    chat.cancel()
+                    winner = "agent"
+                    return agent.result(), self._cfg.agent
+                if chat.done() and (agent.done() or not (probe.done() and probe.result())):
+                    if chat.exception() is not None:
+                        if agent.done():
+                            raise chat.exception()  # ambos fallaron
+                        continue  # el chat falló: esperar al agente
+                    winner = "chat"
+                    answer = chat.result()
+                    if not agent.done():
+                        agent.cancel()
+                        await asyncio.gather(agent, return_exceptions=True)
+                        await self._record_hedge_answer(thread_id, stamped_input, answer)
+                    return answer, self._cfg.chat
+        finally:
+            for t in (agent, chat):
+                if not t.done():
+                    t.cancel()
+            self.hedge.release(winner)
+            logger.info(f"[HEDGE] thread={thread_id} ganó {winner or 'ninguno'}")
+
+    async def _record_hedge_answer(self, thread_id: str, stamped_input: str, answer: str) -> None:
+        """Si el agente cancelado alcanzó a persistir la pregunta, cerrarla con la respuesta del chat."""
+        config = {"configurable": {"thread_id": thread_id}}
+        try:
+            snapshot = await self.app.aget_state(config)
+            messages = snapshot.values.get("messages", [])
+            if messages and isinstance(messages[-1], HumanMessage) and messages[-1].content == stamped_input:
+                reply = AIMessage(content=answer)
+                await self.app.aupdate_state(config, {"messages": [reply]}, as_node="agent")
+                self._threads.record(thread_id, [*messages, reply])
+        except Exception as e:
+            self._threads.invalidate(thread_id)
+            logger.warning(f"No se pudo registrar la respuesta hedge en {thread_id}: {e}")
+
     async def _run_chat(self, stamped_input: str) -> str:
         """Path rápido: httpx directo a Ollama con think=False para evitar reasoning loops."""
         ollama_url = self._cfg.ollama_base_url
         chat_model = self._cfg.chat
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            r = await client.post(
-                f"{ollama_url}/api/chat",
-                json={
-                    "model": chat_model,
-                    "messages": [
-                        {"role": "system", "content": get_chat_prompt()},
-                        {"role": "user", "content": stamped_input},
-                    ],
-                    "stream": False,
-                    "think": False,
-                    "keep_alive": -1,
-                    "options": {"num_ctx": 8192, "temperature": 0.3},
-                },
-            )
-            r.raise_for_status()
-        return _clean_chat_response(r.json()["message"]["content"])
+        t0 = time.perf_counter()
+        async with httpx.AsyncClient(timeout=budget(60.0)) as client:
+            with span("chat_model", model=chat_model) as chat_span, self._ollama.guard():
+                r = await client.post(
+                    f"{ollama_url}/api/chat",
+                    json={
+                        "model": chat_model,
+                        "messages": [
+                            {"role": "system", "content": get_chat_prompt()},
+                            {"role": "user", "content": stamped_input},
+                        ],
+                        "stream": False,
+                        "think": False,
+                        "keep_alive": keep_alive_for("chat"),
+                        "options": {"num_ctx": 8192, "temperature": 0.3},
+                    },
+                )
+                r.raise_for_status()
+        data = r.json()
+        _MODEL_SECONDS.observe(time.perf_counter() - t0, role="chat", backend=ollama_url)
+        _count_tokens("chat", data.get("prompt_eval_count"), data.get("eval_count"))
+        chat_span.set(prompt_tokens=data.get("prompt_eval_count"), completion_tokens=data.get("eval_count"))
+        return _clean_chat_response(data["message"]["content"])
 
     async def _run_agent(self, stamped_input: str, thread_id: str) -> str:
         """Path completo: qwen3-coder con tools y memoria persistente."""
         config = {"configurable": {"thread_id": thread_id}}
-        state_snapshot = await self.app.aget_state(config)
-        existing_messages = state_snapshot.values.get("messages", [])
+        meta = self._threads.get(thread_id)
+        if meta is None:
+            # Thread frío: una lectura para saber si existe. En threads calientes
+            # la única lectura del turno es la que hace ainvoke.
+            state_snapshot = await self.app.aget_state(config)
+            meta = self._threads.record(thread_id, state_snapshot.values.get("messages", []))
 
         messages_to_send: list[BaseMessage] = []
-        if not existing_messages:
+        if not meta.exists:
             logger.info(f"Starting new agent thread: {thread_id}")
             messages_to_send.append(SystemMessage(content=get_system_prompt()))
 
         messages_to_send.append(HumanMessage(content=stamped_input))
 
-        result = await self.app.ainvoke(
-            {"messages": messages_to_send},
-            {**config, "recursion_limit": 25},
-        )  # type: ignore
+        try:
+            with span("graph", new_thread=not meta.exists):
+                result = await self.app.ainvoke(
+                    {"messages": messages_to_send},
+                    {**config, "recursion_limit": 25},
+                )  # type: ignore
+        except BaseException:
+            # Escritura parcial posible (error o cancelación) — releer la próxima vez.
+            self._threads.invalidate(thread_id)
+            if current_token().cancelled:
+                await asyncio.shield(self._record_abort(config, stamped_input))
+            raise
+        self._threads.record(thread_id, result["messages"])
         return result["messages"][-1].content
+
+    async def _record_abort(self, config: RunnableConfig, stamped_input: str) -> None:
+        """Cierra en el checkpoint un turno cortado porque el cliente se fue.
+
+        Tool calls sin respuesta → ToolMessage de error (el historial queda válido para
+        el próximo turno) + una nota del agente diciendo que el turno se abortó.
+        """
+        try:
+            snapshot = await self.app.aget_state(config)
+            messages = snapshot.values.get("messages", [])
+            turn = next(
+                (i for i in range(len(messages) - 1, -1, -1)
+                 if isinstance(messages[i], HumanMessage) and messages[i].content == stamped_input),
+                None,
+            )
+            if turn is None:
+                return  # la pregunta ni llegó a persistirse
+            tail = messages[turn + 1:]
+            if tail and isinstance(tail[-1], AIMessage) and not tail[-1].tool_calls:
+                return  # el turno alcanzó a terminar
+            answered = {m.tool_call_id for m in tail if isinstance(m, ToolMessage)}
+            reason = current_token().reason or "cancelado"
+            closing: list[BaseMessage] = [
+                ToolMessage(
+                    content=json.dumps({"ok": False, "error_type": "cancelled", "error": reason}),
+                    tool_call_id=call["id"], name=call["name"], status="error",
+                )
+                for m in tail if isinstance(m, AIMessage)
+                for call in m.tool_calls if call["id"] not in answered
+            ]
+            closing.append(AIMessage(content=f"[Turno abortado: {reason}]"))
+            await self.app.aupdate_state(config, {"messages": closing}, as_node="agent")
+            logger.info(f"Turno abortado registrado en {config['configurable']['thread_id']} ({reason})")
+        except Exception as e:
+            logger.warning(f"No se pudo registrar el aborto del turno: {e}")
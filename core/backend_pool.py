@@ -0,0 +1,179 @@
+"""
+Argos Core - Pool de backends del path AGENT.
+
+`agent_base_url` puede listar varios endpoints OpenAI-compatibles (llama-server
+detrás de llama-swap, p.ej. uno por GPU/máquina). `BackendPool` decide a cuál va
+cada llamada al modelo:
+
+  - Afinidad por thread: un thread se queda en su backend mientras esté sano (su
+    historia está en el KV de ese servidor), salvo que esté lleno y otro libre.
+  - Thread nuevo (o sin backend sano) → menor puntaje `(inflight + 1) × latencia EWMA`.
+  - `track()` mide cada llamada: éxito actualiza la EWMA; las caídas (`is_outage`:
+    conexión, timeout, 5xx) van al circuit breaker del backend (core.health,
+    servicio `agent:<url>`): con el circuito abierto el backend queda fuera del
+    reparto. Un 4xx o un prompt demasiado largo no lo abren: el backend respondió.
+  - El sondeo de fondo de core.health (`GET /models`, `/api/version` en Ollama)
+    cierra el circuito de los que vuelven y abre el de los que no responden.
+  - Respaldo opcional (`agent_fallback_model`, Ollama local): solo se usa si no queda
+    ningún backend openai sano.
+
+Con un solo backend el comportamiento es el de siempre. Todo corre en el event loop
+(sin locks).
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from contextlib import ExitStack, asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Iterator, Sequence
+
+from core.health import CircuitOpen, is_outage, register_service
+from core.slot_affinity import SlotAffinity
+
+_MAX_AFFINITY = 4096
+_EWMA_ALPHA = 0.3
+
+
+class Backend:
+    """Un endpoint del path AGENT con su modelo LangChain y su estado de salud."""
+
+    def __init__(
+        self,
+        url: str,
+        llm: Any,
+        kind: str = "openai",
+        slots: int = 1,
+        probe_url: str | None = None,
+    ) -> None:
+        self.url = url
+        self.llm = llm
+        self.kind = kind                                   # "openai" | "ollama"
+        self.capacity = max(1, slots)
+        self.slots = SlotAffinity(slots) if kind == "openai" else None
+        self.probe_url = probe_url or (f"{url.rstrip('/')}/models" if kind == "openai" else url)
+        self.breaker = register_service(f"agent:{url}", self.probe_url)
+        self.inflight = 0
+        self.ewma_s = 0.0                                  # 0 = sin muestras todavía
+        self.calls = 0
+        self.errors = 0
+
+    @property
+    def healthy(self) -> bool:
+        return self.breaker.available()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "url": self.url,
+            "kind": self.kind,
+            "healthy": self.healthy,
+            "breaker": self.breaker.state,
+            "inflight": self.inflight,
+            "latency_ms": round(1000 * self.ewma_s, 1),
+            "calls": self.calls,
+            "errors": self.errors,
+            "slots": self.slots.stats() if self.slots else None,
+        }
+
+
+class BackendPool:
+    """Enrutado least-inflight/latencia con afinidad por thread y expulsión por salud."""
+
+    def __init__(self, backends: Sequence[Backend], fallback: Backend | None = None) -> None:
+        if not backends:
+            raise ValueError("BackendPool necesita al menos un backend")
+        self.backends = list(backends)
+        self.fallback = fallback
+        self._affinity: OrderedDict[str, Backend] = OrderedDict()
+
+    @property
+    def primary(self) -> Backend:
+        return self.backends[0]
+
+    @property
+    def capacity(self) -> int:
+        """Turnos simultáneos que aguanta el pool (suma de slots de los backends openai)."""
+        return sum(b.capacity for b in self.backends)
+
+    def has_alternative(self, exclude: Sequence[Backend] = ()) -> bool:
+        """¿Queda algún backend (o el respaldo) disponible fuera de `exclude`?"""
+        targets = [*self.backends, *([self.fallback] if self.fallback else [])]
+        return any(b.healthy and b not in exclude for b in targets)
+
+    # ── Enrutado ────────────────────────────────────────────────────────────
+
+    def pick(self, thread_id: str | None = None, exclude: Sequence[Backend] = ()) -> Backend:
+        """Backend para la próxima llamada. CircuitOpen si no queda ninguno disponible."""
+        candidates = [b for b in self.backends if b.healthy and b not in exclude]
+        if not candidates:
+            if self.fallback is not None and self.fallback.healthy and self.fallback not in exclude:
+                return self.fallback
+            # Todos con el circuito abierto: fallar ya en vez de esperar timeouts.
+            retry_in = min(b.breaker.retry_in() for b in self.backends)
+            raise CircuitOpen("agent", retry_in)
+
+        current = self._affinity.get(thread_id) if thread_id else None
+        if current in candidates and not self._should_move(current, candidates):
+            self._affinity.move_to_end(thread_id)  # type: ignore[arg-type]
+            return current  # type: ignore[return-value]
+
+        best = min(candidates, key=self._score)
+        if thread_id:
+            self._affinity[thread_id] = best
+            self._affinity.move_to_end(thread_id)
+            while len(self._affinity) > _MAX_AFFINITY:
+                self._affinity.popitem(last=False)
+        return best
+
+    def _should_move(self, current: Backend, candidates: list[Backend]) -> bool:
+        """Romper la afinidad solo si su backend está lleno y otro tiene slots libres."""
+        return current.inflight >= current.capacity and any(
+            b.inflight < b.capacity for b in candidates if b is not current
+        )
+
+    def _score(self, backend: Backend) -> float:
+        known = [b.ewma_s for b in self.backends if b.ewma_s > 0]
+        latency = backend.ewma_s or (sum(known) / len(known) if known else 1.0)
+        return (backend.inflight + 1) * latency
+
+    @asynccontextmanager
+    async def track(self, backend: Backend) -> AsyncIterator[None]:
+        """Cuenta la llamada en vuelo y mide su resultado."""
+        backend.inflight += 1
+        backend.calls += 1
+        t0 = time.monotonic()
+        try:
+            yield
+        except asyncio.TimeoutError:
+            raise  # plazo del request vencido: no es culpa del backend
+        except Exception as e:
+            backend.errors += 1
+            if is_outage(e):
+                backend.breaker.record_failure(e)
+            else:
+                backend.breaker.record_success()  # respondió, aunque con error
+            raise
+        else:
+            elapsed = time.monotonic() - t0
+            backend.breaker.record_success(elapsed)
+            backend.ewma_s = elapsed if not backend.ewma_s else (
+                _EWMA_ALPHA * elapsed + (1 - _EWMA_ALPHA) * backend.ewma_s
+            )
+        finally:
+            backend.inflight -= 1
+
+    @contextmanager
+    def pin(self, thread_id: str) -> Iterator[None]:
+        """Marca el thread con turno en curso en los slots de todos los backends."""
+        with ExitStack() as stack:
+            for b in self.backends:
+                if b.slots is not None:
+                    stack.enter_context(b.slots.pin(thread_id))
+            yield
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "backends": [b.stats() for b in self.backends],
+            "fallback": self.fallback.stats() if self.fallback else None,
+            "threads": len(self._affinity),
+        }
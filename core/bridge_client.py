@@ -12,6 +12,8 @@ import os
 import urllib.request
 from typing import Any
 
+from core.health import CircuitOpen, register_service
+from core.request_context import budget
 from utils.logger_config import get_argos_logger
 
 logger = get_argos_logger()
@@ -19,6 +21,8 @@ logger = get_argos_logger()
 BRIDGE_URL = os.getenv("WINDOWS_BRIDGE_URL", "http://host.docker.internal:8189")
 BRIDGE_TOKEN = os.getenv("BRIDGE_TOKEN", "asmodeus-bridge-2026")
 _TIMEOUT = 8.0
+# Con el bridge caído se falla al instante en vez de esperar _TIMEOUT por llamada.
+_BREAKER = register_service("bridge", BRIDGE_URL)
 
 
 def bridge_post(path: str, body: dict[str, Any]) -> dict[str, Any]:
@@ -30,8 +34,10 @@ def bridge_post(path: str, body: dict[str, Any]) -> dict[str, Any]:
         method="POST",
     )
     try:
-        with urllib.request.urlopen(req, timeout=_TIMEOUT) as r:
+        with _BREAKER.guard(), urllib.request.urlopen(req, timeout=budget(_TIMEOUT)) as r:
             return json.loads(r.read())
+    except CircuitOpen as ex:
+        return {"ok": False, "error": str(ex)}
     except Exception as ex:
         logger.error("bridge POST %s falló: %s", path, ex)
         return {"ok": False, "error": str(ex)}
@@ -41,8 +47,10 @@ def bridge_get(path: str) -> dict[str, Any]:
     """GET JSON del bridge. Nunca lanza."""
     req = urllib.request.Request(f"{BRIDGE_URL}{path}", headers={"X-Bridge-Token": BRIDGE_TOKEN})
     try:
-        with urllib.request.urlopen(req, timeout=_TIMEOUT) as r:
+        with _BREAKER.guard(), urllib.request.urlopen(req, timeout=budget(_TIMEOUT)) as r:
             return json.loads(r.read())
+    except CircuitOpen as ex:
+        return {"ok": False, "error": str(ex)}
     except Exception as ex:
         logger.error("bridge GET %s falló: %s", path, ex)
         return {"ok": False, "error": str(ex)}
@@ -0,0 +1,120 @@
+"""
+Argos Core - Checkpointer SQLite con pool de lectores.
+
+`AsyncSqliteSaver` usa UNA conexión aiosqlite (un hilo worker + un asyncio.Lock),
+así que con varios threads concurrentes (Telegram, dashboard, MCP) todas las
+lecturas y escrituras de checkpoint hacen fila detrás de la misma conexión.
+
+`PooledSqliteSaver` mantiene la semántica de `AsyncSqliteSaver` pero:
+  - el archivo va en WAL (lectores no bloquean al escritor ni entre sí);
+  - UNA conexión escritora (la heredada) serializa aput/aput_writes/adelete_thread;
+  - un pool de conexiones read-only (`mode=ro`, cada una con su hilo aiosqlite)
+    atiende aget_tuple/alist, así threads independientes leen en paralelo.
+
+En WAL cada SELECT ve lo último confirmado: aput hace commit antes de retornar,
+así que un turno siempre lee lo que escribió el anterior.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+from contextlib import AsyncExitStack, asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Mapping, Sequence
+
+import aiosqlite
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import CheckpointTuple
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+from utils.logger_config import get_argos_logger
+
+logger = get_argos_logger()
+
+_READERS = int(os.getenv("CHECKPOINT_READERS", "4"))
+
+
+class PooledSqliteSaver(AsyncSqliteSaver):
+    """AsyncSqliteSaver con 1 escritor + N lectores read-only. Usar via from_conn_string."""
+
+    def __init__(self, conn: aiosqlite.Connection, **kwargs: Any) -> None:
+        super().__init__(conn, **kwargs)
+        self._readers: asyncio.Queue[AsyncSqliteSaver] = asyncio.Queue()
+        self._reader_count = 0
+
+    @classmethod
+    @asynccontextmanager
+    async def from_conn_string(
+        cls, conn_string: str, readers: int = _READERS
+    ) -> AsyncIterator["PooledSqliteSaver"]:
+        """Abre el escritor, crea el esquema (WAL) y luego el pool de lectores."""
+        async with aiosqlite.connect(conn_string) as writer:
+            saver = cls(writer)
+            await saver.setup()
+            async with AsyncExitStack() as stack:
+                # :memory: no se puede compartir entre conexiones → solo escritor.
+                if conn_string != ":memory:":
+                    uri = f"{Path(conn_string).resolve().as_uri()}?mode=ro"
+                    for _ in range(max(0, readers)):
+                        conn = await stack.enter_async_context(aiosqlite.connect(uri, uri=True))
+                        saver._add_reader(conn)
+                logger.info("Checkpointer: 1 escritor + %d lectores (WAL)", saver._reader_count)
+                yield saver
+
+    def _add_reader(self, conn: aiosqlite.Connection) -> None:
+        reader = AsyncSqliteSaver(conn, serde=self.serde)
+        # El esquema ya lo creó el escritor; un lector ro no puede ejecutar setup().
+        reader.is_setup = True
+        self._readers.put_nowait(reader)
+        self._reader_count += 1
+
+    async def setup(self) -> None:
+        if self.is_setup:
+            return
+        await super().setup()
+        # WAL + synchronous=NORMAL: commit sin fsync por escritura, durable al checkpoint.
+        async with self.lock:
+            await self.conn.execute("PRAGMA synchronous=NORMAL")
+
+    @asynccontextmanager
+    async def _reader(self) -> AsyncIterator[AsyncSqliteSaver]:
+        reader = await self._readers.get()
+        try:
+            yield reader
+        finally:
+            self._readers.put_nowait(reader)
+
+    # ── Lecturas → pool read-only ───────────────────────────────────────────
+
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        if not self._reader_count:
+            return await super().aget_tuple(config)
+        await self.setup()
+        async with self._reader() as reader:
+            return await reader.aget_tuple(config)
+
+    async def alist(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        if not self._reader_count:
+            async for item in super().alist(config, filter=filter, before=before, limit=limit):
+                yield item
+            return
+        await self.setup()
+        async with self._reader() as reader:
+            async for item in reader.alist(config, filter=filter, before=before, limit=limit):
+                yield item
+
+    async def aget_delta_channel_history(
+        self, *, config: RunnableConfig, channels: Sequence[str]
+    ) -> Mapping[str, Any]:
+        if not self._reader_count:
+            return await super().aget_delta_channel_history(config=config, channels=channels)
+        await self.setup()
+        async with self._reader() as reader:
+            return await reader.aget_delta_channel_history(config=config, channels=channels)
@@ -29,6 +29,15 @@ class ModelConfig:
       - "ollama"  → ChatOllama contra `ollama_base_url` (default histórico).
       - "openai"  → ChatOpenAI contra `agent_base_url` (llama-server, API OpenAI).
     El path CHAT y la visión siguen SIEMPRE en Ollama.
+
+    `agent_parallel` = slots paralelos de CADA backend agente (`-np` de llama-server);
+    el control de admisión deja correr `agent_parallel × len(agent_base_urls)` turnos
+    AGENT a la vez.
+
+    `agent_base_url` acepta una lista (JSON) o URLs separadas por coma (env): el path
+    AGENT reparte entre todas (core.backend_pool). `agent_base_url` queda como la
+    primera; `agent_base_urls` las trae todas. `agent_fallback_model` (opcional) es un
+    modelo Ollama de último recurso si todos los backends openai están caídos.
     """
     agent: str
     chat: str
@@ -37,6 +46,21 @@ class ModelConfig:
     ollama_base_url: str
     agent_backend: str
     agent_base_url: str
+    agent_parallel: int
+    agent_base_urls: tuple[str, ...] = ()
+    agent_fallback_model: str = ""
+
+
+def _as_int(value: object, default: int, source: str) -> int:
+    """Entero positivo o `default` (con warning) si el valor es inválido."""
+    try:
+        n = int(value)  # type: ignore[arg-type]
+        if n >= 1:
+            return n
+    except (TypeError, ValueError):
+        pass
+    logger.warning("%s inválido (%r) — usando %d", source, value, default)
+    return default
 
 
 def _from_env() -> dict:
@@ -50,9 +74,18 @@ def _from_env() -> dict:
         # Backend del agente: "ollama" (seguro) | "openai" (llama-server).
         "agent_backend": os.getenv("AGENT_BACKEND", "ollama"),
         "agent_base_url": os.getenv("AGENT_BASE_URL", "http://host.docker.internal:8090/v1"),
+        "agent_parallel": _as_int(os.getenv("AGENT_PARALLEL", "1"), 1, "AGENT_PARALLEL"),
+        # Modelo Ollama de respaldo del path AGENT ("" = sin respaldo).
+        "agent_fallback_model": os.getenv("AGENT_FALLBACK_MODEL", ""),
     }
 
 
+def _split_urls(value: str | list | tuple) -> tuple[str, ...]:
+    """"a, b" | ["a", "b"] → ("a", "b"), sin vacíos ni duplicados, orden preservado."""
+    items = value.split(",") if isinstance(value, str) else [str(v) for v in value]
+    return tuple(dict.fromkeys(u.strip() for u in items if u.strip()))
+
+
 @lru_cache(maxsize=1)
 def load_model_config() -> ModelConfig:
     """
@@ -75,4 +108,7 @@ def load_model_config() -> ModelConfig:
     else:
         logger.info("model_config.json ausente (%s) — usando env vars", _CONFIG_PATH)
 
+    urls = _split_urls(data["agent_base_url"]) or _split_urls(_from_env()["agent_base_url"])
+    parallel = _as_int(data["agent_parallel"], 1, "agent_parallel")
+    data = {**data, "agent_base_url": urls[0], "agent_base_urls": urls, "agent_parallel": parallel}
     return ModelConfig(**data)
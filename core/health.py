@@ -0,0 +1,294 @@
+"""
+Argos Core - Salud de los servicios downstream y circuit breakers.
+
+Con ComfyUI, Frigate, el Windows Bridge o llama-server caídos, cada llamada
+esperaba su timeout completo (y `anima_generate` hasta 120 s de wake), turno tras
+turno. Ahora cada servicio tiene un `Breaker`:
+
+  closed     → las llamadas pasan; `_FAILURES` caídas seguidas lo abren.
+  open       → fallo inmediato (`CircuitOpen`) durante `_OPEN_S` segundos.
+  half_open  → pasado ese tiempo se deja pasar UNA llamada de prueba: si anda se
+               cierra, si falla vuelve a open.
+
+Solo cuentan como caída los errores de conexión, timeouts y 5xx (`is_outage`): un
+4xx o un JSON raro significa que el servicio respondió.
+
+Cada módulo registra su servicio (`register_service`) con una URL de sondeo
+opcional. `HealthRegistry.probe_loop()` (tarea de fondo de api.py) sondea los que
+tienen URL cada `_PROBE_S` s: un sondeo exitoso cierra el breaker, uno fallido
+cuenta como caída. Los servicios que duermen a propósito (ComfyUI, se despierta
+on-demand) no se sondean: su breaker es pasivo y no degrada el estado general
+(`degraded()`); `/health` los lista aparte (`passive_unavailable()`). `/health`
+muestra el estado cacheado y la latencia de cada uno sin tocar la red.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import socket
+import threading
+import time
+import urllib.error
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+import httpx
+
+from core.tracing import span
+from utils.logger_config import get_argos_logger
+
+logger = get_argos_logger()
+
+_FAILURES = int(os.getenv("ARGOS_BREAKER_FAILURES", "3"))
+_OPEN_S = float(os.getenv("ARGOS_BREAKER_OPEN_S", "30"))
+_PROBE_S = float(os.getenv("ARGOS_HEALTH_PROBE_S", "15"))
+_PROBE_TIMEOUT = 3.0
+_EWMA_ALPHA = 0.3
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpen(Exception):
+    """El breaker del servicio está abierto: se falla sin intentar la llamada."""
+
+    def __init__(self, name: str, retry_in: float) -> None:
+        super().__init__(f"{name} no disponible (circuito abierto, reintento en {retry_in:.0f}s)")
+        self.name = name
+        self.retry_in = retry_in
+
+
+def is_outage(exc: BaseException) -> bool:
+    """True si el error indica servicio caído (conexión, timeout, 5xx).
+
+    Los clientes de modelos envuelven el error de red (openai: `APIConnectionError
+    from httpx.ConnectError`) o traen el código en `status_code` (openai, ollama):
+    se miran ambos.
+    """
+    if isinstance(exc, urllib.error.HTTPError):
+        return exc.code >= 500
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code >= 500
+    status = getattr(exc, "status_code", None)
+    if isinstance(status, int):
+        return status >= 500
+    if isinstance(
+        exc, (urllib.error.URLError, httpx.TransportError, socket.timeout, TimeoutError, ConnectionError)
+    ):
+        return True
+    cause = exc.__cause__
+    return cause is not None and cause is not exc and is_outage(cause)
+
+
+class Breaker:
+    """Circuit breaker de un servicio. Thread-safe: lo usan tools sync en hilos y el event loop."""
+
+    def __init__(self, name: str, failures: int = _FAILURES, open_s: float = _OPEN_S) -> None:
+        self.name = name
+        self.failures_to_open = max(1, failures)
+        self.open_s = open_s
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._trial_at: float | None = None  # llamada de prueba en curso (half_open)
+        self.consecutive = 0
+        self.latency_s = 0.0
+        self.last_error: str | None = None
+        self.last_ok: float | None = None
+        self.counts = {"ok": 0, "failed": 0, "rejected": 0, "opened": 0}
+
+    def _current(self, now: float) -> str:
+        if self._state == OPEN and now - self._opened_at >= self.open_s:
+            self._state = HALF_OPEN
+            self._trial_at = None
+        return self._state
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current(time.monotonic())
+
+    def available(self) -> bool:
+        """¿Una llamada pasaría ahora? No reserva la prueba de half_open."""
+        now = time.monotonic()
+        with self._lock:
+            state = self._current(now)
+            return state == CLOSED or (
+                state == HALF_OPEN and (self._trial_at is None or now - self._trial_at >= self.open_s)
+            )
+
+    def allow(self) -> bool:
+        """Como `available()`, pero en half_open reserva la única llamada de prueba."""
+        now = time.monotonic()
+        with self._lock:
+            state = self._current(now)
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and (self._trial_at is None or now - self._trial_at >= self.open_s):
+                self._trial_at = now  # una prueba colgada no bloquea para siempre
+                return True
+            self.counts["rejected"] += 1
+            return False
+
+    def retry_in(self) -> float:
+        with self._lock:
+            return max(0.0, self.open_s - (time.monotonic() - self._opened_at))
+
+    def record_success(self, latency_s: float | None = None) -> None:
+        with self._lock:
+            if self._state != CLOSED:
+                logger.info("Servicio %s recuperado (circuito cerrado)", self.name)
+            self._state = CLOSED
+            self._trial_at = None
+            self.consecutive = 0
+            self.last_ok = time.time()
+            self.counts["ok"] += 1
+            if latency_s is not None:
+                self.latency_s = latency_s if not self.latency_s else (
+                    _EWMA_ALPHA * latency_s + (1 - _EWMA_ALPHA) * self.latency_s
+                )
+
+    def record_failure(self, error: BaseException | str) -> None:
+        with self._lock:
+            self.consecutive += 1
+            self.counts["failed"] += 1
+            self.last_error = error if isinstance(error, str) else f"{type(error).__name__}: {error}"
+            state = self._current(time.monotonic())
+            if state == HALF_OPEN or (state == CLOSED and self.consecutive >= self.failures_to_open):
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                self._trial_at = None
+                self.counts["opened"] += 1
+                logger.warning("Circuito abierto para %s tras %d fallos: %s", self.name, self.consecutive, self.last_error)
+
+    @contextmanager
+    def guard(self) -> Iterator[None]:
+        """Envuelve una llamada: CircuitOpen si está abierto; registra éxito/caída al salir.
+
+        Sirve igual en código sync y async (el bloque puede contener awaits). Cada
+        llamada queda como span `service:<nombre>` en la traza del request.
+        """
+        if not self.allow():
+            raise CircuitOpen(self.name, self.retry_in())
+        t0 = time.monotonic()
+        with span(f"service:{self.name}"):
+            try:
+                yield
+            except Exception as e:
+                if is_outage(e):
+                    self.record_failure(e)
+                else:
+                    self.record_success(time.monotonic() - t0)  # respondió, aunque con error
+                raise
+            else:
+                self.record_success(time.monotonic() - t0)
+
+    def stats(self) -> dict[str, Any]:
+        state = self.state
+        return {
+            "state": state,
+            "latency_ms": round(1000 * self.latency_s, 1),
+            "consecutive_failures": self.consecutive,
+            "retry_in_s": round(self.retry_in(), 1) if state == OPEN else None,
+            "last_error": self.last_error,
+            "last_ok": self.last_ok,
+            **self.counts,
+        }
+
+
+class _Service:
+    __slots__ = ("breaker", "probe_url", "verify")
+
+    def __init__(self, breaker: Breaker, probe_url: str | None, verify: bool) -> None:
+        self.breaker = breaker
+        self.probe_url = probe_url
+        self.verify = verify
+
+
+class HealthRegistry:
+    """Servicios registrados con su breaker y, si corresponde, su URL de sondeo."""
+
+    def __init__(self) -> None:
+        self._services: dict[str, _Service] = {}
+        self._lock = threading.Lock()
+        self.last_probe: float | None = None
+
+    def register(self, name: str, probe_url: str | None = None, verify: bool = True) -> Breaker:
+        """Registra (o completa) el servicio `name`. Idempotente: devuelve siempre el mismo breaker."""
+        with self._lock:
+            service = self._services.get(name)
+            if service is None:
+                service = self._services[name] = _Service(Breaker(name), probe_url, verify)
+            elif probe_url and not service.probe_url:
+                service.probe_url, service.verify = probe_url, verify
+            return service.breaker
+
+    def breaker(self, name: str) -> Breaker:
+        return self.register(name)
+
+    async def probe_all(self, client: httpx.AsyncClient | None = None) -> None:
+        """Una ronda de sondeo a todos los servicios con URL."""
+        with self._lock:
+            targets = [(n, s) for n, s in self._services.items() if s.probe_url]
+        await asyncio.gather(*(self._probe(name, service, client) for name, service in targets))
+        self.last_probe = time.time()
+
+    async def _probe(self, name: str, service: _Service, client: httpx.AsyncClient | None) -> None:
+        t0 = time.monotonic()
+        try:
+            if client is not None and service.verify:
+                r = await client.get(service.probe_url, timeout=_PROBE_TIMEOUT)  # type: ignore[arg-type]
+            else:
+                async with httpx.AsyncClient(verify=service.verify, timeout=_PROBE_TIMEOUT) as c:
+                    r = await c.get(service.probe_url)  # type: ignore[arg-type]
+        except httpx.HTTPError as e:
+            service.breaker.record_failure(e)
+            return
+        if r.status_code >= 500:
+            service.breaker.record_failure(f"HTTP {r.status_code}")
+        else:
+            service.breaker.record_success(time.monotonic() - t0)
+
+    async def probe_loop(self) -> None:
+        """Sondeo de fondo. Nunca lanza (salvo CancelledError al apagar)."""
+        async with httpx.AsyncClient() as client:
+            while True:
+                try:
+                    await self.probe_all(client)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.debug("Sondeo de salud falló: %s", e)
+                await asyncio.sleep(_PROBE_S)
+
+    def degraded(self) -> list[str]:
+        """Servicios sondeados con el circuito no cerrado (los que degradan `/health`)."""
+        with self._lock:
+            return [n for n, s in self._services.items() if s.probe_url and s.breaker.state != CLOSED]
+
+    def passive_unavailable(self) -> list[str]:
+        """Servicios pasivos con el circuito no cerrado (p.ej. ComfyUI dormido o caído)."""
+        with self._lock:
+            return [n for n, s in self._services.items() if not s.probe_url and s.breaker.state != CLOSED]
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            services = dict(self._services)
+        return {
+            "last_probe": self.last_probe,
+            "services": {
+                name: {"probe": s.probe_url is not None, **s.breaker.stats()}
+                for name, s in sorted(services.items())
+            },
+        }
+
+
+_REGISTRY = HealthRegistry()
+
+
+def health_registry() -> HealthRegistry:
+    return _REGISTRY
+
+
+def register_service(name: str, probe_url: str | None = None, verify: bool = True) -> Breaker:
+    """Breaker del servicio `name` (lo crea la primera vez). Sin `probe_url` es pasivo."""
+    return _REGISTRY.register(name, probe_url, verify)
@@ -0,0 +1,62 @@
+"""
+Argos Core - Presupuesto del hedging CHAT/AGENT.
+
+Para mensajes en la banda de incertidumbre del router (solo keywords ambiguas),
+ArgosAgent arranca el path CHAT y el AGENT a la vez y se queda con el que decida
+primero (ver `ArgosAgent._run_hedged`). Cada hedge ocupa al backend agente aunque
+al final gane el chat, así que se limita:
+
+  - `max_inflight` hedges simultáneos;
+  - `per_minute` hedges por ventana deslizante de 60 s.
+
+Sin presupuesto (o con la cola del agente ocupada) el mensaje va solo por CHAT.
+"""
+from __future__ import annotations
+
+import os
+import time
+from collections import deque
+
+_ENABLED = os.getenv("ARGOS_HEDGE", "1") == "1"
+_MAX_INFLIGHT = int(os.getenv("ARGOS_HEDGE_MAX_INFLIGHT", "1"))
+_PER_MINUTE = int(os.getenv("ARGOS_HEDGE_PER_MIN", "20"))
+
+
+class HedgeBudget:
+    """Cupo de hedges. Se usa desde el event loop (sin locks)."""
+
+    def __init__(
+        self, enabled: bool = _ENABLED, max_inflight: int = _MAX_INFLIGHT, per_minute: int = _PER_MINUTE
+    ) -> None:
+        self.enabled = enabled
+        self.max_inflight = max(0, max_inflight)
+        self.per_minute = max(0, per_minute)
+        self._inflight = 0
+        self._starts: deque[float] = deque()
+        self.counts = {"hedged": 0, "skipped": 0, "chat_won": 0, "agent_won": 0, "failed": 0}
+
+    def try_acquire(self, backend_free: bool = True) -> bool:
+        """Reserva un hedge. `backend_free=False` (agente con cola) → siempre False."""
+        now = time.monotonic()
+        while self._starts and now - self._starts[0] > 60.0:
+            self._starts.popleft()
+        if (
+            not self.enabled
+            or not backend_free
+            or self._inflight >= self.max_inflight
+            or len(self._starts) >= self.per_minute
+        ):
+            self.counts["skipped"] += 1
+            return False
+        self._inflight += 1
+        self._starts.append(now)
+        self.counts["hedged"] += 1
+        return True
+
+    def release(self, winner: str | None) -> None:
+        """Libera el cupo. `winner` = "chat" | "agent", o None si ninguno respondió (error/cancelación)."""
+        self._inflight -= 1
+        self.counts[f"{winner}_won" if winner else "failed"] += 1
+
+    def stats(self) -> dict[str, int | bool]:
+        return {"enabled": self.enabled, "inflight": self._inflight, **self.counts}
@@ -0,0 +1,217 @@
+"""
+Argos Core - Fast-path de intents deterministas.
+
+"apaga las luces", "brillo 40", "qué hora es" o "snapshot de la cámara" tocaban el
+router de keywords y esperaban a que el modelo agente (35B, quizá descargado por
+llama-swap → ~15 s de arranque en frío) emitiera UNA tool call trivial.
+
+`match_intent()` reconoce esos comandos con reglas/gramática fijas y
+`run_intent()` llama directo a la función MCP (`amon_lights`, `get_datetime`,
+`frigate_cam`) y arma una respuesta con plantilla. Sin LLM.
+
+Solo entra lo inequívoco: mensaje corto, una sola orden, sin condicionales,
+negaciones ni conectores ("si", "y", "cuando", "no"...). Todo lo que no calza
+completo (fullmatch) devuelve None y sigue al router normal sin modificar.
+
+Como el path CHAT, el fast-path no escribe en el checkpoint del thread.
+"""
+from __future__ import annotations
+
+import asyncio
+import inspect
+import os
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from core import mcp_frigate, mcp_tools
+from core.tool_exec import policy_for
+from utils.logger_config import get_argos_logger
+
+logger = get_argos_logger()
+
+_ENABLED = os.getenv("ARGOS_FAST_PATH", "1") == "1"
+_MAX_CHARS = 60
+_MAX_WORDS = 9
+
+FAST_PATH_MODEL = "fast-path"  # lo que /chat reporta en `model`
+
+_USER_QUESTION_MARKER = "[pregunta del usuario]"
+
+# Palabras que vuelven ambigua una orden (condición, composición, negación) → al agente.
+_GUARD_RE = re.compile(
+    r"\b(si|y|o|pero|cuando|luego|despues|antes|mientras|hasta|no|nunca|porque|minutos?|segundos?)\b"
+)
+
+_POLITE_RE = re.compile(r"^(?:(?:argos|oye|hey|porfa|por favor)\b[ ,]*)+|(?:[ ,]*\b(?:porfa|por favor|gracias))+$")
+
+_COLORS = (
+    "rojo", "verde", "azul", "amarillo", "naranja", "morado", "violeta", "rosado",
+    "rosa", "blanco", "cian", "magenta", "turquesa",
+)
+_SCENES = ("amanecer", "atardecer", "pulso", "tormenta")
+
+_LIGHTS = r"(?:todas )?(?:las |la )?(?:luces|luz|bombillos?)"
+_COLOR = r"(?P<color>" + "|".join(_COLORS) + r"|#[0-9a-f]{6})"
+_SCENE = r"(?P<scene>" + "|".join(_SCENES) + r")"
+_PCT = r"(?P<pct>\d{1,3})(?: ?%| por ciento)?"
+_CAMERA = r"(?:(?:de )?(?:la )?camara(?: (?P<camera>[a-z0-9_-]+))?)"
+
+
+@dataclass(frozen=True)
+class Intent:
+    """Orden reconocida: tool MCP + argumentos ya validados."""
+    name: str                        # p.ej. "lights_off"
+    tool: str                        # "amon_lights" | "get_datetime" | "frigate_cam"
+    args: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class _Rule:
+    name: str
+    pattern: re.Pattern[str]
+    tool: str
+    build: Callable[[re.Match[str]], dict[str, Any] | None]
+
+
+def _rule(name: str, pattern: str, tool: str, build: Callable[[re.Match[str]], dict[str, Any] | None]) -> _Rule:
+    return _Rule(name, re.compile(pattern), tool, build)
+
+
+def _brightness(m: re.Match[str]) -> dict[str, Any] | None:
+    pct = int(m["pct"])
+    return {"action": "brightness", "value": pct} if 1 <= pct <= 100 else None
+
+
+# Orden importa: la primera regla que calza entera gana.
+_RULES: tuple[_Rule, ...] = (
+    _rule("lights_off", rf"(?:apaga|apague|apagar) {_LIGHTS}", "amon_lights", lambda m: {"action": "off"}),
+    _rule(
+        "lights_on", rf"(?:enciende|encienda|encender|prende|prenda|prender) {_LIGHTS}",
+        "amon_lights", lambda m: {"action": "on"},
+    ),
+    _rule(
+        "lights_brightness",
+        rf"(?:(?:pon|pone|ponle|sube|baja|ajusta|cambia)(?: el)? )?brillo(?: de {_LIGHTS})?(?: (?:a|al|en))? {_PCT}",
+        "amon_lights", _brightness,
+    ),
+    _rule("lights_brightness", rf"(?:pon |sube |baja )?{_LIGHTS} (?:a|al) {_PCT}", "amon_lights", _brightness),
+    _rule(
+        "lights_color",
+        rf"(?:(?:pon|pone|cambia)(?: {_LIGHTS})?(?: (?:de|en|a))?(?: color)? |{_LIGHTS} (?:en |de )?(?:color )?|color ){_COLOR}",
+        "amon_lights", lambda m: {"action": "color", "value": m["color"]},
+    ),
+    _rule(
+        "lights_stop", r"(?:para|parar|deten|detener|quita|quitar)(?: la)? escena",
+        "amon_lights", lambda m: {"action": "stop"},
+    ),
+    _rule(
+        "lights_scene",
+        rf"(?:(?:pon|activa|inicia|arranca)(?: la)?(?: escena)?(?: de)? |escena (?:de )?|modo ){_SCENE}",
+        "amon_lights", lambda m: {"action": "scene", "value": m["scene"]},
+    ),
+    _rule(
+        "datetime",
+        r"(?:que|a que) hora es|que horas son|(?:que|cual es la) fecha(?: es)?(?: hoy)?|que dia es(?: hoy)?"
+        r"|fecha de hoy|dame la hora",
+        "get_datetime", lambda m: {},
+    ),
+    _rule(
+        "camera_snapshot",
+        rf"(?:(?:toma|tomame|saca|sacame|dame|haz)(?: una)? )?(?:snapshot|foto|captura) {_CAMERA}",
+        "frigate_cam", lambda m: {"action": "snapshot", "camera": m["camera"]},
+    ),
+    _rule(
+        "camera_list",
+        r"(?:lista|listar|muestra|muestrame|cuales son)(?: las)? camaras|camaras disponibles",
+        "frigate_cam", lambda m: {"action": "list"},
+    ),
+)
+
+_TOOLS: dict[str, Callable[..., Any]] = {
+    "amon_lights": mcp_tools.amon_lights,
+    "get_datetime": mcp_tools.get_datetime,
+    "frigate_cam": mcp_frigate.frigate_cam,
+}
+
+
+def _normalize(text: str) -> str:
+    """Minúsculas, sin tildes, sin puntuación de borde ni cortesías."""
+    t = text.lower()
+    if _USER_QUESTION_MARKER in t:
+        t = t.split(_USER_QUESTION_MARKER, 1)[1]
+    t = "".join(c for c in unicodedata.normalize("NFD", t) if unicodedata.category(c) != "Mn")
+    t = " ".join(t.split()).strip(" .!?¡¿,;")
+    return _POLITE_RE.sub("", t).strip(" .!?¡¿,;")
+
+
+def match_intent(text: str) -> Intent | None:
+    """Intent si el mensaje es una orden inequívoca; si no, None (→ router normal)."""
+    if not _ENABLED:
+        return None
+    t = _normalize(text)
+    if not t or len(t) > _MAX_CHARS or len(t.split()) > _MAX_WORDS or _GUARD_RE.search(t):
+        return None
+    for rule in _RULES:
+        m = rule.pattern.fullmatch(t)
+        if m is None:
+            continue
+        args = rule.build(m)
+        return Intent(rule.name, rule.tool, args) if args is not None else None
+    return None
+
+
+async def run_intent(intent: Intent) -> str:
+    """Ejecuta la tool con su timeout de política y devuelve la respuesta renderizada."""
+    fn = _TOOLS[intent.tool]
+    args = {k: v for k, v in intent.args.items() if v is not None}
+    timeout = policy_for(intent.tool).timeout
+    try:
+        if inspect.iscoroutinefunction(fn):
+            result = await asyncio.wait_for(fn(**args), timeout)
+        else:
+            result = await asyncio.wait_for(asyncio.to_thread(fn, **args), timeout)
+    except asyncio.TimeoutError:
+        result = {"ok": False, "error": f"{intent.tool} no respondió en {timeout:.0f}s"}
+    except Exception as e:
+        logger.error("Fast-path %s falló: %s: %s", intent.name, type(e).__name__, e)
+        result = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+    return render(intent, result)
+
+
+# ── Plantillas ────────────────────────────────────────────────────────────────
+
+def render(intent: Intent, result: dict[str, Any]) -> str:
+    if not isinstance(result, dict):
+        result = {"ok": True}
+    if result.get("ok", True) is False:
+        return f"No pude completar la orden ({intent.tool}): {result.get('error', 'error desconocido')}"
+
+    a = intent.args
+    if intent.name == "lights_off":
+        return "Listo, apagué las luces."
+    if intent.name == "lights_on":
+        return "Listo, encendí las luces."
+    if intent.name == "lights_brightness":
+        return f"Listo, brillo de las luces al {a['value']}%."
+    if intent.name == "lights_color":
+        return f"Listo, luces en {a['value']}."
+    if intent.name == "lights_stop":
+        return "Listo, detuve la escena activa."
+    if intent.name == "lights_scene":
+        return f"Listo, escena {a['value']} activada."
+    if intent.name == "datetime":
+        return f"Son las {result['hora'][:5]} del {result['dia_semana']} {result['fecha']} (hora de Colombia)."
+    if intent.name == "camera_snapshot":
+        return f"Snapshot guardado: {result.get('path', '?')}"
+    if intent.name == "camera_list":
+        cams = result.get("cameras", {})
+        if not cams:
+            return "Frigate no reporta cámaras."
+        lines = []
+        for name, c in cams.items():
+            on = [k for k in ("record", "detect", "snapshots") if c.get(k)]
+            lines.append(f"- {name}: {', '.join(on) if on else 'desactivada'}")
+        return "Cámaras:\n" + "\n".join(lines)
+    return "Listo."
@@ -18,6 +18,9 @@ import threading
 import time
 from pathlib import Path
 
+from core.metrics import histogram
+from core.tracing import span
+
 _DB = Path(os.getenv("KNOWLEDGE_DB", "/data/argos/project_kb.db"))
 _OLLAMA = os.getenv("OLLAMA_BASE_URL", "http://host.docker.internal:11434")
 _EMBED_MODEL = "nomic-embed-text:latest"
@@ -29,6 +32,9 @@ _BATCH_SIZE = 48  # chunks por llamada a Ollama embed
 
 _REBUILD_LOCK = threading.Lock()
 
+_QUERY_SECONDS = histogram("argos_knowledge_query_seconds", "Latencia de knowledge.query (incluye rebuild si estaba stale)")
+_REBUILD_SECONDS = histogram("argos_knowledge_rebuild_seconds", "Duración de la reconstrucción del índice de proyectos")
+
 _SOURCE_ROOTS: list[tuple[Path, list[str]]] = [
     (Path("/projects"), ["CLAUDE.md", "HANDOFF.md", "SESSIONS.md"]),
     (Path("/knowledge/project_map"), ["*.md"]),
@@ -39,13 +45,15 @@ _SOURCE_ROOTS: list[tuple[Path, list[str]]] = [
 
 def _embed_batch(texts: list[str]) -> list[list[float]]:
     import urllib.request
-    payload = json.dumps({"model": _EMBED_MODEL, "input": texts, "keep_alive": -1}).encode()
+    from core.health import register_service
+    from core.vram import keep_alive_for
+    payload = json.dumps({"model": _EMBED_MODEL, "input": texts, "keep_alive": keep_alive_for("embed")}).encode()
     req = urllib.request.Request(
         f"{_OLLAMA}/api/embed",
         data=payload,
         headers={"Content-Type": "application/json"},
     )
-    with urllib.request.urlopen(req, timeout=120) as r:
+    with register_service("ollama").guard(), urllib.request.urlopen(req, timeout=120) as r:
         return json.loads(r.read())["embeddings"]
 
 
@@ -138,51 +146,69 @@ def is_stale() -> bool:
 def rebuild() -> int:
     """Reconstruye el índice. Thread-safe. Retorna cantidad de chunks indexados."""
     with _REBUILD_LOCK:
-        # Coletar todos los chunks primero
-        all_chunks: list[tuple[str, str]] = []  # (source, text)
-        for f in _sources():
-            try:
-                text = f.read_text(encoding="utf-8", errors="ignore").strip()
-                if text:
-                    all_chunks.extend(_split(text, str(f)))
-            except Exception:
-                continue
-
-        if not all_chunks:
-            return 0
-
-        # Batch embeddings — todos los chunks en grupos de _BATCH_SIZE
-        sources = [c[0] for c in all_chunks]
-        texts = [c[1] for c in all_chunks]
-        embeddings: list[list[float]] = []
-        for i in range(0, len(texts), _BATCH_SIZE):
-            batch = texts[i : i + _BATCH_SIZE]
-            try:
-                embeddings.extend(_embed_batch(batch))
-            except Exception:
-                embeddings.extend([[] for _ in batch])
-
-        # Escribir a DB
-        conn = _connect()
-        conn.execute("DELETE FROM chunks")
-        for src, content, emb in zip(sources, texts, embeddings):
-            if emb:
-                conn.execute(
-                    "INSERT INTO chunks(source, content, embedding) VALUES (?,?,?)",
-                    (src, content, json.dumps(emb)),
-                )
-        conn.execute(
-            "INSERT OR REPLACE INTO meta VALUES ('built_at',?)", (str(time.time()),)
-        )
-        conn.commit()
-        conn.close()
-        return len([e for e in embeddings if e])
+        t0 = time.perf_counter()
+        try:
+            with span("knowledge.rebuild"):
+                return _rebuild()
+        finally:
+            _REBUILD_SECONDS.observe(time.perf_counter() - t0)
+
+
+def _rebuild() -> int:
+    # Coletar todos los chunks primero
+    all_chunks: list[tuple[str, str]] = []  # (source, text)
+    for f in _sources():
+        try:
+            text = f.read_text(encoding="utf-8", errors="ignore").strip()
+            if text:
+                all_chunks.extend(_split(text, str(f)))
+        except Exception:
+            continue
+
+    if not all_chunks:
+        return 0
+
+    # Batch embeddings — todos los chunks en grupos de _BATCH_SIZE
+    sources = [c[0] for c in all_chunks]
+    texts = [c[1] for c in all_chunks]
+    embeddings: list[list[float]] = []
+    for i in range(0, len(texts), _BATCH_SIZE):
+        batch = texts[i : i + _BATCH_SIZE]
+        try:
+            embeddings.extend(_embed_batch(batch))
+        except Exception:
+            embeddings.extend([[] for _ in batch])
+
+    # Escribir a DB
+    conn = _connect()
+    conn.execute("DELETE FROM chunks")
+    for src, content, emb in zip(sources, texts, embeddings):
+        if emb:
+            conn.execute(
+                "INSERT INTO chunks(source, content, embedding) VALUES (?,?,?)",
+                (src, content, json.dumps(emb)),
+            )
+    conn.execute(
+        "INSERT OR REPLACE INTO meta VALUES ('built_at',?)", (str(time.time()),)
+    )
+    conn.commit()
+    conn.close()
+    return len([e for e in embeddings if e])
 
 
 # ── Query ─────────────────────────────────────────────────────────────────────
 
 def query(text: str, n: int = _TOP_K) -> str:
     """Semantic search. Reconstruye si stale. Retorna contexto formateado."""
+    t0 = time.perf_counter()
+    try:
+        with span("knowledge.query", n=n):
+            return _query(text, n)
+    finally:
+        _QUERY_SECONDS.observe(time.perf_counter() - t0)
+
+
+def _query(text: str, n: int) -> str:
     if is_stale():
         count = rebuild()
         if count == 0:
@@ -0,0 +1,203 @@
+"""
+Argos Core - Detector de bloqueos del event loop (modo debug).
+
+Hay llamadas sync que pueden terminar corriendo en el loop: urllib en
+bridge_client, mcp_vision, mcp_comfyui y knowledge; el polling con sleep de
+ComfyUI; duckdb.connect en vassago_search; write_bytes en frigate_cam. Que caigan
+en el loop o en un hilo depende de cómo las despachen FastMCP y LangGraph, así que
+en vez de adivinar se mide:
+
+  - un latido en el loop (`_heartbeat`) se reprograma cada `_TICK_S` y registra el
+    atraso (lag) en la métrica argos_loop_lag_seconds;
+  - un hilo vigía (`_watch`) ve cuándo el latido se detiene más de `_THRESHOLD_S`:
+    en ese momento toma el stack del hilo del loop con `sys._current_frames()`
+    (el código que lo está bloqueando, no el que vino después) y, cuando el loop
+    vuelve, anota la duración del bloqueo.
+
+Los bloqueos se agregan por call site: el frame más interno que pertenece al repo
+(p.ej. `core/knowledge.py:49 in _embed_batch`), con el frame donde estaba
+efectivamente parado (urllib, sqlite3…) y el último stack completo. Se ven en
+`GET /admin/loop-blocks`. Apagado salvo `ARGOS_LOOP_MONITOR=1`.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from pathlib import Path
+from typing import Any
+
+from core.metrics import counter, histogram
+from utils.logger_config import get_argos_logger
+
+logger = get_argos_logger()
+
+_ENABLED = os.getenv("ARGOS_LOOP_MONITOR", "0") == "1"
+_THRESHOLD_S = float(os.getenv("ARGOS_LOOP_BLOCK_MS", "100")) / 1000
+_TICK_S = 0.02
+_MAX_SITES = 100
+_STACK_DEPTH = 25
+_ROOT = Path(__file__).resolve().parents[1]
+
+_LOOP_LAG = histogram(
+    "argos_loop_lag_seconds", "Atraso del latido del event loop (modo debug)",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+_LOOP_BLOCKS = counter("argos_loop_blocks_total", "Bloqueos del event loop por encima del umbral (modo debug)")
+
+
+def _own_code(filename: str) -> bool:
+    path = Path(filename)
+    return path.is_relative_to(_ROOT) and not any(
+        part in ("site-packages", ".venv", "venv") for part in path.parts
+    )
+
+
+def _where(frame: traceback.FrameSummary) -> str:
+    path = Path(frame.filename)
+    name = path.relative_to(_ROOT).as_posix() if path.is_relative_to(_ROOT) else "/".join(path.parts[-2:])
+    return f"{name}:{frame.lineno} in {frame.name}"
+
+
+class _Offender:
+    __slots__ = ("site", "blocked_in", "count", "total_s", "max_s", "last_seen", "stack")
+
+    def __init__(self, site: str) -> None:
+        self.site = site
+        self.blocked_in = ""
+        self.count = 0
+        self.total_s = 0.0
+        self.max_s = 0.0
+        self.last_seen = 0.0
+        self.stack: list[str] = []
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "site": self.site,
+            "blocked_in": self.blocked_in,
+            "count": self.count,
+            "total_ms": round(1000 * self.total_s, 1),
+            "max_ms": round(1000 * self.max_s, 1),
+            "last_seen": self.last_seen,
+            "stack": self.stack,
+        }
+
+
+class LoopMonitor:
+    """Latido en el loop + hilo vigía que captura el stack de lo que lo bloquea."""
+
+    def __init__(self, threshold_s: float = _THRESHOLD_S, tick_s: float = _TICK_S) -> None:
+        self.threshold_s = threshold_s
+        self.tick_s = tick_s
+        self._beat = time.monotonic()
+        self._loop_thread: int | None = None
+        self._task: asyncio.Task | None = None
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        # (instante del último latido antes del bloqueo, stack capturado)
+        self._pending: tuple[float, list[traceback.FrameSummary]] | None = None
+        self._offenders: dict[str, _Offender] = {}
+        self._lock = threading.Lock()
+        self.blocks = 0
+        self.max_lag_s = 0.0
+
+    def start(self) -> None:
+        """Arranca latido y vigía. Llamar desde el event loop a vigilar."""
+        if self._task is not None:
+            return
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watch, name="argos-loop-watch", daemon=True)
+        self._thread.start()
+        logger.info("Loop monitor activo (umbral %.0f ms)", 1000 * self.threshold_s)
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _heartbeat(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            t0 = loop.time()
+            self._beat = time.monotonic()
+            await asyncio.sleep(self.tick_s)
+            lag = max(0.0, loop.time() - t0 - self.tick_s)
+            _LOOP_LAG.observe(lag)
+            if lag > self.max_lag_s:
+                self.max_lag_s = lag
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.tick_s / 2):
+            beat = self._beat
+            stalled = time.monotonic() - beat
+            if self._pending is None:
+                if stalled >= self.threshold_s:
+                    frame = sys._current_frames().get(self._loop_thread)  # type: ignore[arg-type]
+                    if frame is not None:
+                        self._pending = (beat, traceback.extract_stack(frame))
+            elif beat != self._pending[0]:
+                # El loop volvió a latir: cerrar el bloqueo con su duración.
+                started, stack = self._pending
+                self._pending = None
+                self._record(stack, max(self.threshold_s, beat - started - self.tick_s))
+
+    def _record(self, stack: list[traceback.FrameSummary], duration_s: float) -> None:
+        own = [f for f in stack if _own_code(f.filename) and f.filename != __file__]
+        site = _where(own[-1]) if own else (_where(stack[-1]) if stack else "desconocido")
+        with self._lock:
+            self.blocks += 1
+            offender = self._offenders.get(site)
+            if offender is None:
+                if len(self._offenders) >= _MAX_SITES:
+                    return
+                offender = self._offenders[site] = _Offender(site)
+            offender.blocked_in = _where(stack[-1]) if stack else ""
+            offender.count += 1
+            offender.total_s += duration_s
+            offender.max_s = max(offender.max_s, duration_s)
+            offender.last_seen = time.time()
+            offender.stack = [_where(f) for f in stack[-_STACK_DEPTH:]]
+        _LOOP_BLOCKS.inc()
+        logger.warning("Event loop bloqueado %.0f ms en %s", 1000 * duration_s, site)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._offenders.clear()
+            self.blocks = 0
+            self.max_lag_s = 0.0
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            offenders = sorted(self._offenders.values(), key=lambda o: o.total_s, reverse=True)
+            return {
+                "enabled": self._task is not None,
+                "threshold_ms": round(1000 * self.threshold_s, 1),
+                "blocks": self.blocks,
+                "max_lag_ms": round(1000 * self.max_lag_s, 1),
+                "offenders": [o.to_dict() for o in offenders],
+            }
+
+
+_MONITOR: LoopMonitor | None = None
+
+
+def start_loop_monitor() -> LoopMonitor | None:
+    """Arranca el monitor si ARGOS_LOOP_MONITOR=1 (llamar dentro del event loop)."""
+    global _MONITOR
+    if not _ENABLED:
+        return None
+    if _MONITOR is None:
+        _MONITOR = LoopMonitor()
+    _MONITOR.start()
+    return _MONITOR
+
+
+def get_loop_monitor() -> LoopMonitor | None:
+    return _MONITOR
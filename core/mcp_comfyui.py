@@ -22,7 +22,9 @@ from pathlib import Path
 from typing import Any
 
 from core.bridge_client import BRIDGE_TOKEN, BRIDGE_URL
+from core.health import CircuitOpen, register_service
 from core.mcp_server import mcp
+from core.request_context import budget, current_token
 from utils.logger_config import get_argos_logger
 
 logger = get_argos_logger()
@@ -33,6 +35,7 @@ _POLL_INTERVAL = 2.0
 _POLL_TIMEOUT = 180.0
 _WAKE_TIMEOUT = 120.0
 _WAKE_INTERVAL = 5.0
+_CANCELLED = "cancelado: el cliente se desconectó"
 
 _NEG_DEFAULT = (
     "worst quality, low quality, lowres, bad anatomy, bad hands, "
@@ -56,6 +59,12 @@ _WORKFLOW: dict = {
 }
 
 
+# Pasivo (sin sondeo): ComfyUI duerme a propósito y se despierta on-demand. Lo
+# abren los wakes/prompts fallidos; así no se paga el wake de 120 s en cada turno.
+_BREAKER = register_service("comfyui")
+_BRIDGE = register_service("bridge")
+
+
 def _comfyui_up() -> bool:
     try:
         with urllib.request.urlopen(f"{COMFYUI_URL}/system_stats", timeout=3.0) as r:
@@ -72,20 +81,25 @@ def _wake_comfyui() -> str | None:
         headers={"Content-Type": "application/json", "X-Bridge-Token": BRIDGE_TOKEN},
     )
     try:
-        with urllib.request.urlopen(req, timeout=5.0) as r:
+        with _BRIDGE.guard(), urllib.request.urlopen(req, timeout=budget(5.0)) as r:
             result = json.loads(r.read())
+    except CircuitOpen as e:
+        return str(e)
     except Exception as e:
         return f"Windows Bridge no disponible: {e}"
 
     if result.get("status") == "already_running":
         return None
 
-    deadline = time.monotonic() + _WAKE_TIMEOUT
+    token = current_token()
+    limit = budget(_WAKE_TIMEOUT)
+    deadline = time.monotonic() + limit
     while time.monotonic() < deadline:
-        time.sleep(_WAKE_INTERVAL)
+        if token.wait(_WAKE_INTERVAL):
+            return _CANCELLED
         if _comfyui_up():
             return None
-    return f"ComfyUI no respondió tras {_WAKE_TIMEOUT:.0f}s"
+    return f"ComfyUI no respondió tras {limit:.0f}s"
 
 
 @mcp.tool
@@ -109,10 +123,15 @@ def anima_generate(
     """
     if not prompt or not prompt.strip():
         return {"ok": False, "error": "prompt vacío"}
+    if not _BREAKER.allow():
+        return {"ok": False, "error": str(CircuitOpen("comfyui", _BREAKER.retry_in()))}
 
     if not _comfyui_up():
         err = _wake_comfyui()
+        if err == _CANCELLED:
+            return {"ok": False, "error": err}
         if err:
+            _BREAKER.record_failure(err)
             return {"ok": False, "error": err}
 
     wf = json.loads(json.dumps(_WORKFLOW))
@@ -129,18 +148,24 @@ def anima_generate(
         f"{COMFYUI_URL}/prompt", data=payload, headers={"Content-Type": "application/json"}
     )
     try:
-        with urllib.request.urlopen(req, timeout=10.0) as r:
+        with urllib.request.urlopen(req, timeout=budget(10.0)) as r:
             result = json.loads(r.read())
     except Exception as e:
+        _BREAKER.record_failure(e)
         return {"ok": False, "error": f"ComfyUI no disponible: {e}"}
+    _BREAKER.record_success()
 
     prompt_id = result.get("prompt_id")
     if not prompt_id:
         return {"ok": False, "error": f"ComfyUI no retornó prompt_id: {result}"}
 
-    img_bytes = _poll_image(prompt_id)
+    limit = budget(_POLL_TIMEOUT)
+    img_bytes = _poll_image(prompt_id, limit)
+    if current_token().cancelled:
+        _cancel_prompt(prompt_id)
+        return {"ok": False, "error": _CANCELLED}
     if img_bytes is None:
-        return {"ok": False, "error": f"timeout o sin imagen ({_POLL_TIMEOUT:.0f}s)"}
+        return {"ok": False, "error": f"timeout o sin imagen ({limit:.0f}s)"}
 
     try:
         _OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
@@ -153,11 +178,26 @@ def anima_generate(
     return {"ok": True, "path": str(out_path), "filename": fname, "bytes": len(img_bytes)}
 
 
-def _poll_image(prompt_id: str) -> bytes | None:
-    """Polling del history hasta tener la imagen. None si timeout."""
-    deadline = time.monotonic() + _POLL_TIMEOUT
+def _cancel_prompt(prompt_id: str) -> None:
+    """Saca el prompt de la cola de ComfyUI e interrumpe la ejecución en curso (libera la GPU)."""
+    for path, body in (("/queue", {"delete": [prompt_id]}), ("/interrupt", {})):
+        req = urllib.request.Request(
+            f"{COMFYUI_URL}{path}", data=json.dumps(body).encode(), headers={"Content-Type": "application/json"}
+        )
+        try:
+            urllib.request.urlopen(req, timeout=5.0).close()
+        except Exception as e:
+            logger.debug("ComfyUI %s falló: %s", path, e)
+    logger.info("anima_generate cancelado: prompt %s descartado", prompt_id)
+
+
+def _poll_image(prompt_id: str, timeout: float = _POLL_TIMEOUT) -> bytes | None:
+    """Polling del history hasta tener la imagen. None si timeout o request cancelado."""
+    token = current_token()
+    deadline = time.monotonic() + timeout
     while time.monotonic() < deadline:
-        time.sleep(_POLL_INTERVAL)
+        if token.wait(min(_POLL_INTERVAL, max(0.0, deadline - time.monotonic()))):
+            return None
         try:
             with urllib.request.urlopen(f"{COMFYUI_URL}/history/{prompt_id}", timeout=5.0) as r:
                 history = json.loads(r.read())
@@ -15,7 +15,10 @@ from typing import Any, Literal
 import httpx
 
 from core.bridge_client import BRIDGE_TOKEN, BRIDGE_URL
+from core.health import CircuitOpen, register_service
 from core.mcp_server import mcp
+from core.request_context import budget
+from core.singleflight import flight_key, get_flight
 from utils.logger_config import get_argos_logger
 
 logger = get_argos_logger()
@@ -25,6 +28,8 @@ FRIGATE_USER = os.getenv("FRIGATE_USER", "admin")
 FRIGATE_PASS = os.getenv("FRIGATE_PASS", "")
 _DEFAULT_CAMERA = os.getenv("FRIGATE_DEFAULT_CAMERA", "c200")
 _SNAP_DIR = Path(os.getenv("FRIGATE_SNAP_DIR", "/data/argos/snapshots"))
+_BREAKER = register_service("frigate", f"{FRIGATE_URL}/api/version", verify=False)
+_BRIDGE = register_service("bridge")
 
 
 async def _cookie(client: httpx.AsyncClient) -> str:
@@ -51,7 +56,7 @@ async def _config_set(client: httpx.AsyncClient, cookie: str, camera: str, field
 async def _go2rtc(action: str) -> bool:
     """action: 'start' | 'stop'. True si quedó en el estado deseado."""
     try:
-        async with httpx.AsyncClient(timeout=30.0) as c:
+        async with httpx.AsyncClient(timeout=budget(30.0)) as c, _BRIDGE.guard():
             r = await c.post(
                 f"{BRIDGE_URL}/go2rtc/{action}", headers={"X-Bridge-Token": BRIDGE_TOKEN}
             )
@@ -78,59 +83,76 @@ async def frigate_cam(
 
     camera: nombre de la cámara (default "c200"). Para "list" se ignora.
     """
+    if action == "list":
+        # Solo lectura: lists concurrentes comparten un único login + GET a Frigate.
+        return await get_flight("frigate_cam").do(
+            flight_key("frigate_cam", {"action": "list"}), lambda: _frigate_cam("list", None)
+        )
+    return await _frigate_cam(action, camera)
+
+
+async def _frigate_cam(action: str, camera: str | None) -> dict[str, Any]:
     cam = camera or _DEFAULT_CAMERA
 
     try:
-        async with httpx.AsyncClient(verify=False, timeout=15.0) as client:
-            cookie = await _cookie(client)
-
-            if action == "list":
-                cfg_r = await client.get(f"{FRIGATE_URL}/api/config", cookies={"frigate_token": cookie})
-                cams = cfg_r.json().get("cameras", {})
-                return {
-                    "ok": True,
-                    "cameras": {
-                        name: {
-                            "record": c.get("record", {}).get("enabled", False),
-                            "detect": c.get("detect", {}).get("enabled", False),
-                            "snapshots": c.get("snapshots", {}).get("enabled", False),
-                        }
-                        for name, c in cams.items()
-                    },
-                }
-
-            if action == "snapshot":
-                r = await client.get(
-                    f"{FRIGATE_URL}/api/{cam}/latest.jpg", cookies={"frigate_token": cookie}
-                )
-                if r.status_code != 200:
-                    return {"ok": False, "error": f"no hay snapshot para {cam} (HTTP {r.status_code})"}
-                _SNAP_DIR.mkdir(parents=True, exist_ok=True)
-                fname = f"{cam}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jpg"
-                out = _SNAP_DIR / fname
-                out.write_bytes(r.content)
-                return {"ok": True, "path": str(out), "filename": fname, "bytes": len(r.content)}
-
-            if action in ("enable", "disable"):
-                enabled = action == "enable"
-                if enabled and not await _go2rtc("start"):
-                    return {"ok": False, "error": "no pude iniciar go2rtc (¿bridge arriba?)"}
-
-                results = []
-                for field in ("record", "detect", "snapshots"):
-                    results.append(await _config_set(client, cookie, cam, field, {"enabled": enabled}))
-
-                if not enabled:
-                    await _go2rtc("stop")
-
-                if all(results):
-                    return {"ok": True, "camera": cam, "enabled": enabled}
-                return {"ok": False, "error": "Frigate no confirmó todos los cambios", "camera": cam}
-
-        return {"ok": False, "error": f"acción no reconocida: {action}"}
+        with _BREAKER.guard():
+            return await _frigate_action(action, cam)
+    except CircuitOpen as e:
+        return {"ok": False, "error": str(e)}
     except httpx.ConnectError:
         return {"ok": False, "error": "no puedo conectar con Frigate (¿está corriendo?)"}
     except Exception as e:
         msg = f"{type(e).__name__}: {e}".strip().rstrip(":")
         logger.error("frigate_cam falló: %s", msg)
         return {"ok": False, "error": msg}
+
+
+async def _frigate_action(action: str, cam: str) -> dict[str, Any]:
+    """Cuerpo de `_frigate_cam`; las caídas de red llegan como excepción al breaker."""
+    async with httpx.AsyncClient(verify=False, timeout=budget(15.0)) as client:
+        cookie = await _cookie(client)
+
+        if action == "list":
+            cfg_r = await client.get(f"{FRIGATE_URL}/api/config", cookies={"frigate_token": cookie})
+            cams = cfg_r.json().get("cameras", {})
+            return {
+                "ok": True,
+                "cameras": {
+                    name: {
+                        "record": c.get("record", {}).get("enabled", False),
+                        "detect": c.get("detect", {}).get("enabled", False),
+                        "snapshots": c.get("snapshots", {}).get("enabled", False),
+                    }
+                    for name, c in cams.items()
+                },
+            }
+
+        if action == "snapshot":
+            r = await client.get(
+                f"{FRIGATE_URL}/api/{cam}/latest.jpg", cookies={"frigate_token": cookie}
+            )
+            if r.status_code != 200:
+                return {"ok": False, "error": f"no hay snapshot para {cam} (HTTP {r.status_code})"}
+            _SNAP_DIR.mkdir(parents=True, exist_ok=True)
+            fname = f"{cam}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jpg"
+            out = _SNAP_DIR / fname
+            out.write_bytes(r.content)
+            return {"ok": True, "path": str(out), "filename": fname, "bytes": len(r.content)}
+
+        if action in ("enable", "disable"):
+            enabled = action == "enable"
+            if enabled and not await _go2rtc("start"):
+                return {"ok": False, "error": "no pude iniciar go2rtc (¿bridge arriba?)"}
+
+            results = []
+            for field in ("record", "detect", "snapshots"):
+                results.append(await _config_set(client, cookie, cam, field, {"enabled": enabled}))
+
+            if not enabled:
+                await _go2rtc("stop")
+
+            if all(results):
+                return {"ok": True, "camera": cam, "enabled": enabled}
+            return {"ok": False, "error": "Frigate no confirmó todos los cambios", "camera": cam}
+
+    return {"ok": False, "error": f"acción no reconocida: {action}"}
@@ -13,10 +13,16 @@ es async → se pasa como `coroutine`; el agente ya corre 100% async (`ainvoke`
 
 Fuente única: si mañana se agrega una tool MCP nueva y se añade aquí, el agente la
 hereda sin tocar `agent.py`.
+
+Las manos idempotentes (solo lectura) se memoizan con `_CACHE_POLICIES`
+(core.tool_cache). Solo afecta al agente — los clientes MCP externos llaman a la
+función original sin cache.
 """
 from __future__ import annotations
 
+import functools
 import inspect
+from pathlib import Path
 from typing import Any
 
 from langchain_core.tools import StructuredTool
@@ -29,6 +35,7 @@ from core import (
     mcp_vassago,
     mcp_vision,
 )
+from core.tool_cache import CachePolicy, apply_cache_policies
 from utils.logger_config import get_argos_logger
 
 logger = get_argos_logger()
@@ -45,6 +52,27 @@ _MCP_FUNCTION_TOOLS: list[Any] = [
 ]
 
 
+def _project_map_files(_args: dict) -> list[Path]:
+    """Notas del vault: editar una nota cambia su mtime, agregar/borrar cambia el del dir."""
+    notes = sorted(mcp_projectmap._PROJECTS_DIR.glob("*.md")) if mcp_projectmap._PROJECTS_DIR.is_dir() else []
+    return [mcp_projectmap._PROJECTS_DIR, mcp_projectmap._SUMMARY, *notes]
+
+
+# Solo lectura → memoizables. amon_lights/anima_generate/frigate_cam/get_datetime
+# NO (efectos secundarios o dependen del momento; ver tool_cache.NEVER_CACHE).
+_CACHE_POLICIES: dict[str, CachePolicy] = {
+    "project_map": CachePolicy(
+        ttl=600, depends_on=_project_map_files, casefold=("query",), collapse=("query",)
+    ),
+    "vassago_search": CachePolicy(
+        ttl=3600, depends_on=lambda a: [mcp_vassago._DB_PATH], casefold=("query",), collapse=("query",)
+    ),
+    "decarabia_analyze": CachePolicy(
+        ttl=900, depends_on=lambda a: [a["image_path"]] if a.get("image_path") else []
+    ),
+}
+
+
 def _to_langchain(fn: Any) -> StructuredTool:
     """Envuelve una función @mcp.tool en un StructuredTool de LangChain."""
     name = fn.__name__
@@ -63,7 +91,17 @@ def build_mcp_langchain_tools() -> list[StructuredTool]:
         except Exception as ex:  # una tool malformada no debe tumbar el agente
             logger.error("No se pudo adaptar tool MCP %r a LangChain: %s", getattr(t, "name", t), ex)
     logger.info("MCP→LangChain: %d/%d manos heredadas por el agente", len(out), len(_MCP_FUNCTION_TOOLS))
-    return out
+    return apply_cache_policies(out, _CACHE_POLICIES)
+
+
+@functools.lru_cache(maxsize=1)
+def mcp_as_langchain() -> list[StructuredTool]:
+    """Las manos adaptadas, construidas en el primer uso (core.tools.argos_tools)."""
+    return build_mcp_langchain_tools()
 
 
-MCP_AS_LANGCHAIN: list[StructuredTool] = build_mcp_langchain_tools()
+def __getattr__(name: str) -> Any:
+    # Compatibilidad: MCP_AS_LANGCHAIN ya no se construye al importar el módulo.
+    if name == "MCP_AS_LANGCHAIN":
+        return mcp_as_langchain()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -21,11 +21,20 @@ _PROJECTS_DIR = _VAULT / "01-Projects"
 _SUMMARY = _VAULT / "ECOSYSTEM_SUMMARY.md"
 _MAX_CHARS = 6000
 
+# (mtime del directorio, nombres): crear/borrar/renombrar una nota cambia el mtime.
+_listing: tuple[float, list[str]] | None = None
+
 
 def _list_projects() -> list[str]:
-    if not _PROJECTS_DIR.is_dir():
+    """Nombres de nota en 01-Projects. Re-globa solo si cambió el directorio (un stat por llamada)."""
+    global _listing
+    try:
+        mtime = _PROJECTS_DIR.stat().st_mtime
+    except OSError:
         return []
-    return sorted(p.stem for p in _PROJECTS_DIR.glob("*.md"))
+    if _listing is None or _listing[0] != mtime:
+        _listing = (mtime, sorted(p.stem for p in _PROJECTS_DIR.glob("*.md")))
+    return list(_listing[1])
 
 
 def _read_trimmed(path: Path) -> str:
@@ -14,6 +14,7 @@ from typing import Any, Literal
 
 from core.bridge_client import bridge_get, bridge_post
 from core.mcp_server import mcp
+from core.singleflight import flight_key, get_flight
 
 # Colombia es UTC-5 fijo (sin DST). Evita depender de tzdata en el contenedor.
 _COLOMBIA_TZ = timezone(timedelta(hours=-5))
@@ -73,7 +74,10 @@ def amon_lights(
     Devuelve {"ok": bool, ...}.
     """
     if action == "status":
-        return bridge_get("/amon/status")
+        # Solo lectura: status concurrentes comparten un único GET al bridge.
+        return get_flight("amon_lights").do_sync(
+            flight_key("amon_lights", {"action": "status"}), lambda: bridge_get("/amon/status")
+        )
 
     if action == "stop":
         return bridge_post("/amon/stop", {})
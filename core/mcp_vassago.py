@@ -12,8 +12,6 @@ import re
 from pathlib import Path
 from typing import Any
 
-import duckdb
-
 from core.mcp_server import mcp
 from utils.logger_config import get_argos_logger
 
@@ -57,6 +55,8 @@ def vassago_search(query: str, top_n: int = 10) -> dict[str, Any]:
     params = [f"%{w}%" for w in words]
 
     try:
+        import duckdb  # primer uso: ~50 ms de carga que el arranque de la API no necesita
+
         con = duckdb.connect(_DB_PATH, read_only=True)
         try:
             rows = con.execute(
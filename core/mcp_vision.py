@@ -15,7 +15,10 @@ from pathlib import Path
 from typing import Any, Literal
 
 from core.config import load_model_config
+from core.health import CircuitOpen, register_service
 from core.mcp_server import mcp
+from core.request_context import budget
+from core.vram import get_vram_scheduler
 from utils.logger_config import get_argos_logger
 
 logger = get_argos_logger()
@@ -77,11 +80,15 @@ def decarabia_analyze(
     base_prompt = _MODE_PROMPTS.get(mode, _MODE_PROMPTS["general"])
     full_prompt = f"{base_prompt}\n\n{prompt}".strip() if prompt else base_prompt
 
+    # gemma4 no cabe junto al agente: descargar lo ocioso antes, y keep_alive 0
+    # (fuera de un lote) para devolverle la VRAM al agente apenas termine.
+    vram = get_vram_scheduler()
     payload = json.dumps({
         "model": cfg.vision,
         "prompt": full_prompt,
         "images": [b64],
         "stream": False,
+        "keep_alive": vram.keep_alive("vision"),
     }).encode()
 
     req = urllib.request.Request(
@@ -90,8 +97,12 @@ def decarabia_analyze(
         headers={"Content-Type": "application/json"},
     )
     try:
-        with urllib.request.urlopen(req, timeout=_TIMEOUT) as r:
-            result = json.loads(r.read())
+        with vram.busy("vision"):
+            vram.prepare("vision")
+            with register_service("ollama").guard(), urllib.request.urlopen(req, timeout=budget(_TIMEOUT)) as r:
+                result = json.loads(r.read())
+    except CircuitOpen as e:
+        return {"ok": False, "error": str(e)}
     except Exception as e:
         logger.error("decarabia_analyze falló: %s", e)
         return {"ok": False, "error": f"Ollama visión no disponible: {e}"}
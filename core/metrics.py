@@ -0,0 +1,222 @@
+"""
+Argos Core - Métricas en formato de exposición de Prometheus (`GET /metrics`).
+
+Los logs dicen qué path tomó cada request, no dónde se fue el tiempo. Este módulo
+lleva contadores, gauges e histogramas en memoria y los serializa en el formato de
+texto 0.0.4 de Prometheus — sin prometheus_client ni servicio externo: cualquier
+scraper (Prometheus, VictoriaMetrics, un curl) los lee.
+
+Cada módulo declara sus métricas a nivel de módulo con `counter()`, `gauge()` o
+`histogram()` (idempotentes: mismo nombre → mismo objeto) y las actualiza en el hot
+path. Actualizar es un lock + una suma: los hilos de tools y el event loop comparten
+métricas sin coordinarse. Las lecturas caras (profundidad de cola, etc.) se hacen al
+scrapear, con `Gauge.set_function()`.
+
+Métricas principales:
+  argos_chat_seconds{path,status}              turno completo de /chat por path
+  argos_route_decisions_total{path,reason}     decisiones del router
+  argos_model_call_seconds{role,backend}       llamadas al modelo (agent/chat)
+  argos_model_tokens_total{role,kind}          tokens de prompt / completion
+  argos_tool_seconds{tool} / argos_tool_errors_total{tool,error_type}
+  argos_knowledge_{query,rebuild}_seconds      RAG de proyectos
+  argos_agent_queue_depth / argos_agent_active control de admisión
+"""
+from __future__ import annotations
+
+import bisect
+import math
+import threading
+from typing import Callable, Iterable, Sequence
+
+# Latencias de Argos: de ms (tools, router) a minutos (anima_generate, rebuild).
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, object]) -> tuple[str, ...]:
+        try:
+            return tuple(str(labels[n]) for n in self.labelnames)
+        except KeyError as e:
+            raise ValueError(f"{self.name}: falta la etiqueta {e}") from None
+
+    def _samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        head = f"# HELP {self.name} {_escape(self.help)}\n# TYPE {self.name} {self.kind}\n"
+        return head + "".join(f"{line}\n" for line in self._samples())
+
+
+class Counter(_Metric):
+    """Valor que solo crece (llamadas, errores, tokens)."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: object) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: object) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> Iterable[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_labels(self.labelnames, key)} {_fmt(value)}"
+
+
+class Gauge(_Metric):
+    """Valor instantáneo. Con `set_function` se lee al scrapear (sin costo en el hot path)."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+        self._fn: Callable[[], float] | None = None
+
+    def set(self, value: float, **labels: object) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_function(self, fn: Callable[[], float]) -> None:
+        """Solo para gauges sin etiquetas: `fn()` da el valor en cada scrape."""
+        self._fn = fn
+
+    def _samples(self) -> Iterable[str]:
+        if self._fn is not None:
+            try:
+                yield f"{self.name} {_fmt(self._fn())}"
+            except Exception:
+                pass  # la fuente no está lista (p.ej. agente sin inicializar)
+            return
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_labels(self.labelnames, key)} {_fmt(value)}"
+
+
+class Histogram(_Metric):
+    """Distribución en buckets acumulativos + suma + cuenta, por combinación de etiquetas."""
+
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key → [conteo por bucket (no acumulado) + overflow, suma]
+        self._series: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels: object) -> None:
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][i] += 1
+            series[1][0] += value
+
+    def count(self, **labels: object) -> int:
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            return sum(series[0]) if series else 0
+
+    def _samples(self) -> Iterable[str]:
+        with self._lock:
+            items = sorted((k, (list(c), s[0])) for k, (c, s) in self._series.items())
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, n in zip((*self.buckets, math.inf), counts):
+                cumulative += n
+                le = f'le="{_fmt(bound)}"'
+                yield f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, key)} {_fmt(total)}"
+            yield f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}"
+
+
+class MetricsRegistry:
+    """Métricas del proceso, en orden de registro."""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        """Registra `metric`; si ya hay una con ese nombre y tipo devuelve la existente."""
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is None:
+                self._metrics[metric.name] = metric
+                return metric
+        if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+            raise ValueError(f"métrica {metric.name} ya registrada con otro tipo o etiquetas")
+        return existing
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "".join(m.render() for m in metrics)
+
+
+_REGISTRY = MetricsRegistry()
+
+
+def metrics_registry() -> MetricsRegistry:
+    return _REGISTRY
+
+
+def counter(name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+    return _REGISTRY.register(Counter(name, help, labelnames))  # type: ignore[return-value]
+
+
+def gauge(name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+    return _REGISTRY.register(Gauge(name, help, labelnames))  # type: ignore[return-value]
+
+
+def histogram(
+    name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+) -> Histogram:
+    return _REGISTRY.register(Histogram(name, help, labelnames, buckets))  # type: ignore[return-value]
+
+
+def render() -> str:
+    """Todas las métricas en formato de texto de Prometheus."""
+    return _REGISTRY.render()
@@ -0,0 +1,98 @@
+"""
+Argos Core - Prefetch especulativo de tools de contexto.
+
+En muchos turnos AGENT lo primero que hace el modelo es `project_map("<proyecto>")`
+sobre el proyecto que nombra la pregunta: un round trip completo del modelo antes de
+que arranque la lectura. `start_prefetch()` detecta en la pregunta los proyectos del
+vault (nombres de nota en 01-Projects y los nombres de demonio del ecosistema) y lanza esas
+lecturas EN PARALELO con la primera llamada al modelo, por `ParallelToolNode.prefetch`:
+mismo pool, cupo (semáforo) y timeout que la tool call real.
+
+Solo se mira la pregunta del usuario (no el contexto que el web UI pone antes del
+marcador), y solo si project_map está bindeada en el turno (core.tool_select). El
+listado del vault (stat + glob) corre en un hilo dentro de la tarea de prefetch; en
+el loop solo se compara la pregunta contra esa foto de nombres.
+
+El resultado cae en el cache de core.tool_cache (clave = nombre + args
+normalizados). Si el modelo pide lo mismo, la tool responde desde el cache — o se
+une al cálculo aún en vuelo (single-flight). Si no lo pide, el costo fue una
+lectura local de un .md.
+
+Solo tools idempotentes con política de cache; nada que el modelo no pudiera pedir.
+`ARGOS_PREFETCH=0` lo desactiva.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import re
+from typing import Sequence
+
+from core import mcp_projectmap
+from core.tool_exec import ParallelToolNode
+from core.tool_select import user_question
+from utils.logger_config import get_argos_logger
+
+logger = get_argos_logger()
+
+_ENABLED = os.getenv("ARGOS_PREFETCH", "1") == "1"
+_MAX_PROJECTS = 2
+
+# Nombres del ecosistema tal como el modelo los pasa a project_map (aunque la nota
+# del vault se llame distinto, p.ej. "Malphas" → Argos Core).
+_ECOSYSTEM_NAMES = ("Asmodeus", "Argos", "Malphas", "Baael", "Vassago", "Amon", "Furfur", "Orobas")
+
+_stats = {"turns": 0, "started": 0, "failed": 0}
+
+
+def _mentions(text: str, term: str) -> bool:
+    pattern = r"\b" + re.escape(term.lower()).replace(r"_", r"[_ ]").replace(r"\-", r"[- ]") + r"\b"
+    return re.search(pattern, text) is not None
+
+
+def guess_projects(text: str, projects: Sequence[str] = ()) -> list[str]:
+    """Proyectos nombrados en la pregunta, escritos como en el vault (máx `_MAX_PROJECTS`).
+
+    `projects` = nombres de nota del vault ya listados (sin I/O acá).
+    """
+    t = user_question(text)
+    found: list[str] = []
+    for name in (*projects, *_ECOSYSTEM_NAMES):
+        if _mentions(t, name) and name.casefold() not in {f.casefold() for f in found}:
+            found.append(name)
+    return found[:_MAX_PROJECTS]
+
+
+def _log_failure(fut: asyncio.Future) -> None:
+    if not fut.cancelled() and fut.exception() is not None:
+        _stats["failed"] += 1
+        logger.warning("Prefetch falló: %s", fut.exception())
+
+
+async def _prefetch(text: str, node: ParallelToolNode) -> list[asyncio.Future]:
+    names = await asyncio.to_thread(mcp_projectmap._list_projects)
+    projects = guess_projects(text, names)
+    if not projects:
+        return []
+    _stats["turns"] += 1
+    futures = []
+    for name in projects:
+        fut = asyncio.ensure_future(node.prefetch("project_map", {"query": name}))
+        fut.add_done_callback(_log_failure)
+        futures.append(fut)
+    _stats["started"] += len(futures)
+    logger.debug("Prefetch project_map: %s", projects)
+    return futures
+
+
+def start_prefetch(text: str, node: ParallelToolNode) -> asyncio.Task | None:
+    """Lanza en background las lecturas probables. Nunca lanza; no hay que esperarla."""
+    if not _ENABLED or not node.can_dispatch_early("project_map"):
+        return None
+    task = asyncio.ensure_future(_prefetch(text, node))
+    task.add_done_callback(_log_failure)
+    return task
+
+
+def prefetch_stats() -> dict[str, int]:
+    return dict(_stats)
@@ -0,0 +1,173 @@
+"""
+Argos Core - Precalentado del prefijo estático en llama-server.
+
+prompts.py mantiene el system prompt ESTÁTICO para que el prefix cache sirva, pero
+llama-swap descarga el modelo agente tras 600 s sin uso: el primer request después
+de cada recarga reprocesa system prompt + manifiesto + esquemas de tools desde cero.
+
+`PrefixWarmer.run()` (tarea de fondo, solo backend openai) vigila `GET /running`
+de llama-swap. Cuando el modelo agente pasa a cargado:
+
+  1. Intenta restaurar el KV del prefijo en cada slot desde disco
+     (`/upstream/<model>/slots/<id>?action=restore`, requiere `--slot-save-path`).
+  2. Si no hay archivo (o el servidor no soporta slots) → prefill: un request con el
+     prefijo exacto que manda el agente y `max_tokens=1`, uno por slot, y después
+     `action=save` del slot 0 para la próxima recarga.
+
+El archivo se nombra con un hash de modelo + prompt + esquemas: si cambia el prompt
+o una tool, el KV viejo no se restaura. Se calienta solo la variante con todas las
+tools: un turno con subconjunto (core.tool_select) reusa rol + manifiesto, que van
+primero, y reprocesa desde <available_tools>. Calentar cada subconjunto costaría un
+slot por variante.
+
+Se registra cuánto tardó cada calentado y el `prompt_ms` que reporta llama-server,
+para comparar recarga fría vs restaurada (ver benchmarks/bench_prefix_warm.py).
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from typing import Any, Sequence
+
+import httpx
+from langchain_core.tools import BaseTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from utils.logger_config import get_argos_logger
+
+logger = get_argos_logger()
+
+_ENABLED = os.getenv("ARGOS_PREFIX_WARM", "1") == "1"
+_POLL_S = float(os.getenv("ARGOS_PREFIX_WARM_POLL", "5"))
+_TIMEOUT = 120.0
+
+
+def swap_root(agent_base_url: str) -> str:
+    """`http://host:8090/v1` → `http://host:8090` (raíz de llama-swap)."""
+    url = agent_base_url.rstrip("/")
+    return url[:-3] if url.endswith("/v1") else url
+
+
+class PrefixWarmer:
+    """Detecta recargas del modelo agente y deja su prefijo estático en el KV cache."""
+
+    def __init__(
+        self,
+        base_url: str,
+        model: str,
+        system_prompt: str,
+        tools: Sequence[BaseTool],
+        slots: int = 1,
+        extra_body: dict[str, Any] | None = None,
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.root = swap_root(base_url)
+        self.model = model
+        self.slots = max(1, slots)
+        self.extra_body = extra_body or {}
+        self._messages = [{"role": "system", "content": system_prompt}, {"role": "user", "content": "."}]
+        self._tools = [convert_to_openai_tool(t) for t in tools]
+        digest = hashlib.sha1(
+            json.dumps([model, system_prompt, self._tools], sort_keys=True, ensure_ascii=False).encode()
+        ).hexdigest()[:12]
+        self.filename = f"argos-prefix-{digest}.bin"
+        self._loaded = False
+        self._slots_supported = True
+        self.history: list[dict[str, Any]] = []  # últimos calentados (más reciente al final)
+
+    # ── Detección ───────────────────────────────────────────────────────────
+
+    async def is_loaded(self, client: httpx.AsyncClient) -> bool:
+        """True si llama-swap reporta el modelo agente cargado y listo."""
+        r = await client.get(f"{self.root}/running")
+        r.raise_for_status()
+        for entry in r.json().get("running", []):
+            if entry.get("model") == self.model and entry.get("state", "ready") == "ready":
+                return True
+        return False
+
+    async def run(self) -> None:
+        """Bucle de fondo. Nunca lanza (salvo CancelledError al apagar)."""
+        if not _ENABLED:
+            return
+        async with httpx.AsyncClient(timeout=_TIMEOUT) as client:
+            while True:
+                try:
+                    loaded = await self.is_loaded(client)
+                    if loaded and not self._loaded:
+                        await self.warm(client)
+                    self._loaded = loaded
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.debug("PrefixWarmer: %s", e)
+                await asyncio.sleep(_POLL_S)
+
+    # ── Calentado ───────────────────────────────────────────────────────────
+
+    async def warm(self, client: httpx.AsyncClient) -> dict[str, Any]:
+        """Restaura o prellena el prefijo en todos los slots. Devuelve la medición."""
+        t0 = time.perf_counter()
+        mode = "restore"
+        restored = self._slots_supported and all(
+            [await self._slot_action(client, slot, "restore") for slot in range(self.slots)]
+        )
+        prompt_ms: float | None = None
+        if not restored:
+            mode = "prefill"
+            timings = [await self.prefill(client, slot) for slot in range(self.slots)]
+            prompt_ms = sum(t.get("prompt_ms", 0.0) for t in timings)
+            if self._slots_supported:
+                await self._slot_action(client, 0, "save")
+        result = {
+            "mode": mode,
+            "slots": self.slots,
+            "ms": round(1000 * (time.perf_counter() - t0), 1),
+            "prompt_ms": round(prompt_ms, 1) if prompt_ms is not None else None,
+            "at": time.time(),
+        }
+        self.history = [*self.history[-9:], result]
+        logger.info("Prefijo del agente calentado (%s) en %.0f ms", mode, result["ms"])
+        return result
+
+    async def prefill(self, client: httpx.AsyncClient, slot: int | None = None) -> dict[str, Any]:
+        """Request de 1 token con el prefijo exacto del agente. Devuelve `timings` de llama-server."""
+        body: dict[str, Any] = {
+            "model": self.model,
+            "messages": self._messages,
+            "tools": self._tools,
+            "max_tokens": 1,
+            "temperature": 0.0,
+            "cache_prompt": True,
+            **self.extra_body,
+        }
+        if slot is not None:
+            body["id_slot"] = slot
+        r = await client.post(f"{self.base_url}/chat/completions", json=body)
+        r.raise_for_status()
+        return r.json().get("timings", {})
+
+    async def _slot_action(self, client: httpx.AsyncClient, slot: int, action: str) -> bool:
+        url = f"{self.root}/upstream/{self.model}/slots/{slot}"
+        try:
+            r = await client.post(url, params={"action": action}, json={"filename": self.filename})
+        except httpx.HTTPError as e:
+            logger.debug("slot %s %s falló: %s", slot, action, e)
+            return False
+        if r.status_code == 501:
+            # llama-server sin --slot-save-path: no volver a intentarlo.
+            self._slots_supported = False
+        return r.status_code == 200
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "enabled": _ENABLED,
+            "url": self.base_url,
+            "loaded": self._loaded,
+            "slot_persistence": self._slots_supported,
+            "file": self.filename,
+            "last": self.history[-1] if self.history else None,
+        }
@@ -0,0 +1,113 @@
+"""
+Argos Core - Contexto del request HTTP en curso: cancelación y plazo.
+
+Si el cliente de `/chat` se va (Telegram se rinde, se cierra la pestaña del
+dashboard), el turno seguía corriendo entero: llamadas al modelo, `anima_generate`
+esperando hasta 180 s, `run_command`. Ahora api.py detecta la desconexión y:
+
+  1. `token.cancel()` → las tools sync (hilos, no se pueden matar) ven la señal en
+     su próximo `token.wait(...)` / `cancelled` y dejan de hacer polling;
+  2. cancela la tarea asyncio del turno → el CancelledError llega a las llamadas
+     HTTP en vuelo y a las tools async.
+
+Plazo (deadline): `/chat` fija un instante límite para todo el turno. Cada paso
+pide `budget(su_timeout)` y recibe lo que quede si es menos: llamadas al modelo,
+timeouts de tools, polling de ComfyUI, `run_command`, el bridge. El agente deja de
+abrir rondas de tools cuando lo que queda no alcanza para otra llamada al modelo.
+
+Token y plazo viajan en ContextVars: los heredan las tareas del grafo y los hilos
+de tools (tool_exec propaga el contexto). Fuera de un request hay un token que
+nunca se cancela y no hay plazo, así el código de las tools no distingue casos.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+
+class RequestCancelled(Exception):
+    """El request que originó este trabajo fue cancelado."""
+
+
+class DeadlineExceeded(Exception):
+    """Se agotó el plazo del request antes de terminar el turno."""
+
+
+class CancelToken:
+    """Señal de cancelación compartida entre el event loop y los hilos de tools."""
+
+    def __init__(self) -> None:
+        self._event = threading.Event()
+        self.reason: str | None = None
+
+    def cancel(self, reason: str = "client_disconnected") -> None:
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def wait(self, timeout: float) -> bool:
+        """Reemplazo de `time.sleep` en polling: True si se canceló mientras tanto."""
+        return self._event.wait(timeout)
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise RequestCancelled(self.reason or "cancelado")
+
+
+class _NeverToken(CancelToken):
+    """Token de fuera de un request: compartido por todos, nunca se cancela."""
+
+    def cancel(self, reason: str = "client_disconnected") -> None:
+        pass
+
+
+_NEVER = _NeverToken()
+_TOKEN: ContextVar[CancelToken] = ContextVar("argos_cancel_token", default=_NEVER)
+# Instante límite (time.monotonic) del request en curso; None = sin plazo.
+_DEADLINE: ContextVar[float | None] = ContextVar("argos_deadline", default=None)
+# Piso de `budget()`: un timeout 0 dejaría el socket en modo no bloqueante.
+_MIN_BUDGET_S = 0.1
+
+
+def current_token() -> CancelToken:
+    """Token del request en curso (uno que nunca se cancela si no hay request)."""
+    return _TOKEN.get()
+
+
+@contextmanager
+def cancel_scope(token: CancelToken) -> Iterator[CancelToken]:
+    """Instala `token` para el trabajo (tareas e hilos) que se cree dentro del bloque."""
+    reset = _TOKEN.set(token)
+    try:
+        yield token
+    finally:
+        _TOKEN.reset(reset)
+
+
+@contextmanager
+def deadline_scope(seconds: float | None) -> Iterator[None]:
+    """Plazo de `seconds` desde ahora para el trabajo creado dentro del bloque (None = sin plazo)."""
+    reset = _DEADLINE.set(time.monotonic() + seconds if seconds is not None else None)
+    try:
+        yield
+    finally:
+        _DEADLINE.reset(reset)
+
+
+def remaining() -> float | None:
+    """Segundos que quedan del plazo del request (puede ser <= 0); None si no hay plazo."""
+    deadline = _DEADLINE.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def budget(timeout: float) -> float:
+    """`timeout` recortado a lo que queda del plazo (mínimo `_MIN_BUDGET_S`)."""
+    left = remaining()
+    return timeout if left is None else max(_MIN_BUDGET_S, min(timeout, left))
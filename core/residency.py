@@ -0,0 +1,118 @@
+"""
+Argos Core - Residencia de modelos: qué está cargado en VRAM ahora mismo.
+
+llama-swap descarga el modelo agente tras su TTL y Ollama libera los modelos con
+`keep_alive` vencido; el primer request después paga la carga en frío (~15 s para
+el agente). El router no lo sabía.
+
+`ResidencyMonitor.snapshot()` consulta en paralelo:
+  - Ollama `GET /api/ps`           → modelos cargados (chat, visión, agente ollama);
+  - llama-swap `GET /running`      → modelos listos en cada backend agente openai.
+
+El resultado se cachea `_TTL_S` segundos y las consultas concurrentes comparten
+una sola ronda (single-flight). Un endpoint que no responde queda "desconocido":
+el router lo trata como caliente (sin información, no cambia la ruta).
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from typing import Any, Sequence
+
+import httpx
+
+from core.prefix_warmer import swap_root
+from core.singleflight import get_flight
+from utils.logger_config import get_argos_logger
+
+logger = get_argos_logger()
+
+_ENABLED = os.getenv("ARGOS_RESIDENCY", "1") == "1"
+_TTL_S = float(os.getenv("ARGOS_RESIDENCY_TTL", "2"))
+_TIMEOUT = 0.5
+# Estimación de la carga en frío que se anuncia al cliente (evento loading_model).
+COLD_LOAD_S = float(os.getenv("ARGOS_COLD_LOAD_S", "15"))
+
+
+def _same_model(loaded: str, model: str) -> bool:
+    """Ollama reporta `nombre:tag`; un modelo configurado sin tag equivale a `:latest`."""
+    if loaded == model:
+        return True
+    return ":" not in model and loaded == f"{model}:latest"
+
+
+class ResidencyMonitor:
+    """Modelos residentes por endpoint, con cache corto."""
+
+    def __init__(self, ollama_url: str, agent_urls: Sequence[str] = ()) -> None:
+        self.ollama_url = ollama_url.rstrip("/")
+        self.swap_roots = [swap_root(u) for u in agent_urls]
+        # (kind, endpoint) → modelos cargados; None = el endpoint no respondió.
+        self._loaded: dict[tuple[str, str], frozenset[str] | None] = {}
+        self._at = 0.0
+        self.refreshes = 0
+        self.cold_hits = 0
+
+    async def snapshot(self) -> dict[tuple[str, str], frozenset[str] | None]:
+        if time.monotonic() - self._at < _TTL_S:
+            return self._loaded
+        return await get_flight("residency").do("snapshot", self._refresh)
+
+    async def _refresh(self) -> dict[tuple[str, str], frozenset[str] | None]:
+        async with httpx.AsyncClient(timeout=_TIMEOUT) as client:
+            results = await asyncio.gather(
+                self._ollama_ps(client),
+                *(self._swap_running(client, root) for root in self.swap_roots),
+            )
+        endpoints = [("ollama", self.ollama_url), *(("openai", root) for root in self.swap_roots)]
+        self._loaded = dict(zip(endpoints, results))
+        self._at = time.monotonic()
+        self.refreshes += 1
+        return self._loaded
+
+    async def _ollama_ps(self, client: httpx.AsyncClient) -> frozenset[str] | None:
+        try:
+            r = await client.get(f"{self.ollama_url}/api/ps")
+            r.raise_for_status()
+            return frozenset(m.get("name") or m.get("model", "") for m in r.json().get("models", []))
+        except (httpx.HTTPError, ValueError) as e:
+            logger.debug("residency: /api/ps falló: %s", e)
+            return None
+
+    async def _swap_running(self, client: httpx.AsyncClient, root: str) -> frozenset[str] | None:
+        try:
+            r = await client.get(f"{root}/running")
+            r.raise_for_status()
+            return frozenset(
+                e.get("model", "") for e in r.json().get("running", []) if e.get("state", "ready") == "ready"
+            )
+        except (httpx.HTTPError, ValueError) as e:
+            logger.debug("residency: %s/running falló: %s", root, e)
+            return None
+
+    async def is_warm(self, model: str, kind: str = "ollama") -> bool:
+        """True si `model` está cargado (o no se sabe). kind: "ollama" | "openai" (llama-swap).
+
+        openai: basta con que esté listo en cualquiera de los backends del pool.
+        """
+        if not _ENABLED:
+            return True
+        loaded = await self.snapshot()
+        endpoints = [("openai", r) for r in self.swap_roots] if kind == "openai" else [("ollama", self.ollama_url)]
+        known = [loaded.get(e) for e in endpoints if loaded.get(e) is not None]
+        if len(known) < len(endpoints):
+            return True  # algún endpoint sin respuesta: no adivinar
+        warm = any(_same_model(m, model) for models in known for m in models)
+        if not warm:
+            self.cold_hits += 1
+        return warm
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "enabled": _ENABLED,
+            "age_s": round(time.monotonic() - self._at, 1) if self._at else None,
+            "loaded": {f"{k}:{e}": sorted(m) if m is not None else None for (k, e), m in self._loaded.items()},
+            "refreshes": self.refreshes,
+            "cold_hits": self.cold_hits,
+        }
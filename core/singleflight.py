@@ -0,0 +1,170 @@
+"""
+Argos Core - Single-flight: coalescer requests idénticos en vuelo.
+
+El dashboard y el bot a veces disparan el mismo request dos veces (reintentos,
+doble submit), igual que `/knowledge/query` y algunas tools MCP de solo lectura
+(`frigate_cam list`, `amon_lights status`). Cada duplicado pagaba un round trip
+completo al modelo o al backend.
+
+`SingleFlight.do(key, fn)` (async) y `SingleFlight.do_sync(key, fn)` (hilos)
+ejecutan `fn` una sola vez por clave mientras haya una llamada en vuelo; los
+llamadores concurrentes con la misma clave reciben el mismo resultado (o la misma
+excepción). No es un cache: al terminar la llamada la clave se olvida.
+
+El resultado es COMPARTIDO entre llamadores — tratarlo como solo lectura.
+
+En `do` la llamada compartida es una tarea propia que cuenta sus llamadores: uno que
+se cancela (cliente desconectado, plazo vencido) deja de esperar sin afectar a los
+demás, y cuando se va el último la tarea se cancela — la GPU no sigue trabajando
+para nadie. La tarea corre en un `contextvars.Context` vacío: no hereda plazo, token
+de cancelación ni traza del primer llamador, así que `budget()` adentro no ve ningún
+plazo. Cada llamador con plazo lo aplica sobre su propia espera
+(`asyncio.wait_for(flight.do(...), timeout=remaining())`, como el path CHAT). En la
+traza de cada llamador queda un span `flight:<grupo>`.
+
+En `do_sync` la llamada corre en el hilo del primero (no se puede cancelar un hilo):
+los demás esperan su resultado con el contexto de ese hilo.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import json
+import threading
+from typing import Any, Awaitable, Callable, TypeVar
+
+from core.tracing import span
+
+T = TypeVar("T")
+
+
+def flight_key(endpoint: str, payload: Any, thread: str | None = None) -> str:
+    """Clave (endpoint, payload normalizado, thread). Espacios colapsados en strings."""
+
+    def norm(v: Any) -> Any:
+        if isinstance(v, str):
+            return " ".join(v.split())
+        if isinstance(v, dict):
+            return {str(k): norm(x) for k, x in sorted(v.items())}
+        if isinstance(v, (list, tuple)):
+            return [norm(x) for x in v]
+        return v
+
+    return f"{endpoint}|{thread or ''}|{json.dumps(norm(payload), sort_keys=True, ensure_ascii=False, default=str)}"
+
+
+class _SyncCall:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self) -> None:
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task) -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Un grupo de single-flight con sus contadores (calls / coalesced)."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._tasks: dict[str, _Flight] = {}
+        self._sync: dict[str, _SyncCall] = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        with self._lock:
+            self.calls += 1
+            flight = self._tasks.get(key)
+            coalesced = flight is not None
+            if flight is None:
+                # Contexto vacío: el trabajo compartido no es del primer llamador.
+                task = asyncio.get_running_loop().create_task(fn(), context=contextvars.Context())
+                flight = self._tasks[key] = _Flight(task)
+                task.add_done_callback(lambda t, k=key: self._forget(k, t))
+            else:
+                self.coalesced += 1
+            flight.waiters += 1
+        try:
+            with span(f"flight:{self.name}", coalesced=coalesced):
+                # shield: si un llamador se cancela, los demás siguen esperando el mismo trabajo.
+                return await asyncio.shield(flight.task)
+        finally:
+            with self._lock:
+                flight.waiters -= 1
+                abandoned = flight.waiters == 0 and not flight.task.done()
+                if abandoned and self._tasks.get(key) is flight:
+                    del self._tasks[key]  # quien llegue ahora arranca una llamada nueva
+            if abandoned:
+                flight.task.cancel()
+
+    def do_sync(self, key: str, fn: Callable[[], T]) -> T:
+        with self._lock:
+            self.calls += 1
+            call = self._sync.get(key)
+            leader = call is None
+            if leader:
+                call = self._sync[key] = _SyncCall()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._sync.pop(key, None)
+            call.event.set()
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        with self._lock:
+            flight = self._tasks.get(key)
+            if flight is not None and flight.task is task:
+                del self._tasks[key]
+        if not task.cancelled():
+            task.exception()  # evitar "exception was never retrieved" si nadie quedó esperando
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "coalesced": self.coalesced,
+                "inflight": len(self._tasks) + len(self._sync),
+            }
+
+
+_GROUPS: dict[str, SingleFlight] = {}
+_GROUPS_LOCK = threading.Lock()
+
+
+def get_flight(name: str) -> SingleFlight:
+    """Grupo por nombre (uno por endpoint/tool), creado al primer uso."""
+    with _GROUPS_LOCK:
+        group = _GROUPS.get(name)
+        if group is None:
+            group = _GROUPS[name] = SingleFlight(name)
+        return group
+
+
+def singleflight_stats() -> dict[str, dict[str, int]]:
+    with _GROUPS_LOCK:
+        groups = list(_GROUPS.values())
+    return {g.name: g.stats() for g in groups}
@@ -0,0 +1,76 @@
+"""
+Argos Core - Afinidad thread → slot de llama-server.
+
+llama-server corre `-np N` slots, cada uno con su propio KV cache. Sin pista de slot,
+turnos consecutivos del mismo thread_id pueden caer en slots distintos y reprocesar
+toda la conversación. `SlotAffinity` fija cada thread activo a un slot y el nodo
+agent lo manda en cada request (`id_slot` + `cache_prompt`).
+
+Reasignación LRU: con todos los slots ocupados, el thread nuevo se queda con el slot
+del thread usado hace más tiempo que NO tenga un turno en curso (`pin`). Como el
+control de admisión deja correr a lo sumo N turnos a la vez, siempre hay uno libre.
+
+Todo corre en el event loop (sin locks).
+"""
+from __future__ import annotations
+
+import os
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Iterator
+
+_ENABLED = os.getenv("ARGOS_SLOT_AFFINITY", "1") == "1"
+
+
+class SlotAffinity:
+    """Mapa LRU thread_id → slot para `slots` slots."""
+
+    def __init__(self, slots: int) -> None:
+        self.slots = max(1, slots)
+        self._by_thread: OrderedDict[str, int] = OrderedDict()
+        self._active: dict[str, int] = {}
+        self.hits = 0
+        self.reassigned = 0
+
+    @property
+    def enabled(self) -> bool:
+        return _ENABLED
+
+    def slot_for(self, thread_id: str) -> int:
+        slot = self._by_thread.get(thread_id)
+        if slot is not None:
+            self._by_thread.move_to_end(thread_id)
+            self.hits += 1
+            return slot
+
+        used = set(self._by_thread.values())
+        free = next((s for s in range(self.slots) if s not in used), None)
+        if free is None:
+            # LRU sin turno en curso; si todos están activos (no debería), el LRU a secas.
+            victim = next((t for t in self._by_thread if t not in self._active), next(iter(self._by_thread)))
+            free = self._by_thread.pop(victim)
+            self.reassigned += 1
+        self._by_thread[thread_id] = free
+        return free
+
+    @contextmanager
+    def pin(self, thread_id: str) -> Iterator[None]:
+        """Marca el thread con turno en curso: su slot no se reasigna mientras tanto."""
+        self._active[thread_id] = self._active.get(thread_id, 0) + 1
+        try:
+            yield
+        finally:
+            if self._active[thread_id] <= 1:
+                del self._active[thread_id]
+            else:
+                self._active[thread_id] -= 1
+
+    def stats(self) -> dict[str, int | bool]:
+        return {
+            "enabled": _ENABLED,
+            "slots": self.slots,
+            "threads": len(self._by_thread),
+            "active": len(self._active),
+            "hits": self.hits,
+            "reassigned": self.reassigned,
+        }
@@ -0,0 +1,80 @@
+"""
+Argos Core - Cache en proceso de los metadatos de los threads del agente.
+
+`_run_agent` solo necesita saber si el thread ya existe (para anteponer o no el
+system prompt); leerlo con `aget_state` deserializa el checkpoint completo y luego
+`ainvoke` lo vuelve a cargar. Este módulo guarda, por thread, si existe y cuántos
+mensajes tiene (LRU grande, entradas chicas). Los mensajes NO se guardan: el único
+que los necesita es `ainvoke`, que los lee del checkpointer igual, y los caminos de
+reparación (`_record_abort`, `_record_hedge_answer`) corren justo después de una
+escritura parcial, cuando cualquier copia en memoria ya no vale.
+
+Coherencia: todas las escrituras de checkpoint del proceso pasan por el grafo
+compilado de ArgosAgent. Tras cada escritura (`ainvoke`/`aupdate_state`) el agente
+llama a `record()` con el estado resultante; si la escritura falla o se cancela a
+medias llama a `invalidate()` y el próximo turno vuelve a leer del checkpointer.
+Aciertos y fallos se ven en `/health` (`thread_cache`).
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Sequence
+
+_MAX_META = int(os.getenv("THREAD_META_CACHE_SIZE", "4096"))
+
+
+@dataclass(frozen=True)
+class ThreadMeta:
+    """Metadatos mínimos de un thread. Inmutable."""
+    exists: bool
+    message_count: int
+    updated_at: float
+
+
+class ThreadStateCache:
+    """LRU de metadatos por thread_id. Thread-safe."""
+
+    def __init__(self, max_meta: int = _MAX_META) -> None:
+        self._max_meta = max(1, max_meta)
+        self._meta: OrderedDict[str, ThreadMeta] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, thread_id: str) -> ThreadMeta | None:
+        """Metadatos cacheados o None si hay que leer el checkpoint."""
+        with self._lock:
+            meta = self._meta.get(thread_id)
+            if meta is None:
+                self.misses += 1
+                return None
+            self._meta.move_to_end(thread_id)
+            self.hits += 1
+            return meta
+
+    def record(self, thread_id: str, messages: Sequence[Any]) -> ThreadMeta:
+        """Registra el estado resultante de una lectura o escritura de checkpoint."""
+        meta = ThreadMeta(exists=bool(messages), message_count=len(messages), updated_at=time.time())
+        with self._lock:
+            self._meta[thread_id] = meta
+            self._meta.move_to_end(thread_id)
+            while len(self._meta) > self._max_meta:
+                self._meta.popitem(last=False)
+        return meta
+
+    def invalidate(self, thread_id: str) -> None:
+        """Olvida el thread — el próximo turno relee el checkpoint."""
+        with self._lock:
+            self._meta.pop(thread_id, None)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "threads": len(self._meta),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
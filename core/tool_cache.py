@@ -0,0 +1,248 @@
+"""
+Argos Core - Memoización de tools idempotentes.
+
+El modelo repite llamadas idénticas dentro del mismo turno y entre turnos
+(`project_map("Asmodeus")`, `list_files(...)`, `vassago_search(...)`) pese a la
+regla "call it ONCE" del prompt. Cada módulo declara qué tools son cacheables con
+un `CachePolicy` y aplica `apply_cache_policies()` sobre sus StructuredTools:
+
+  - tools.py            → _BASE_TOOLS
+  - mcp_langchain_adapter → las manos MCP heredadas por el agente
+
+Clave: nombre de la tool + argumentos normalizados (defaults de la firma aplicados;
+espacios colapsados en los args de `collapse` y mayúsculas ignoradas en los de
+`casefold` — solo textos tipo query: en una ruta "a  b.txt" y "a b.txt" son archivos
+distintos).
+Invalidación: TTL, y/o el mtime de los archivos/DBs que la tool lee (`depends_on`).
+Resultados de texto más largos que `max_size` no se guardan: cada hit es un deepcopy.
+
+Dos llamadas con la misma clave en vuelo a la vez comparten un solo cálculo
+(single-flight) — así un prefetch especulativo (core.prefetch) y la tool call real
+del modelo no duplican trabajo.
+
+Las tools con efectos secundarios (`NEVER_CACHE`) jamás se cachean aunque alguien
+les declare una política por error.
+"""
+from __future__ import annotations
+
+import copy
+import functools
+import hashlib
+import inspect
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+from langchain_core.tools import BaseTool, StructuredTool
+
+from core.singleflight import get_flight
+from utils.logger_config import get_argos_logger
+
+logger = get_argos_logger()
+
+_MAX_ENTRIES = int(os.getenv("TOOL_CACHE_SIZE", "256"))
+_MAX_KEY_STR = 256  # strings más largos (p.ej. image_b64) entran a la clave como hash
+
+# Efectos secundarios o resultado dependiente del momento: nunca se memoizan.
+NEVER_CACHE = frozenset({
+    "write_file",
+    "run_command",
+    "amon_lights",
+    "anima_generate",
+    "frigate_cam",
+    "get_datetime",
+})
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """Declaración de cacheabilidad de una tool. Inmutable."""
+    ttl: float                                                     # segundos
+    depends_on: Callable[[dict[str, Any]], Iterable[str | Path]] | None = None
+    casefold: tuple[str, ...] = ()                                 # args sin distinción de mayúsculas
+    collapse: tuple[str, ...] = ()                                 # args con espacios colapsados
+    when: Callable[[dict[str, Any]], bool] | None = None           # solo cachear si True
+    max_size: int | None = None                                    # chars máx. de un resultado str
+
+
+@dataclass
+class _Entry:
+    value: Any
+    stored_at: float
+    fingerprint: tuple
+
+
+class ToolResultCache:
+    """LRU clave → resultado. Thread-safe (las tools sync corren en el pool de tools)."""
+
+    def __init__(self, max_entries: int = _MAX_ENTRIES) -> None:
+        self._max = max(1, max_entries)
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str, ttl: float, fingerprint: tuple) -> tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry.stored_at > ttl or entry.fingerprint != fingerprint:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, copy.deepcopy(entry.value)
+
+    def put(self, key: str, value: Any, fingerprint: tuple) -> None:
+        with self._lock:
+            self._entries[key] = _Entry(copy.deepcopy(value), time.monotonic(), fingerprint)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+_CACHE = ToolResultCache()
+
+
+def cache_stats() -> dict[str, int]:
+    return _CACHE.stats()
+
+
+# ── Claves ────────────────────────────────────────────────────────────────────
+
+def _normalize(value: Any, casefold: bool, collapse: bool) -> Any:
+    if isinstance(value, str):
+        value = " ".join(value.split()) if collapse else value
+        value = value.casefold() if casefold else value
+        if len(value) > _MAX_KEY_STR:
+            return "sha1:" + hashlib.sha1(value.encode()).hexdigest()
+        return value
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v, casefold, collapse) for v in value]
+    if isinstance(value, dict):
+        return {str(k): _normalize(v, casefold, collapse) for k, v in sorted(value.items())}
+    return value
+
+
+def bind_arguments(fn: Callable, args: tuple, kwargs: dict) -> dict[str, Any]:
+    """Argumentos por nombre con los defaults de la firma aplicados."""
+    bound = inspect.signature(fn).bind(*args, **kwargs)
+    bound.apply_defaults()
+    return dict(bound.arguments)
+
+
+def make_key(name: str, arguments: dict[str, Any], policy: CachePolicy) -> str:
+    norm = {k: _normalize(v, k in policy.casefold, k in policy.collapse) for k, v in arguments.items()}
+    return f"{name}:{json.dumps(norm, sort_keys=True, ensure_ascii=False, default=str)}"
+
+
+def _fingerprint(policy: CachePolicy, arguments: dict[str, Any]) -> tuple:
+    if policy.depends_on is None:
+        return ()
+    out = []
+    for p in policy.depends_on(arguments):
+        try:
+            out.append((str(p), os.stat(p).st_mtime_ns))
+        except (OSError, ValueError):
+            out.append((str(p), None))
+    return tuple(out)
+
+
+def _cacheable(result: Any) -> bool:
+    """Errores no se cachean: el siguiente intento debe volver a tocar el backend."""
+    if isinstance(result, dict):
+        return result.get("ok", True) is not False
+    if isinstance(result, str):
+        head = result.lstrip()[:32].lower()
+        return not head.startswith(("error", "github_error", "github_tool_error", "internet search failed"))
+    return True
+
+
+# ── Wrappers ──────────────────────────────────────────────────────────────────
+
+def memoize(name: str, fn: Callable, policy: CachePolicy, cache: ToolResultCache = _CACHE) -> Callable:
+    """Envuelve una función sync o async con la política dada (firma preservada)."""
+
+    def lookup(args: tuple, kwargs: dict) -> tuple[str | None, tuple, bool, Any]:
+        arguments = bind_arguments(fn, args, kwargs)
+        if policy.when is not None and not policy.when(arguments):
+            return None, (), False, None
+        key = make_key(name, arguments, policy)
+        fp = _fingerprint(policy, arguments)
+        hit, value = cache.get(key, policy.ttl, fp)
+        return key, fp, hit, value
+
+    def store(key: str | None, fp: tuple, result: Any) -> None:
+        too_big = policy.max_size is not None and isinstance(result, str) and len(result) > policy.max_size
+        if key is not None and _cacheable(result) and not too_big:
+            cache.put(key, result, fp)
+
+    # Misma clave en vuelo (p.ej. un prefetch de core.prefetch todavía corriendo) →
+    # esperar ese cálculo en vez de repetirlo. El resultado es compartido → copia.
+    flight = get_flight("tool_cache")
+
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+            key, fp, hit, value = lookup(args, kwargs)
+            if hit:
+                return value
+            if key is None:
+                return await fn(*args, **kwargs)
+
+            async def compute() -> Any:
+                result = await fn(*args, **kwargs)
+                store(key, fp, result)
+                return result
+            return copy.deepcopy(await flight.do(key, compute))
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        key, fp, hit, value = lookup(args, kwargs)
+        if hit:
+            return value
+        if key is None:
+            return fn(*args, **kwargs)
+
+        def compute() -> Any:
+            result = fn(*args, **kwargs)
+            store(key, fp, result)
+            return result
+        return copy.deepcopy(flight.do_sync(key, compute))
+    return wrapper
+
+
+def apply_cache_policies(tools: list[BaseTool], policies: dict[str, CachePolicy]) -> list[BaseTool]:
+    """Devuelve la lista con las tools declaradas envueltas. El resto, intactas."""
+    out: list[BaseTool] = []
+    for t in tools:
+        policy = policies.get(t.name)
+        if policy is None:
+            out.append(t)
+            continue
+        if t.name in NEVER_CACHE or not isinstance(t, StructuredTool):
+            logger.error("Política de cache ignorada para %r (efectos secundarios o tipo no soportado)", t.name)
+            out.append(t)
+            continue
+        update: dict[str, Any] = {}
+        if t.func is not None:
+            update["func"] = memoize(t.name, t.func, policy)
+        if t.coroutine is not None:
+            update["coroutine"] = memoize(t.name, t.coroutine, policy)
+        out.append(t.model_copy(update=update))
+    return out
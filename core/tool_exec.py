@@ -0,0 +1,312 @@
+"""
+Argos Core - Ejecución de tools del path AGENT.
+
+Reemplaza `ToolNode(ARGOS_TOOLS)` en el grafo. Diferencias:
+
+  - Las tool calls paralelas de un mismo mensaje del modelo corren concurrentes.
+  - Cada tool tiene una política (`TOOL_POLICIES`): timeout por llamada y máximo de
+    llamadas simultáneas en todo el proceso (p.ej. anima_generate/decarabia de a una:
+    comparten GPU con el agente).
+  - Las tools sync corren en un pool propio (`_TOOL_POOL`), no en el default pool de
+    asyncio — una tool lenta no mata de hambre a knowledge/warmups/otros requests.
+  - El output pasa por el presupuesto de tamaño de core.tool_output (JSON
+    compacto, cabeza+cola y handle paginable si no cabe).
+  - El timeout efectivo es min(política, lo que queda del plazo del request)
+    (core.request_context); vencido el plazo el error es "deadline".
+  - Solo corren las tools bindeadas en el turno (`allowed`, subconjunto de
+    core.tool_select): una call a otra tool devuelve error "tool_not_bound".
+  - Timeout o excepción → ToolMessage con status="error" y contenido JSON
+    {"ok": false, "error_type": ..., "error": ...} para que el modelo reaccione en
+    vez de colgar el turno.
+
+Despacho anticipado: con el backend openai el nodo agent hace streaming y, apenas
+los argumentos de una tool call quedan completos, la arranca con `dispatch_early()`
+mientras el modelo sigue generando. Al llegar al nodo tools, cada call ya despachada
+(mismo id, nombre y args que el mensaje final) se espera en vez de re-ejecutarse.
+Solo se adelantan las calls de solo lectura de `EARLY_DISPATCH` (lista explícita,
+con predicado sobre los args cuando la tool mezcla acciones: github_manager solo
+para list_repos/read_file). Si el stream falla y la llamada se repite (sin stream u
+otro backend), o un despacho descartado sigue en su hilo, nada irreversible corrió.
+El turno corre dentro de `turn()`: al salir (fin, error o cancelación entre el
+stream y el nodo tools) se cancelan los despachos del turno que nadie consumió.
+
+Un hilo sync no se puede matar: al vencer el timeout se responde al modelo y el hilo
+termina por su cuenta. El cupo (semáforo) de la tool se libera cuando el hilo acaba
+de verdad, así un huérfano no permite superar el límite de concurrencia.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator, Mapping, Sequence
+
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import BaseTool
+from langgraph.errors import GraphBubbleUp
+from langgraph.prebuilt.tool_node import msg_content_output
+from pydantic import ValidationError
+
+from core.metrics import counter, histogram
+from core.request_context import budget
+from core.tool_output import compact_output
+from core.tracing import span
+from utils.logger_config import get_argos_logger
+
+logger = get_argos_logger()
+
+_TOOL_SECONDS = histogram("argos_tool_seconds", "Latencia de cada tool call (incluye espera por cupo)", ("tool",))
+_TOOL_ERRORS = counter("argos_tool_errors_total", "Tool calls fallidas por tipo de error", ("tool", "error_type"))
+
+
+@dataclass(frozen=True)
+class ToolPolicy:
+    """Límites de ejecución de una tool. Inmutable."""
+    timeout: float          # segundos por llamada (incluye espera por cupo)
+    max_concurrency: int    # llamadas simultáneas en todo el proceso
+
+
+_DEFAULT_POLICY = ToolPolicy(timeout=60.0, max_concurrency=4)
+
+# Registro por nombre de tool. Timeouts = timeout interno de la tool + margen.
+TOOL_POLICIES: dict[str, ToolPolicy] = {
+    "list_files": ToolPolicy(timeout=10.0, max_concurrency=8),
+    "read_file": ToolPolicy(timeout=15.0, max_concurrency=8),
+    "write_file": ToolPolicy(timeout=15.0, max_concurrency=2),
+    "web_search": ToolPolicy(timeout=20.0, max_concurrency=2),
+    "github_manager": ToolPolicy(timeout=30.0, max_concurrency=2),
+    "run_command": ToolPolicy(timeout=40.0, max_concurrency=2),      # _CMD_TIMEOUT=30
+    "query_projects": ToolPolicy(timeout=120.0, max_concurrency=2),  # puede reconstruir el índice
+    "get_datetime": ToolPolicy(timeout=5.0, max_concurrency=8),
+    "amon_lights": ToolPolicy(timeout=20.0, max_concurrency=1),      # comandos a bombillos en orden
+    "vassago_search": ToolPolicy(timeout=20.0, max_concurrency=4),
+    "project_map": ToolPolicy(timeout=10.0, max_concurrency=4),
+    "decarabia_analyze": ToolPolicy(timeout=150.0, max_concurrency=1),  # _TIMEOUT=120
+    "anima_generate": ToolPolicy(timeout=310.0, max_concurrency=1),     # wake 120 + poll 180
+    "frigate_cam": ToolPolicy(timeout=45.0, max_concurrency=2),
+    "tool_output": ToolPolicy(timeout=5.0, max_concurrency=8),
+}
+
+# Tools que el stream puede arrancar antes de tiempo: solo lectura, repetibles sin
+# efecto. Valor = predicado sobre los args (None = toda call). Lista explícita: una
+# tool nueva no se adelanta hasta que alguien la agregue acá.
+EARLY_DISPATCH: dict[str, Callable[[dict[str, Any]], bool] | None] = {
+    "list_files": None,
+    "read_file": None,
+    "web_search": None,
+    "query_projects": None,
+    "tool_output": None,
+    "project_map": None,
+    "vassago_search": None,
+    "github_manager": lambda a: a.get("action") in ("list_repos", "read_file"),
+}
+
+_TOOL_POOL = ThreadPoolExecutor(
+    max_workers=int(os.getenv("ARGOS_TOOL_WORKERS", "16")),
+    thread_name_prefix="argos-tool",
+)
+
+
+# ids despachados anticipadamente en el turno en curso (ver ParallelToolNode.turn).
+_TURN_EARLY: ContextVar[list[str] | None] = ContextVar("argos_turn_early", default=None)
+
+
+def policy_for(name: str) -> ToolPolicy:
+    return TOOL_POLICIES.get(name, _DEFAULT_POLICY)
+
+
+def _error_message(call: dict, error_type: str, error: str, **extra: Any) -> ToolMessage:
+    payload = {"ok": False, "error_type": error_type, "error": error, "tool": call["name"], **extra}
+    return ToolMessage(
+        content=json.dumps(payload, ensure_ascii=False),
+        name=call["name"],
+        tool_call_id=call["id"],
+        status="error",
+    )
+
+
+def _reports_failure(content: Any) -> bool:
+    """True si la tool devolvió `{"ok": false, ...}` (las tools no lanzan: así reportan errores)."""
+    return isinstance(content, str) and content.startswith(('{"ok":false', '{"ok": false'))
+
+
+def _release_when_done(sem: asyncio.Semaphore, fut: asyncio.Future) -> None:
+    sem.release()
+    if not fut.cancelled():
+        fut.exception()  # marcar como leída si nadie la espera ya (timeout)
+
+
+class ParallelToolNode:
+    """Nodo LangGraph que ejecuta las tool calls del último AIMessage en paralelo."""
+
+    def __init__(
+        self,
+        tools: Sequence[BaseTool],
+        allowed: Callable[[], frozenset[str] | None] | None = None,
+        early_dispatch: Mapping[str, Callable[[dict[str, Any]], bool] | None] = EARLY_DISPATCH,
+    ) -> None:
+        self.tools_by_name: dict[str, BaseTool] = {t.name: t for t in tools}
+        self._early_dispatch = early_dispatch
+        # Tools bindeadas en el turno actual (None = todas). Se consulta en cada call.
+        self._allowed = allowed
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+        # tool_call_id → (call, task) despachadas desde el stream del modelo.
+        self._early: dict[str, tuple[dict, asyncio.Task]] = {}
+
+    def _semaphore(self, name: str) -> asyncio.Semaphore:
+        sem = self._semaphores.get(name)
+        if sem is None:
+            sem = self._semaphores[name] = asyncio.Semaphore(max(1, policy_for(name).max_concurrency))
+        return sem
+
+    async def __call__(self, state: dict, config: RunnableConfig) -> dict:
+        message = state["messages"][-1]
+        calls = message.tool_calls if isinstance(message, AIMessage) else []
+        results = await asyncio.gather(*(self._result_for(call, config) for call in calls))
+        return {"messages": list(results)}
+
+    def _bound_names(self) -> frozenset[str] | None:
+        return self._allowed() if self._allowed is not None else None
+
+    def can_dispatch_early(self, name: str, args: dict[str, Any] | None = None) -> bool:
+        """True si la call es de solo lectura (`EARLY_DISPATCH`) y la tool está bindeada en el turno."""
+        if name not in self.tools_by_name or name not in self._early_dispatch:
+            return False
+        read_only = self._early_dispatch[name]
+        if read_only is not None and not read_only(args or {}):
+            return False
+        bound = self._bound_names()
+        return bound is None or name in bound
+
+    def dispatch_early(self, call: dict, config: RunnableConfig) -> bool:
+        """Arranca una tool call ya completa antes de que termine el mensaje. True si se despachó."""
+        if not call.get("id") or call["id"] in self._early or not self.can_dispatch_early(call["name"], call.get("args")):
+            return False
+        self._early[call["id"]] = (call, asyncio.ensure_future(self._run_one(call, config)))
+        turn_ids = _TURN_EARLY.get()
+        if turn_ids is not None:
+            turn_ids.append(call["id"])
+        return True
+
+    @contextmanager
+    def turn(self) -> Iterator[None]:
+        """Ámbito de un turno AGENT: al salir cancela sus despachos anticipados sin consumir."""
+        turn_ids: list[str] = []
+        token = _TURN_EARLY.set(turn_ids)
+        try:
+            yield
+        finally:
+            _TURN_EARLY.reset(token)
+            self.discard_early(turn_ids)
+
+    async def prefetch(self, name: str, args: dict[str, Any]) -> Any:
+        """Corre una tool fuera del turno (core.prefetch): mismo cupo y timeout, sin ToolMessage ni métricas."""
+        call = {"name": name, "args": args, "id": f"prefetch-{name}"}
+        return await asyncio.wait_for(
+            self._execute(self.tools_by_name[name], call, {}), timeout=budget(policy_for(name).timeout)
+        )
+
+    def discard_early(self, call_ids: Sequence[str]) -> None:
+        """Cancela despachos anticipados que ya no llegarán al nodo tools (error/cancelación)."""
+        for call_id in call_ids:
+            entry = self._early.pop(call_id, None)
+            if entry is not None:
+                entry[1].cancel()
+
+    async def _result_for(self, call: dict, config: RunnableConfig) -> ToolMessage:
+        entry = self._early.pop(call.get("id") or "", None)
+        if entry is not None:
+            early_call, task = entry
+            if early_call["name"] == call["name"] and early_call.get("args") == call.get("args"):
+                return await task
+            task.cancel()  # no debería pasar: el mensaje final manda
+        return await self._run_one(call, config)
+
+    async def _run_one(self, call: dict, config: RunnableConfig) -> ToolMessage:
+        t0 = time.perf_counter()
+        name = call["name"] if call["name"] in self.tools_by_name else "unknown"
+        with span(f"tool:{name}", call_id=call.get("id")) as tool_span:
+            message = await self._invoke(call, config)
+            error_type = None
+            if message.status == "error":
+                try:
+                    error_type = json.loads(message.content).get("error_type", "exception")
+                except (TypeError, ValueError, AttributeError):
+                    error_type = "exception"
+            elif _reports_failure(message.content):
+                error_type = "reported"
+            tool_span.set(error_type=error_type)
+        _TOOL_SECONDS.observe(time.perf_counter() - t0, tool=name)
+        if error_type is not None:
+            _TOOL_ERRORS.inc(tool=name, error_type=error_type)
+        return message
+
+    async def _invoke(self, call: dict, config: RunnableConfig) -> ToolMessage:
+        tool = self.tools_by_name.get(call["name"])
+        if tool is None:
+            return _error_message(
+                call, "invalid_tool", f"{call['name']} no existe",
+                available_tools=list(self.tools_by_name),
+            )
+        bound = self._bound_names()
+        if bound is not None and tool.name not in bound:
+            return _error_message(
+                call, "tool_not_bound", f"{tool.name} no está disponible en este turno",
+                available_tools=[n for n in self.tools_by_name if n in bound],
+            )
+
+        policy = policy_for(tool.name)
+        limit = budget(policy.timeout)
+        try:
+            response = await asyncio.wait_for(self._execute(tool, call, config), timeout=limit)
+        except asyncio.TimeoutError:
+            error_type = "deadline" if limit < policy.timeout else "timeout"
+            logger.warning("Tool %s excedió su %s (%.0fs)", tool.name, error_type, limit)
+            return _error_message(
+                call, error_type, f"{tool.name} no respondió en {limit:.0f}s",
+                timeout_s=round(limit, 1),
+            )
+        except GraphBubbleUp:
+            raise
+        except ValidationError as e:
+            return _error_message(call, "invalid_arguments", str(e), args=call.get("args", {}))
+        except Exception as e:
+            logger.error("Tool %s falló: %s: %s", tool.name, type(e).__name__, e)
+            return _error_message(call, "exception", f"{type(e).__name__}: {e}")
+
+        # Los handles de outputs recortados solo se leen desde el mismo thread.
+        scope = (config or {}).get("configurable", {}).get("thread_id")
+        if isinstance(response, ToolMessage):
+            response.content = compact_output(tool.name, msg_content_output(response.content), scope)
+            return response
+        return ToolMessage(
+            content=compact_output(tool.name, msg_content_output(response), scope),
+            name=tool.name,
+            tool_call_id=call["id"],
+        )
+
+    async def _execute(self, tool: BaseTool, call: dict, config: RunnableConfig) -> Any:
+        tool_call = {**call, "type": "tool_call"}
+        sem = self._semaphore(tool.name)
+        await sem.acquire()
+
+        if getattr(tool, "coroutine", None) is not None:
+            try:
+                return await tool.ainvoke(tool_call, config)
+            finally:
+                sem.release()
+
+        # Sync: pool dedicado, con el contexto actual (contextvars) propagado al hilo.
+        loop = asyncio.get_running_loop()
+        ctx = contextvars.copy_context()
+        fut = loop.run_in_executor(_TOOL_POOL, ctx.run, tool.invoke, tool_call, config)
+        fut.add_done_callback(lambda f: _release_when_done(sem, f))
+        # shield: si vence el timeout, el hilo sigue y libera el cupo al terminar.
+        return await asyncio.shield(fut)
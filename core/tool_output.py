@@ -0,0 +1,164 @@
+"""
+Argos Core - Presupuesto de tamaño del output de tools.
+
+Antes cada tool ponía (o no) su propio límite: run_command cortaba a 8000 chars,
+read_file devolvía el archivo entero, github_manager read_file hasta 512 KB y las
+manos MCP devolvían dicts arbitrarios. Un output gigante revienta `num_ctx` y domina
+el prefill de todas las llamadas siguientes del turno.
+
+`ParallelToolNode` pasa todo output por `compact_output()` antes de crear el
+ToolMessage:
+
+  1. JSON → re-serializado compacto (sin espacios ni escapes ASCII).
+  2. Si cabe en el presupuesto de la tool (`OUTPUT_BUDGETS`, en tokens) → tal cual.
+  3. Si no → cabeza + cola dentro del presupuesto y el texto completo guardado bajo
+     un handle (`out-` + 64 bits aleatorios). La tool `tool_output(handle, offset,
+     limit, grep)` permite al modelo paginar o buscar en el resto.
+
+Los handles viven en memoria (LRU, `ARGOS_TOOL_OUTPUT_HANDLES`); un reinicio los
+pierde y `tool_output` lo dice en vez de fallar. Cada handle queda ligado al
+thread que lo generó (`scope`): desde otra conversación responde igual que un
+handle desconocido, así no se puede leer el output ajeno adivinando o reusando uno.
+"""
+from __future__ import annotations
+
+import json
+import os
+import re
+import secrets
+import threading
+from collections import OrderedDict
+
+_CHARS_PER_TOKEN = 3.5
+_DEFAULT_BUDGET = int(os.getenv("ARGOS_TOOL_OUTPUT_TOKENS", "2000"))
+_MAX_HANDLES = int(os.getenv("ARGOS_TOOL_OUTPUT_HANDLES", "64"))
+_MAX_GREP_MATCHES = 100
+
+# Presupuesto en tokens por tool. Lo no listado usa _DEFAULT_BUDGET.
+OUTPUT_BUDGETS: dict[str, int] = {
+    "read_file": 3000,
+    "github_manager": 3000,
+    "run_command": 2000,
+    "query_projects": 2500,
+    "project_map": 2000,
+    "list_files": 1500,
+    "web_search": 1500,
+    "vassago_search": 1500,
+    "decarabia_analyze": 1500,
+    "frigate_cam": 500,
+    "amon_lights": 500,
+    "anima_generate": 300,
+    "get_datetime": 200,
+    "tool_output": 3000,
+}
+
+
+def budget_chars(name: str) -> int:
+    return int(OUTPUT_BUDGETS.get(name, _DEFAULT_BUDGET) * _CHARS_PER_TOKEN)
+
+
+class OutputStore:
+    """LRU handle → (scope, tool, texto completo). Thread-safe: las tools sync corren en el pool.
+
+    `scope` = thread_id del turno que guardó el output (None fuera de un thread).
+    """
+
+    def __init__(self, max_entries: int = _MAX_HANDLES) -> None:
+        self._max = max(1, max_entries)
+        self._entries: OrderedDict[str, tuple[str | None, str, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, tool: str, text: str, scope: str | None = None) -> str:
+        handle = f"out-{secrets.token_hex(8)}"
+        with self._lock:
+            self._entries[handle] = (scope, tool, text)
+            while len(self._entries) > self._max:
+                self._entries.popitem(last=False)
+        return handle
+
+    def get(self, handle: str, scope: str | None = None) -> tuple[str, str] | None:
+        """(tool, texto) si el handle existe y es del mismo `scope`; si no, None."""
+        with self._lock:
+            entry = self._entries.get(handle)
+            if entry is None or entry[0] != scope:
+                return None
+            self._entries.move_to_end(handle)
+            return entry[1], entry[2]
+
+
+_STORE = OutputStore()
+
+
+def _compact_json(content: str) -> str:
+    stripped = content.lstrip()
+    if not stripped.startswith(("{", "[")):
+        return content
+    try:
+        return json.dumps(json.loads(content), ensure_ascii=False, separators=(",", ":"), default=str)
+    except ValueError:
+        return content
+
+
+def _cut(text: str, limit: int, from_end: bool = False) -> str:
+    """Recorta a `limit` chars por borde de línea si hay uno razonablemente cerca."""
+    if len(text) <= limit:
+        return text
+    if from_end:
+        piece = text[-limit:]
+        nl = piece.find("\n")
+        return piece[nl + 1:] if 0 <= nl < limit // 4 else piece
+    piece = text[:limit]
+    nl = piece.rfind("\n")
+    return piece[:nl] if nl > limit * 3 // 4 else piece
+
+
+def compact_output(name: str, content: str, scope: str | None = None) -> str:
+    """Output listo para el ToolMessage: compacto y dentro del presupuesto de la tool.
+
+    El resto queda bajo un handle legible solo desde el mismo `scope` (thread_id).
+    """
+    content = _compact_json(content)
+    limit = budget_chars(name)
+    if len(content) <= limit or name == "tool_output":
+        return content
+
+    handle = _STORE.put(name, content, scope)
+    head = _cut(content, limit * 2 // 3)
+    tail = _cut(content, limit // 3, from_end=True)
+    omitted = len(content) - len(head) - len(tail)
+    return (
+        f"{head}\n"
+        f"[... {omitted} de {len(content)} chars omitidos. Output completo en handle={handle}: "
+        f'tool_output("{handle}", offset, limit) para paginar o tool_output("{handle}", grep="patrón") para buscar]\n'
+        f"{tail}"
+    )
+
+
+def read_output(
+    handle: str, offset: int = 0, limit: int | None = None, grep: str | None = None, scope: str | None = None
+) -> str:
+    """Página (por chars) o líneas que calzan `grep` de un output guardado por `scope`. Nunca lanza."""
+    entry = _STORE.get(handle.strip(), scope)
+    if entry is None:
+        return f"Error: handle '{handle}' desconocido o expirado. Vuelve a ejecutar la tool original."
+    tool, text = entry
+    max_chars = budget_chars("tool_output")
+
+    if grep:
+        try:
+            pattern = re.compile(grep, re.IGNORECASE)
+        except re.error:
+            pattern = re.compile(re.escape(grep), re.IGNORECASE)
+        lines = [f"{i}: {line}" for i, line in enumerate(text.splitlines(), 1) if pattern.search(line)]
+        if not lines:
+            return f"[{handle} ({tool})] sin coincidencias para {grep!r}"
+        shown = _cut("\n".join(lines[:_MAX_GREP_MATCHES]), max_chars)
+        more = f" (mostrando {_MAX_GREP_MATCHES})" if len(lines) > _MAX_GREP_MATCHES else ""
+        return f"[{handle} ({tool})] {len(lines)} líneas coinciden con {grep!r}{more}:\n{shown}"
+
+    offset = max(0, min(offset, len(text)))
+    size = max(1, min(limit or max_chars, max_chars))
+    page = text[offset:offset + size]
+    end = offset + len(page)
+    nxt = f"; siguiente página: offset={end}" if end < len(text) else "; fin"
+    return f"[{handle} ({tool}) chars {offset}-{end} de {len(text)}{nxt}]\n{page}"
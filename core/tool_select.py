@@ -0,0 +1,130 @@
+"""
+Argos Core - Selección de tools por query (poda de esquemas).
+
+`bind_tools(ARGOS_TOOLS)` manda todos los esquemas JSON en cada llamada al modelo
+agente: miles de tokens de prompt processing irrelevantes para "apaga las luces"
+o una búsqueda de planos. `select_tool_names()` clasifica la pregunta por las
+categorías de `_CATEGORIES` y devuelve el subconjunto de tools que hace falta;
+`ArgosAgent` bindea el modelo (y arma el system prompt) con ese subconjunto.
+
+`_CATEGORIES` es la única tabla de keywords: el router CHAT/AGENT usa su unión
+(`AGENT_KEYWORDS`), así una keyword nueva enruta y selecciona tools a la vez.
+
+Reglas:
+  - `_ALWAYS` va en todo subconjunto (consulta del ecosistema, hora y paginación de
+    outputs recortados).
+  - Ninguna categoría reconocida → None → todas las tools (como antes).
+  - El subconjunto sale siempre en el orden canónico de ARGOS_TOOLS: mismo conjunto
+    ⇒ mismo prefijo de esquemas ⇒ el prefix cache de llama-server sigue sirviendo.
+  - Trade-off con core.prefix_warmer: solo se precalienta el prefijo con todas las
+    tools. Un subconjunto comparte rol + manifiesto (lo más largo) y reprocesa desde
+    <available_tools>; precalentar cada subconjunto ocuparía un slot por variante.
+
+`ARGOS_TOOL_SELECT=0` lo desactiva.
+"""
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+
+_ENABLED = os.getenv("ARGOS_TOOL_SELECT", "1") == "1"
+_USER_QUESTION_MARKER = "[pregunta del usuario]"
+
+_ALWAYS = frozenset({"query_projects", "get_datetime", "tool_output"})
+
+
+@dataclass(frozen=True)
+class ToolCategory:
+    """Keywords que activan la categoría y las tools que aporta. Inmutable."""
+    keywords: tuple[str, ...]
+    tools: tuple[str, ...]
+
+
+_CATEGORIES: dict[str, ToolCategory] = {
+    "files": ToolCategory(
+        ("archivo", "file", "directorio", "folder", "carpeta", "lee ", "leer", "read",
+         "write", "escribe", "guardar", "save", "lista los", "list ", "listame"),
+        ("list_files", "read_file", "write_file"),
+    ),
+    "code": ToolCategory(
+        ("código", "codigo", "script", "programa", "función", "funcion", "class ", "clase ",
+         "import ", "instala", "dependencia", "docker", "contenedor", "container",
+         "error en", "bug en", "debug", "refactor", "implementa", "crea el archivo", "crea un script"),
+        ("list_files", "read_file", "write_file", "run_command"),
+    ),
+    "shell": ToolCategory(
+        ("ejecuta", "corre el comando", "run ", "terminal", "bash", "shell", "git log",
+         "git status", "git diff", "grep ", "find ", "pytest", "python ", "pip ", "uv ",
+         "correr", "ejecutar", "comando",
+         "cuanto es ", "calcula ", "cuánto es ", "resultado de ", "multiplica", "divide", "suma ", "resta "),
+        ("run_command",),
+    ),
+    "github": ToolCategory(
+        ("github", "repo", "repositorio", "issue", "pull request", "commit"),
+        ("github_manager",),
+    ),
+    "web": ToolCategory(
+        ("busca en internet", "busca en la web", "web search", "busca online",
+         "investiga en internet", "googlea"),
+        ("web_search",),
+    ),
+    "ecosystem": ToolCategory(
+        ("mi proyecto", "mis proyectos", "ecosistema", "quién es", "quien es", "quién hace",
+         "quien hace", "qué hace", "que hace", "qué puede", "que puede", "encargado",
+         "responsable", "subagente", "estado actual", "actualmente", "pendiente", "fase",
+         "bug", "falla", "error actual", "orobas", "asmodeus_app", "asmodeus app", "app móvil", "app movil",
+         "pixel 9", "la app", "el app", "baael", "furfur", "malphas", "r-66", "papier",
+         "telegram-sum", "telegram summ", "cómo funciona", "como funciona", "háblame de",
+         "hablame de", "cuéntame sobre", "cuentame sobre", "project map", "handoff", "sessions"),
+        ("project_map",),
+    ),
+    "industrial": ToolCategory(
+        ("vassago", "industrial index", "plano", "planos"),
+        ("vassago_search",),
+    ),
+    "home": ToolCategory(
+        ("luz", "luces", "enciende", "apaga", "prende", "brillo", "escena", "amon"),
+        ("amon_lights",),
+    ),
+    "cameras": ToolCategory(
+        ("cámara", "camara", "foto", "snapshot", "captura", "vigilanc", "frigate"),
+        ("frigate_cam",),
+    ),
+    "vision": ToolCategory(
+        ("analiza la imagen", "analiza esta imagen", "describe la imagen", ".png", ".jpg"),
+        ("decarabia_analyze",),
+    ),
+    "image_gen": ToolCategory(
+        ("genera una imagen", "genera imagen", "dibuja", "crea una imagen"),
+        ("anima_generate",),
+    ),
+    "datetime": ToolCategory(
+        ("qué hora", "que hora", "fecha de hoy"),
+        ("get_datetime",),
+    ),
+}
+
+# Keywords del router CHAT/AGENT (core.agent): cualquiera de ellas pide tools.
+AGENT_KEYWORDS: tuple[str, ...] = tuple(
+    dict.fromkeys(kw for category in _CATEGORIES.values() for kw in category.keywords)
+)
+
+
+def user_question(text: str) -> str:
+    """La pregunta en minúsculas, sin el contexto que el web UI inyecta antes del marcador."""
+    t = text.lower()
+    if _USER_QUESTION_MARKER in t:
+        t = t.split(_USER_QUESTION_MARKER, 1)[1]
+    return t
+
+
+def select_tool_names(text: str) -> frozenset[str] | None:
+    """Nombres de tools para esta pregunta, o None si hay que ofrecer todas."""
+    if not _ENABLED:
+        return None
+    t = user_question(text)
+    names: set[str] = set()
+    for category in _CATEGORIES.values():
+        if any(kw in t for kw in category.keywords):
+            names.update(category.tools)
+    return frozenset(names | _ALWAYS) if names else None
@@ -4,16 +4,26 @@ Phase 8: GitHub Integration (Audited, Secure & Type-Safe)
 """
 import os
 import re
+import signal
 import subprocess
 import functools
-from typing import Optional, Literal
+import time
+from typing import TYPE_CHECKING, Optional, Literal
+from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
-from ddgs import DDGS
-from github import Github, Auth
-from github.GithubException import GithubException
+
+# ddgs y PyGithub se importan en el primer uso: son lentos de cargar y el arranque de
+# la API (y cada redeploy, que corta las sesiones MCP) no los necesita.
+if TYPE_CHECKING:
+    from github import Github
+    from github.GithubException import GithubException
+
+from core.request_context import budget, current_token
+from core.tool_cache import CachePolicy, apply_cache_policies
 
 # --- CONFIGURACIÓN DE LÍMITES (Seguridad) ---
 MAX_FILE_BYTES = 512 * 1024  # 512 KB
+MAX_CACHED_FILE_CHARS = 64 * 1024  # read_file más grande no se memoiza (deepcopy por hit)
 MAX_ISSUE_TITLE_CHARS = 256
 MAX_ISSUE_BODY_CHARS = 8000
 
@@ -29,10 +39,16 @@ def list_files(directory: str) -> str:
 
 @tool
 def read_file(file_path: str) -> str:
-    """Reads a local file."""
+    """Reads a local file (first 512 KB)."""
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return f.read()
+        with open(file_path, 'rb') as f:
+            data = f.read(MAX_FILE_BYTES + 1)
+        if len(data) <= MAX_FILE_BYTES:
+            return data.decode('utf-8')
+        # Corte en bytes: un carácter multibyte partido al final se descarta.
+        text = data[:MAX_FILE_BYTES].decode('utf-8', errors='ignore')
+        size = os.path.getsize(file_path)
+        return f"{text}\n[... archivo truncado: se leyeron {MAX_FILE_BYTES} de {size} bytes]"
     except Exception as e:
         return f"Error reading file: {e}"
 
@@ -53,6 +69,8 @@ def web_search(query: str) -> str:
     """Searches the internet using DuckDuckGo."""
     print(f"\n[DEBUG] Searching web for: {query}...")
     try:
+        from ddgs import DDGS
+
         raw_results = list(DDGS().text(query, max_results=3))
         if not raw_results:
             return "No results found."
@@ -67,14 +85,16 @@ def web_search(query: str) -> str:
 
 # --- GITHUB TOOLS ---
 @functools.lru_cache(maxsize=1)
-def _get_github_client() -> Github:
+def _get_github_client() -> "Github":
     """Crea la conexión con GitHub una sola vez (Cache)."""
     token = os.getenv("GITHUB_TOKEN", "").strip()
     if not token:
         raise RuntimeError("GITHUB_TOKEN no está configurado.")
+    from github import Auth, Github
+
     return Github(auth=Auth.Token(token))
 
-def _safe_github_error(e: GithubException) -> str:
+def _safe_github_error(e: "GithubException") -> str:
     """Traduce errores de GitHub a mensajes seguros para el LLM."""
     status = getattr(e, "status", None)
     if status in (401, 403):
@@ -103,6 +123,7 @@ def github_manager(
         g = _get_github_client()
     except RuntimeError as e:
         return f"GITHUB_TOOL_ERROR: {e}"
+    from github.GithubException import GithubException
 
     try:
         if action == "list_repos":
@@ -170,8 +191,10 @@ _BLOCKED_PATTERNS = re.compile(
     re.IGNORECASE,
 )
 
-_MAX_OUTPUT_CHARS = 8000
+# Tope de seguridad en memoria; lo que ve el modelo lo recorta core.tool_output (paginable).
+_MAX_OUTPUT_CHARS = 200_000
 _CMD_TIMEOUT = 30  # segundos
+_CMD_POLL = 0.5    # cada cuánto se mira si el request fue cancelado
 
 
 @tool
@@ -179,7 +202,7 @@ def run_command(command: str, working_dir: str = "/") -> str:
     """
     Ejecuta un comando de shell dentro del contenedor Docker de Argos Core.
     Entorno: Linux (Debian/Ubuntu), acceso de solo lectura a /projects/*.
-    Timeout: 30 segundos. Output máximo: 8000 caracteres.
+    Timeout: 30 segundos. Output largo: se recorta y se pagina con tool_output.
     Usa esto para: git log, grep, find, python, pytest, cat, ls, wc, diff, etc.
     """
     # Validar que el working_dir existe
@@ -190,16 +213,33 @@ def run_command(command: str, working_dir: str = "/") -> str:
     if _BLOCKED_PATTERNS.search(command):
         return "Comando bloqueado por seguridad. Usa comandos de lectura/análisis."
 
+    token = current_token()
     try:
-        result = subprocess.run(
+        # Grupo de procesos propio: al cancelar o vencer el timeout muere el shell Y sus hijos.
+        proc = subprocess.Popen(
             command,
             shell=True,
-            capture_output=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
             text=True,
-            timeout=_CMD_TIMEOUT,
             cwd=working_dir,
             env={**os.environ, "TERM": "dumb"},
+            start_new_session=True,
         )
+        limit = budget(_CMD_TIMEOUT)
+        deadline = time.monotonic() + limit
+        while True:
+            try:
+                stdout, stderr = proc.communicate(timeout=_CMD_POLL)
+                break
+            except subprocess.TimeoutExpired:
+                if token.cancelled or time.monotonic() >= deadline:
+                    os.killpg(proc.pid, signal.SIGKILL)
+                    proc.communicate()
+                    if token.cancelled:
+                        return "Cancelado: el cliente se desconectó y el comando fue terminado."
+                    raise subprocess.TimeoutExpired(command, limit)
+        result = subprocess.CompletedProcess(command, proc.returncode, stdout, stderr)
         stdout = result.stdout.strip()
         stderr = result.stderr.strip()
 
@@ -217,8 +257,8 @@ def run_command(command: str, working_dir: str = "/") -> str:
 
         return f"[exit {result.returncode}]\n{output}"
 
-    except subprocess.TimeoutExpired:
-        return f"Timeout: el comando excedio {_CMD_TIMEOUT}s y fue terminado."
+    except subprocess.TimeoutExpired as e:
+        return f"Timeout: el comando excedio {e.timeout:.0f}s y fue terminado."
     except Exception as e:
         return f"Error ejecutando comando: {type(e).__name__}: {e}"
 
@@ -239,11 +279,64 @@ def query_projects(question: str) -> str:
     return query(question)
 
 
+# --- OUTPUT TOOL (paginar outputs recortados) ---
+
+@tool
+def tool_output(
+    handle: str, config: RunnableConfig, offset: int = 0, limit: int = 8000, grep: Optional[str] = None
+) -> str:
+    """
+    Lee el resto de un output de tool que fue recortado por tamaño. El output recortado
+    indica su handle (ej "out-3fa2c1d94b7e0a56").
+    - offset/limit: página por caracteres (la respuesta indica el offset siguiente).
+    - grep: regex (sin distinguir mayúsculas); devuelve las líneas que coinciden con su número.
+    """
+    from core.tool_output import read_output
+    # Solo los handles que generó esta misma conversación (ver core.tool_output).
+    scope = (config or {}).get("configurable", {}).get("thread_id")
+    return read_output(handle, offset=offset, limit=limit, grep=grep, scope=scope)
+
+
+# --- MEMOIZACIÓN (tools idempotentes) ---
+# write_file y run_command NO se declaran: efectos secundarios (ver core.tool_cache.NEVER_CACHE).
+
+def _knowledge_files(_args: dict) -> list[str]:
+    """El índice RAG: cambia su mtime cuando knowledge.rebuild() escribe (WAL incluido)."""
+    from core.knowledge import _DB
+    return [str(_DB), f"{_DB}-wal"]
+
+
+_BASE_CACHE_POLICIES: dict[str, CachePolicy] = {
+    "list_files": CachePolicy(ttl=30, depends_on=lambda a: [a["directory"]]),
+    "read_file": CachePolicy(ttl=300, depends_on=lambda a: [a["file_path"]], max_size=MAX_CACHED_FILE_CHARS),
+    "web_search": CachePolicy(ttl=600, casefold=("query",), collapse=("query",)),
+    "github_manager": CachePolicy(ttl=120, when=lambda a: a["action"] in ("list_repos", "read_file")),
+    "query_projects": CachePolicy(
+        ttl=300, depends_on=_knowledge_files, casefold=("question",), collapse=("question",)
+    ),
+}
+
+
 # --- LISTA MAESTRA DE HERRAMIENTAS ---
 # Tools internas históricas + las 7 "manos" MCP heredadas (Plan Jarvis, Fase A).
-# El adaptador se importa abajo para evitar circular: mcp_* importa mcp_server, no tools.
-_BASE_TOOLS = [list_files, read_file, write_file, web_search, github_manager, run_command, query_projects]
+# El adaptador se importa en argos_tools() para evitar circular (mcp_* importa
+# mcp_server, no tools) y para no envolver las manos MCP al importar este módulo.
+_BASE_TOOLS = apply_cache_policies(
+    [list_files, read_file, write_file, web_search, github_manager, run_command, query_projects, tool_output],
+    _BASE_CACHE_POLICIES,
+)
+
+
+@functools.lru_cache(maxsize=1)
+def argos_tools() -> list:
+    """Lista maestra (base + MCP), armada en el primer uso. Siempre la misma lista: no mutarla."""
+    from core.mcp_langchain_adapter import mcp_as_langchain
+
+    return _BASE_TOOLS + mcp_as_langchain()
 
-from core.mcp_langchain_adapter import MCP_AS_LANGCHAIN  # noqa: E402
 
-ARGOS_TOOLS = _BASE_TOOLS + MCP_AS_LANGCHAIN
\ No newline at end of file
+def __getattr__(name: str):
+    # `from core.tools import ARGOS_TOOLS` sigue funcionando, pero ya no arma nada al importar.
+    if name == "ARGOS_TOOLS":
+        return argos_tools()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
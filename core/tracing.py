@@ -0,0 +1,278 @@
+"""
+Argos Core - Trazas por request: árbol de spans y volcado de los lentos.
+
+"Malphas tardó 2 minutos" no se podía reconstruir: los logs dicen qué path tomó
+el turno, no qué llamada al modelo o qué tool se comió el tiempo. Ahora cada turno
+de `/chat` lleva una `Trace`:
+
+  - `trace_id` viaja en una ContextVar (la heredan tareas del grafo e hilos de
+    tools) y cada línea de log del turno lo incluye en sus campos extra;
+  - `span(nombre, **attrs)` mide un tramo — nodos del grafo (`_call_model`, nodo
+    tools), cada tool, cada llamada a un servicio downstream (core.health envuelve
+    bridge, Ollama, Frigate…) y knowledge. Sin trace activa es casi gratis;
+  - al terminar, si el turno superó `_SLOW_S`, la traza se escribe (hilo propio,
+    sin bloquear el event loop) en un ring buffer en disco de `_KEEP` archivos.
+
+`/admin/traces` lista los lentos; `/admin/traces/{id}` devuelve el árbol y
+`/admin/traces/{id}/chrome` lo exporta al formato de chrome://tracing / Perfetto.
+Los spans guardan nombres, tiempos y atributos chicos (backend, tool, estado),
+nunca el texto de los mensajes.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Iterator
+
+from utils.logger_config import add_log_context, get_argos_logger
+
+logger = get_argos_logger()
+
+_ENABLED = os.getenv("ARGOS_TRACING", "1") == "1"
+_SLOW_S = float(os.getenv("ARGOS_TRACE_SLOW_S", "30"))
+_KEEP = int(os.getenv("ARGOS_TRACE_KEEP", "100"))
+_DIR = Path(os.getenv("ARGOS_TRACE_DIR", "/data/argos/traces"))
+_MAX_SPANS = 512  # un turno desbocado no crece sin límite
+_ID_RE = re.compile(r"^[0-9a-f]{16}$")
+
+_WRITER = ThreadPoolExecutor(max_workers=1, thread_name_prefix="argos-trace")
+
+
+def _lane() -> str:
+    """Carril de ejecución del span: la tarea asyncio o el hilo (una fila en Chrome)."""
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    return f"task:{task.get_name()}" if task is not None else f"thread:{threading.current_thread().name}"
+
+
+class Span:
+    __slots__ = ("id", "parent", "name", "start", "end", "attrs", "status", "lane")
+
+    def __init__(self, span_id: int, parent: int | None, name: str, attrs: dict[str, Any]) -> None:
+        self.id = span_id
+        self.parent = parent
+        self.name = name
+        self.start = time.perf_counter()
+        self.end: float | None = None
+        self.attrs = attrs
+        self.status = "ok"
+        self.lane = _lane()
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+
+class _NullSpan:
+    """Lo que da `span()` fuera de una traza: acepta `set()` y no hace nada."""
+
+    def set(self, **attrs: Any) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Trace:
+    """Spans de un request. Thread-safe: los hilos de tools abren spans en paralelo."""
+
+    def __init__(self, name: str, **attrs: Any) -> None:
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.attrs = attrs
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.duration_s: float | None = None
+        self.status = "ok"
+        self.spans: list[Span] = []
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def open(self, name: str, parent: Span | None, attrs: dict[str, Any]) -> Span | None:
+        with self._lock:
+            if len(self.spans) >= _MAX_SPANS:
+                self.dropped += 1
+                return None
+            span = Span(len(self.spans) + 1, parent.id if parent else None, name, attrs)
+            self.spans.append(span)
+            return span
+
+    def annotate(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+    def finish(self, status: str = "ok") -> None:
+        """Cierra la traza; si fue lenta la persiste en el ring buffer (en segundo plano)."""
+        if self.duration_s is not None:
+            return
+        self.duration_s = time.perf_counter() - self.start
+        self.status = status
+        if self.duration_s >= _SLOW_S:
+            logger.warning(
+                "Request lento (%.1fs, %s): trace %s guardada", self.duration_s, status, self.trace_id
+            )
+            _WRITER.submit(_persist, self.to_dict())
+
+    def to_dict(self) -> dict[str, Any]:
+        """Árbol compacto: spans en lista plana con `parent` (None = hijo de la raíz)."""
+        now = time.perf_counter()
+        with self._lock:
+            spans = list(self.spans)
+        ms = lambda t: round(1000 * (t - self.start), 2)  # noqa: E731
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration_ms": round(1000 * (self.duration_s if self.duration_s is not None else now - self.start), 2),
+            "status": self.status,
+            "attrs": self.attrs,
+            "dropped_spans": self.dropped,
+            "spans": [
+                {
+                    "id": s.id,
+                    "parent": s.parent,
+                    "name": s.name,
+                    "start_ms": ms(s.start),
+                    "duration_ms": round(1000 * ((s.end if s.end is not None else now) - s.start), 2),
+                    "status": s.status if s.end is not None else "open",
+                    "lane": s.lane,
+                    "attrs": s.attrs,
+                }
+                for s in spans
+            ],
+        }
+
+
+_TRACE: ContextVar[Trace | None] = ContextVar("argos_trace", default=None)
+_SPAN: ContextVar[Span | None] = ContextVar("argos_span", default=None)
+
+
+def current_trace() -> Trace | None:
+    return _TRACE.get()
+
+
+def current_trace_id() -> str | None:
+    trace = _TRACE.get()
+    return trace.trace_id if trace is not None else None
+
+
+@contextmanager
+def trace_scope(trace: Trace | None) -> Iterator[Trace | None]:
+    """Instala `trace` para el trabajo (tareas e hilos) que se cree dentro del bloque."""
+    reset = _TRACE.set(trace if _ENABLED else None)
+    span_reset = _SPAN.set(None)
+    try:
+        yield trace
+    finally:
+        _SPAN.reset(span_reset)
+        _TRACE.reset(reset)
+
+
+def annotate_trace(**attrs: Any) -> None:
+    """Atributos de la traza en curso (p.ej. el path elegido por el router)."""
+    trace = _TRACE.get()
+    if trace is not None:
+        trace.annotate(**attrs)
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Span | _NullSpan]:
+    """Mide el bloque como hijo del span actual. Sirve en código sync y async."""
+    trace = _TRACE.get()
+    current = trace.open(name, _SPAN.get(), attrs) if trace is not None else None
+    if current is None:
+        yield _NULL_SPAN
+        return
+    reset = _SPAN.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.status = "cancelled" if isinstance(e, asyncio.CancelledError) else f"error:{type(e).__name__}"
+        raise
+    finally:
+        current.end = time.perf_counter()
+        _SPAN.reset(reset)
+
+
+# Cada línea de log emitida dentro de un request lleva su trace_id.
+add_log_context(lambda: {"trace_id": tid} if (tid := current_trace_id()) else None)
+
+
+# ── Ring buffer en disco ─────────────────────────────────────────────────────
+
+def _persist(data: dict[str, Any]) -> None:
+    try:
+        _DIR.mkdir(parents=True, exist_ok=True)
+        path = _DIR / f"{int(1000 * data['started_at'])}_{data['trace_id']}.json"
+        path.write_text(json.dumps(data, ensure_ascii=False, default=str), encoding="utf-8")
+        for old in sorted(_DIR.glob("*.json"))[:-_KEEP or None]:
+            old.unlink(missing_ok=True)
+    except OSError as e:
+        logger.warning("No se pudo guardar la trace %s: %s", data.get("trace_id"), e)
+
+
+def slow_traces(limit: int = 50) -> list[dict[str, Any]]:
+    """Resúmenes de las trazas lentas guardadas, la más reciente primero."""
+    out: list[dict[str, Any]] = []
+    for path in sorted(_DIR.glob("*.json"), reverse=True)[:limit]:
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        spans = data.get("spans", [])
+        slowest = max(spans, key=lambda s: s["duration_ms"], default=None)
+        out.append({
+            "trace_id": data["trace_id"],
+            "started_at": data["started_at"],
+            "duration_ms": data["duration_ms"],
+            "status": data["status"],
+            "attrs": data["attrs"],
+            "spans": len(spans),
+            "slowest_span": {"name": slowest["name"], "duration_ms": slowest["duration_ms"]} if slowest else None,
+        })
+    return out
+
+
+def load_trace(trace_id: str) -> dict[str, Any] | None:
+    if not _ID_RE.match(trace_id):
+        return None
+    for path in _DIR.glob(f"*_{trace_id}.json"):
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+    return None
+
+
+def to_chrome(data: dict[str, Any]) -> dict[str, Any]:
+    """Traza en el Trace Event Format (chrome://tracing, Perfetto): un carril por tarea/hilo."""
+    lanes: dict[str, int] = {"request": 0}
+    events: list[dict[str, Any]] = [{
+        "name": data["name"], "ph": "X", "pid": 1, "tid": 0, "ts": 0,
+        "dur": round(1000 * data["duration_ms"]), "args": {**data["attrs"], "status": data["status"]},
+    }]
+    for s in data["spans"]:
+        tid = lanes.setdefault(s["lane"], len(lanes))
+        events.append({
+            "name": s["name"], "ph": "X", "pid": 1, "tid": tid,
+            "ts": round(1000 * s["start_ms"]), "dur": round(1000 * s["duration_ms"]),
+            "args": {**s["attrs"], "status": s["status"], "span_id": s["id"], "parent": s["parent"]},
+        })
+    events.extend(
+        {"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": lane}}
+        for lane, tid in lanes.items()
+    )
+    return {"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"trace_id": data["trace_id"]}}
+
+
+def tracing_stats() -> dict[str, Any]:
+    return {"enabled": _ENABLED, "slow_threshold_s": _SLOW_S, "keep": _KEEP, "dir": str(_DIR)}
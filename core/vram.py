@@ -0,0 +1,426 @@
+"""
+Argos Core - Planificador de residencia en VRAM (una GPU de 32 GB compartida).
+
+Compiten por la misma GPU: el agente (~24.5 GB en llama-swap), gemma4:26b de
+visión, el modelo de chat y nomic-embed-text. Antes cada llamada fijaba su propio
+`keep_alive` (-1 chat/embed, nada en visión, 300 el agente ollama) y un
+`decarabia_analyze` en medio de un turno del agente terminaba con capas en CPU.
+
+`VramScheduler` conoce el tamaño de cada rol y decide:
+
+  - `keep_alive(rol)`: chat y embed fijos (-1, son chicos); el agente 300 s; un rol
+    que no cabe junto al agente → 0 (se descarga al terminar), salvo dentro de un
+    `batch()` (se queda `_BATCH_KEEP_S` entre imágenes).
+  - `prepare(rol)`: antes de cargar un modelo grande, descarga los modelos ociosos
+    (no fijos, sin uso en curso — ver `busy()`) de menor prioridad hasta que quepa.
+    Un modelo en uso nunca se descarga: si no hay lugar, se corre igual.
+  - `batch(rol)`: precarga, mantiene y al final descarga (visión tras un lote). El
+    agente abre un lote de visión cuando una ronda de tools trae varias
+    `decarabia_analyze` (core.agent `_call_tools`): gemma se carga una vez para todas
+    las imágenes y se descarga antes de que vuelva a hablar el agente.
+
+Backends: `OllamaVram` (`/api/ps`, `keep_alive` 0 para descargar) y `LlamaSwapVram`
+(`/running`, `/upstream/<model>/health` carga, descarga por modelo). Solo el primer backend
+agente cuenta: es el que comparte GPU con Ollama. `SimulatedBackend` modela una GPU
+con VRAM configurable para probar políticas sin hardware (benchmarks/sim_vram.py).
+
+Todo es síncrono (se llama desde tools MCP en hilos y desde `to_thread`) y nunca
+lanza: un backend caído solo se registra.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Iterator, Protocol, Sequence
+
+import httpx
+
+from core.config import ModelConfig, load_model_config
+from core.prefix_warmer import swap_root
+from utils.logger_config import get_argos_logger
+
+logger = get_argos_logger()
+
+_ENABLED = os.getenv("ARGOS_VRAM_SCHEDULER", "1") == "1"
+_VRAM_GB = float(os.getenv("ARGOS_VRAM_GB", "32"))
+# Contexto CUDA, buffers de cómputo, escritorio: lo que no se puede usar.
+_RESERVE_GB = float(os.getenv("ARGOS_VRAM_RESERVE_GB", "1.5"))
+_IDLE_KEEP_S = int(os.getenv("ARGOS_VRAM_IDLE_KEEP_S", "300"))
+_BATCH_KEEP_S = int(os.getenv("ARGOS_VRAM_BATCH_KEEP_S", "120"))
+_TIMEOUT = 5.0
+
+# GB por rol con los modelos de model_config.json (pesos + KV del num_ctx usado).
+_FOOTPRINTS_GB = {"agent": 24.5, "vision": 18.0, "chat": 1.0, "embed": 0.6}
+
+
+def _env_footprints() -> dict[str, float]:
+    """Overrides de `ARGOS_VRAM_FOOTPRINTS` ({"vision": 17.2, ...}). Inválido → defaults."""
+    raw = os.getenv("ARGOS_VRAM_FOOTPRINTS", "")
+    if not raw:
+        return {}
+    try:
+        data = json.loads(raw)
+        if not isinstance(data, dict):
+            raise ValueError("no es un objeto JSON")
+        return {str(role): float(gb) for role, gb in data.items()}
+    except (TypeError, ValueError) as e:
+        logger.warning("ARGOS_VRAM_FOOTPRINTS inválido (%s) — usando los tamaños por defecto", e)
+        return {}
+
+
+_FOOTPRINTS_GB.update(_env_footprints())
+
+# Orden de permanencia: los primeros se quedan, los últimos se descargan antes.
+_PRIORITY = ("embed", "chat", "agent", "vision")
+# Chicos y en el camino caliente: siempre residentes.
+_PINNED = frozenset({"embed", "chat"})
+
+
+@dataclass(frozen=True)
+class ModelSpec:
+    """Un rol con su modelo, dónde vive y cuánta VRAM ocupa."""
+
+    role: str
+    model: str
+    gb: float
+    backend: str  # "ollama" | "swap"
+
+
+class VramBackend(Protocol):
+    def loaded(self) -> dict[str, float] | None: ...     # modelo → GB; None = sin respuesta
+    def load(self, model: str, keep_alive: int) -> bool: ...
+    def unload(self, model: str) -> bool: ...
+
+
+def _same_model(loaded: str, model: str) -> bool:
+    return loaded == model or (":" not in model and loaded == f"{model}:latest")
+
+
+class OllamaVram:
+    """Ollama: `/api/ps` (size_vram), carga con un generate vacío, descarga con keep_alive 0."""
+
+    def __init__(self, base_url: str) -> None:
+        self.base_url = base_url.rstrip("/")
+
+    def loaded(self) -> dict[str, float] | None:
+        try:
+            r = httpx.get(f"{self.base_url}/api/ps", timeout=_TIMEOUT)
+            r.raise_for_status()
+            return {m["name"]: m.get("size_vram", 0) / 1e9 for m in r.json().get("models", [])}
+        except (httpx.HTTPError, ValueError, KeyError) as e:
+            logger.debug("vram: /api/ps falló: %s", e)
+            return None
+
+    def _generate(self, model: str, keep_alive: int) -> bool:
+        try:
+            r = httpx.post(
+                f"{self.base_url}/api/generate",
+                json={"model": model, "keep_alive": keep_alive},
+                timeout=120.0 if keep_alive else _TIMEOUT,
+            )
+            return r.status_code == 200
+        except httpx.HTTPError as e:
+            logger.debug("vram: generate %s (keep_alive=%s) falló: %s", model, keep_alive, e)
+            return False
+
+    def load(self, model: str, keep_alive: int) -> bool:
+        return self._generate(model, keep_alive)
+
+    def unload(self, model: str) -> bool:
+        return self._generate(model, 0)
+
+
+class LlamaSwapVram:
+    """llama-swap: `/running`, `/upstream/<model>/health` fuerza la carga.
+
+    Descarga con `POST /api/models/unload/<model>` (solo ese modelo). Los llama-swap
+    viejos no lo tienen (404) y su `/unload` baja TODOS los modelos: ahí solo se usa si
+    el modelo pedido es el único corriendo; si hay otros, no se descarga nada.
+    """
+
+    def __init__(self, agent_base_url: str, footprints: dict[str, float]) -> None:
+        self.root = swap_root(agent_base_url)
+        self.footprints = footprints  # /running no informa tamaños
+
+    def loaded(self) -> dict[str, float] | None:
+        try:
+            r = httpx.get(f"{self.root}/running", timeout=_TIMEOUT)
+            r.raise_for_status()
+            return {e["model"]: self.footprints.get(e["model"], 0.0) for e in r.json().get("running", [])}
+        except (httpx.HTTPError, ValueError, KeyError) as e:
+            logger.debug("vram: %s/running falló: %s", self.root, e)
+            return None
+
+    def load(self, model: str, keep_alive: int) -> bool:
+        # keep_alive lo maneja el `ttl` de llama-swap.
+        try:
+            return httpx.get(f"{self.root}/upstream/{model}/health", timeout=120.0).status_code == 200
+        except httpx.HTTPError as e:
+            logger.debug("vram: carga de %s en llama-swap falló: %s", model, e)
+            return False
+
+    def unload(self, model: str) -> bool:
+        try:
+            r = httpx.post(f"{self.root}/api/models/unload/{model}", timeout=_TIMEOUT)
+            if r.status_code != 404:
+                return r.status_code == 200
+            running = self.loaded()
+            if running is None or any(not _same_model(m, model) for m in running):
+                logger.debug("vram: llama-swap sin descarga por modelo y con otros modelos: no se descarga %s", model)
+                return False
+            return httpx.get(f"{self.root}/unload", timeout=_TIMEOUT).status_code == 200
+        except httpx.HTTPError as e:
+            logger.debug("vram: descarga de %s en llama-swap falló: %s", model, e)
+            return False
+
+
+class SimulatedBackend:
+    """GPU simulada: VRAM fija, reloj manual, keep_alive con vencimiento.
+
+    Como Ollama, si lo cargado excede la VRAM el exceso va a CPU: se cuenta como
+    `offloads` (el síntoma a evitar). `request()` simula una llamada de inferencia.
+    """
+
+    def __init__(self, vram_gb: float, footprints: dict[str, float], load_s: dict[str, float] | None = None) -> None:
+        self.vram_gb = vram_gb
+        self.footprints = footprints
+        self.load_s = load_s or {}
+        self.now = 0.0
+        self._expires: dict[str, float] = {}  # modelo → instante de descarga (inf = -1)
+        self.counts: Counter[str] = Counter()
+        self.stall_s = 0.0
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+        for model, at in list(self._expires.items()):
+            if at <= self.now:
+                del self._expires[model]
+
+    def loaded(self) -> dict[str, float] | None:
+        return {m: self.footprints[m] for m in self._expires}
+
+    def used_gb(self) -> float:
+        return sum(self.footprints[m] for m in self._expires)
+
+    def _keep(self, model: str, keep_alive: int | None) -> None:
+        ka = 300 if keep_alive is None else keep_alive
+        if ka == 0:
+            self._expires.pop(model, None)
+        else:
+            self._expires[model] = float("inf") if ka < 0 else self.now + ka
+
+    def load(self, model: str, keep_alive: int) -> bool:
+        if model not in self._expires:
+            self.counts["loads"] += 1
+            self.stall_s += self.load_s.get(model, 5.0)
+            self._expires[model] = self.now
+            if self.used_gb() > self.vram_gb:
+                self.counts["offloads"] += 1
+        self._keep(model, keep_alive if keep_alive != 0 else 1)
+        return True
+
+    def unload(self, model: str) -> bool:
+        if self._expires.pop(model, None) is not None:
+            self.counts["unloads"] += 1
+        return True
+
+    def request(self, model: str, keep_alive: int | None, seconds: float = 1.0) -> None:
+        if model not in self._expires:
+            self.counts["cold_loads"] += 1
+            self.load(model, -1)
+        if self.used_gb() > self.vram_gb:
+            self.counts["offloaded_calls"] += 1
+            seconds *= 4  # capas en CPU
+        self.stall_s += seconds
+        self.advance(seconds)
+        self._keep(model, keep_alive)
+
+
+class VramScheduler:
+    """Decide keep_alive, precargas y descargas con los tamaños de cada rol."""
+
+    def __init__(
+        self,
+        specs: Sequence[ModelSpec],
+        backends: dict[str, VramBackend],
+        vram_gb: float = _VRAM_GB,
+        reserve_gb: float = _RESERVE_GB,
+    ) -> None:
+        self.specs = {s.role: s for s in specs}
+        self.backends = backends
+        self.capacity_gb = vram_gb - reserve_gb
+        self._busy: Counter[str] = Counter()
+        self._batches: Counter[str] = Counter()
+        self._lock = threading.Lock()
+        self.counts: Counter[str] = Counter()
+
+    # ── Decisiones ──────────────────────────────────────────────────────────
+
+    def _gb(self, roles: Sequence[str]) -> float:
+        return sum(self.specs[r].gb for r in roles if r in self.specs)
+
+    def fits_with_agent(self, role: str) -> bool:
+        """¿`role` cabe junto al agente y los modelos fijos?"""
+        return self._gb({role, "agent", *_PINNED}) <= self.capacity_gb  # type: ignore[arg-type]
+
+    def keep_alive(self, role: str) -> int:
+        if not _ENABLED:
+            return -1 if role in _PINNED else _IDLE_KEEP_S
+        if role in _PINNED:
+            return -1
+        if role == "agent" or self.fits_with_agent(role):
+            return _IDLE_KEEP_S
+        with self._lock:
+            in_batch = self._batches[role] > 0
+        return _BATCH_KEEP_S if in_batch else 0
+
+    def _resident(self) -> dict[str, float] | None:
+        """rol → GB según los backends. None si algún backend no respondió."""
+        loaded: dict[str, dict[str, float]] = {}
+        for name, backend in self.backends.items():
+            models = backend.loaded()
+            if models is None:
+                return None
+            loaded[name] = models
+        resident: dict[str, float] = {}
+        for spec in self.specs.values():
+            for model, gb in loaded.get(spec.backend, {}).items():
+                if _same_model(model, spec.model):
+                    resident[spec.role] = gb or spec.gb
+        return resident
+
+    def _evictions(self, role: str, resident: dict[str, float]) -> list[str]:
+        need = 0.0 if role in resident else self.specs[role].gb
+        free = self.capacity_gb - sum(resident.values())
+        evict: list[str] = []
+        with self._lock:
+            busy = {r for r, n in self._busy.items() if n > 0}
+        for other in reversed(_PRIORITY):
+            if free >= need:
+                break
+            if other == role or other not in resident or other in _PINNED or other in busy:
+                continue
+            evict.append(other)
+            free += resident[other]
+        return evict
+
+    # ── Acciones ────────────────────────────────────────────────────────────
+
+    def prepare(self, role: str, preload: bool = False) -> list[str]:
+        """Hace lugar para `role` descargando modelos ociosos. Devuelve los descargados."""
+        if not _ENABLED or role not in self.specs:
+            return []
+        resident = self._resident()
+        if resident is None:
+            return []
+        evicted = self._evictions(role, resident)
+        for other in evicted:
+            spec = self.specs[other]
+            if self.backends[spec.backend].unload(spec.model):
+                self.counts[f"unload_{other}"] += 1
+                logger.info("VRAM: %s descargado para cargar %s", spec.model, self.specs[role].model)
+        if self.capacity_gb - sum(gb for r, gb in resident.items() if r not in evicted) < (
+            0.0 if role in resident else self.specs[role].gb
+        ):
+            self.counts[f"no_room_{role}"] += 1  # algo en uso ocupa el lugar: se corre igual
+        if preload and role not in resident:
+            spec = self.specs[role]
+            if self.backends[spec.backend].load(spec.model, self.keep_alive(role)):
+                self.counts[f"preload_{role}"] += 1
+        return evicted
+
+    def unload(self, role: str) -> bool:
+        spec = self.specs.get(role)
+        if spec is None or role in _PINNED:
+            return False
+        ok = self.backends[spec.backend].unload(spec.model)
+        if ok:
+            self.counts[f"unload_{role}"] += 1
+        return ok
+
+    @contextmanager
+    def busy(self, role: str) -> Iterator[None]:
+        """Marca el rol en uso: `prepare()` de otro rol no lo descarga mientras tanto."""
+        with self._lock:
+            self._busy[role] += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._busy[role] -= 1
+
+    def begin_batch(self, role: str) -> None:
+        """Abre un lote de `role`: hace lugar, lo precarga y lo mantiene entre llamadas."""
+        with self._lock:
+            self._batches[role] += 1
+        self.prepare(role, preload=True)
+
+    def end_batch(self, role: str) -> None:
+        """Cierra el lote; el último en cerrar descarga el rol si no cabe junto al agente."""
+        with self._lock:
+            self._batches[role] -= 1
+            last = self._batches[role] == 0
+        if last and _ENABLED and not self.fits_with_agent(role):
+            self.unload(role)
+
+    @contextmanager
+    def batch(self, role: str) -> Iterator[None]:
+        """Lote de trabajo de `role`: precarga, lo mantiene entre llamadas y al final lo descarga
+        si no cabe junto al agente (p.ej. visión después de analizar varias imágenes)."""
+        self.begin_batch(role)
+        try:
+            yield
+        finally:
+            self.end_batch(role)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            busy = {r: n for r, n in self._busy.items() if n}
+            batches = {r: n for r, n in self._batches.items() if n}
+        return {
+            "enabled": _ENABLED,
+            "capacity_gb": self.capacity_gb,
+            "footprints_gb": {r: s.gb for r, s in self.specs.items()},
+            "keep_alive": {r: self.keep_alive(r) for r in self.specs},
+            "busy": busy,
+            "batches": batches,
+            **self.counts,
+        }
+
+
+def specs_from_config(cfg: ModelConfig, footprints: dict[str, float] | None = None) -> list[ModelSpec]:
+    gb = {**_FOOTPRINTS_GB, **(footprints or {})}
+    agent_backend = "swap" if cfg.agent_backend == "openai" else "ollama"
+    return [
+        ModelSpec("agent", cfg.agent, gb["agent"], agent_backend),
+        ModelSpec("vision", cfg.vision, gb["vision"], "ollama"),
+        ModelSpec("chat", cfg.chat, gb["chat"], "ollama"),
+        ModelSpec("embed", cfg.embed, gb["embed"], "ollama"),
+    ]
+
+
+_SCHEDULER: VramScheduler | None = None
+_SCHEDULER_LOCK = threading.Lock()
+
+
+def get_vram_scheduler() -> VramScheduler:
+    """Planificador del proceso, con los modelos de model_config.json."""
+    global _SCHEDULER
+    with _SCHEDULER_LOCK:
+        if _SCHEDULER is None:
+            cfg = load_model_config()
+            specs = specs_from_config(cfg)
+            backends: dict[str, VramBackend] = {"ollama": OllamaVram(cfg.ollama_base_url)}
+            if cfg.agent_backend == "openai":
+                backends["swap"] = LlamaSwapVram(cfg.agent_base_url, {cfg.agent: _FOOTPRINTS_GB["agent"]})
+            _SCHEDULER = VramScheduler(specs, backends)
+        return _SCHEDULER
+
+
+def keep_alive_for(role: str) -> int:
+    """keep_alive (segundos; -1 = siempre) que corresponde a `role` ahora mismo."""
+    return get_vram_scheduler().keep_alive(role)
@@ -0,0 +1,106 @@
+"""
+Tests de core.admission: orden por prioridad, lock por thread y rechazo con la cola llena.
+
+Requieren pytest + pytest-asyncio:
+    uv run --with pytest --with pytest-asyncio pytest tests
+"""
+import asyncio
+
+import pytest
+
+from core.admission import AdmissionController, AdmissionRejected
+
+
+async def _hold(ctrl: AdmissionController, thread_id: str, release: asyncio.Event, order: list, **kwargs) -> None:
+    async with ctrl.admit(thread_id, **kwargs):
+        order.append(thread_id)
+        await release.wait()
+
+
+async def _settle() -> None:
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_interactive_goes_before_background():
+    ctrl = AdmissionController(slots=1, max_queue=4)
+    release, order = asyncio.Event(), []
+    first = asyncio.ensure_future(_hold(ctrl, "t0", release, order))
+    await _settle()
+    background = asyncio.ensure_future(_hold(ctrl, "bg", release, order, priority="background"))
+    await _settle()
+    interactive = asyncio.ensure_future(_hold(ctrl, "ui", release, order, priority="interactive"))
+    await _settle()
+
+    release.set()
+    await asyncio.wait_for(asyncio.gather(first, background, interactive), timeout=1)
+
+    assert order == ["t0", "ui", "bg"]
+
+
+@pytest.mark.asyncio
+async def test_same_thread_never_runs_twice_at_once():
+    ctrl = AdmissionController(slots=2, max_queue=4)
+    running, peak = 0, 0
+
+    async def turn() -> None:
+        nonlocal running, peak
+        async with ctrl.admit("mismo-thread"):
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    await asyncio.wait_for(asyncio.gather(turn(), turn(), turn()), timeout=1)
+
+    assert peak == 1
+    assert ctrl.stats()["admitted"] == 3
+
+
+@pytest.mark.asyncio
+async def test_rejects_only_when_slots_and_queue_are_full():
+    ctrl = AdmissionController(slots=1, max_queue=1)
+    release, order = asyncio.Event(), []
+    running = asyncio.ensure_future(_hold(ctrl, "t0", release, order))
+    await _settle()
+    queued = asyncio.ensure_future(_hold(ctrl, "t1", release, order))
+    await _settle()
+
+    with pytest.raises(AdmissionRejected) as exc:
+        async with ctrl.admit("t2"):
+            pass
+    assert exc.value.queue_depth == 1
+    assert exc.value.retry_after >= 1
+
+    release.set()
+    await asyncio.wait_for(asyncio.gather(running, queued), timeout=1)
+    assert ctrl.stats()["rejected"] == 1
+
+
+@pytest.mark.asyncio
+async def test_free_slot_admits_without_queue():
+    ctrl = AdmissionController(slots=1, max_queue=0)
+    positions: list[int] = []
+
+    async with ctrl.admit("t0", on_queued=positions.append) as waited:
+        assert waited < 0.1
+
+    assert positions == []
+    assert ctrl.stats()["rejected"] == 0
+
+
+@pytest.mark.asyncio
+async def test_queue_position_is_reported():
+    ctrl = AdmissionController(slots=1, max_queue=4)
+    release, order, positions = asyncio.Event(), [], []
+    running = asyncio.ensure_future(_hold(ctrl, "t0", release, order))
+    await _settle()
+    waiting = [
+        asyncio.ensure_future(_hold(ctrl, f"t{i}", release, order, on_queued=positions.append)) for i in (1, 2)
+    ]
+    await _settle()
+
+    assert positions == [1, 2]
+    release.set()
+    await asyncio.wait_for(asyncio.gather(running, *waiting), timeout=1)
@@ -0,0 +1,204 @@
+"""
+Tests del nodo agent (core.agent) con un modelo falso: cancelación a mitad del
+stream con tools ya despachadas, ronda final sin tools cuando se acaba el plazo,
+plazo del path CHAT (single-flight) y el resultado del hedge CHAT/AGENT.
+
+Requieren pytest + pytest-asyncio:
+    uv run --with pytest --with pytest-asyncio pytest tests
+"""
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage, SystemMessage
+from langchain_core.tools import StructuredTool
+
+from core.agent import _OUT_OF_TIME_NOTE, ArgosAgent
+from core.backend_pool import Backend, BackendPool
+from core.hedging import HedgeBudget
+from core.request_context import DeadlineExceeded, deadline_scope
+from core.tool_exec import ParallelToolNode
+
+
+class FakeModel:
+    """Modelo falso: stream de chunks predefinidos y ainvoke que registra los mensajes."""
+
+    def __init__(
+        self, chunks=(), hang: asyncio.Event | None = None, name: str = "plain", fail: Exception | None = None
+    ) -> None:
+        self.chunks = list(chunks)
+        self.hang = hang
+        self.fail = fail
+        self.name = name
+        self.seen: list[list] = []
+
+    async def astream(self, messages):
+        for chunk in self.chunks:
+            yield chunk
+        if self.fail is not None:
+            raise self.fail
+        if self.hang is not None:
+            await self.hang.wait()
+
+    async def ainvoke(self, messages):
+        self.seen.append(list(messages))
+        return AIMessage(content=f"respuesta de {self.name}")
+
+
+def _tool_chunk(index: int, call_id: str, q: str) -> AIMessageChunk:
+    return AIMessageChunk(
+        content="",
+        tool_call_chunks=[{"name": "lookup", "args": f'{{"q": "{q}"}}', "id": call_id, "index": index}],
+    )
+
+
+def _lookup_tool(started: asyncio.Event) -> StructuredTool:
+    async def run(q: str) -> str:
+        started.set()
+        await asyncio.sleep(10)
+        return q
+
+    return StructuredTool.from_function(coroutine=run, name="lookup", description="lookup de prueba")
+
+
+def _bare_agent(**attrs) -> ArgosAgent:
+    """ArgosAgent sin __init__ (sin modelos reales ni checkpointer): solo lo que usa el nodo."""
+    agent = object.__new__(ArgosAgent)
+    agent.tools = []
+    agent._bound = {}
+    agent._stream_tools = False
+    for key, value in attrs.items():
+        setattr(agent, key, value)
+    return agent
+
+
+@pytest.mark.asyncio
+async def test_cancel_mid_stream_discards_early_tools():
+    started = asyncio.Event()
+    node = ParallelToolNode([_lookup_tool(started)], early_dispatch={"lookup": None})
+    agent = _bare_agent(_tool_node=node)
+    # La call 0 queda completa cuando empieza la 1; el stream después se cuelga.
+    model = FakeModel([_tool_chunk(0, "c0", "a"), _tool_chunk(1, "c1", "b")], hang=asyncio.Event())
+
+    task = asyncio.ensure_future(agent._stream_model(model, [], {}))
+    await asyncio.wait_for(started.wait(), timeout=1)
+    early = node._early["c0"][1]
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    await asyncio.wait([early], timeout=1)
+    assert node._early == {}
+    assert early.cancelled()
+
+
+@pytest.mark.asyncio
+async def test_turn_cleans_up_after_stream_finished():
+    started = asyncio.Event()
+    node = ParallelToolNode([_lookup_tool(started)], early_dispatch={"lookup": None})
+    agent = _bare_agent(_tool_node=node)
+    model = FakeModel([_tool_chunk(0, "c0", "a"), _tool_chunk(1, "c1", "b")])
+
+    # Cancelación entre el fin del stream y el nodo tools: turn() limpia al salir.
+    with node.turn():
+        message = await agent._stream_model(model, [], {})
+        assert [c["id"] for c in message.tool_calls] == ["c0", "c1"]
+        early = node._early["c0"][1]
+
+    await asyncio.wait([early], timeout=1)
+    assert node._early == {}
+    assert early.cancelled()
+
+
+@pytest.mark.asyncio
+async def test_stream_error_is_raised_not_retried():
+    started = asyncio.Event()
+    node = ParallelToolNode([_lookup_tool(started)], early_dispatch={"lookup": None})
+    agent = _bare_agent(_tool_node=node)
+    model = FakeModel([_tool_chunk(0, "c0", "a"), _tool_chunk(1, "c1", "b")], fail=ConnectionError("reset"))
+
+    with pytest.raises(ConnectionError):
+        await agent._stream_model(model, [], {})
+
+    assert model.seen == []
+    assert node._early == {}
+
+
+@pytest.mark.asyncio
+async def test_stream_unsupported_falls_back_to_ainvoke():
+    agent = _bare_agent(_tool_node=ParallelToolNode([]))
+    model = FakeModel(fail=NotImplementedError("sin streaming"))
+
+    message = await agent._stream_model(model, [], {})
+
+    assert message.content == "respuesta de plain"
+
+
+@pytest.mark.asyncio
+async def test_final_round_runs_without_tools_near_deadline():
+    plain, bound = FakeModel(name="plain"), FakeModel(name="bound")
+    backend = Backend("http://fake-agent", plain, kind="ollama")
+    agent = _bare_agent(pool=BackendPool([backend]), llm_with_tools=bound)
+    state = {"messages": [SystemMessage(content="sys"), HumanMessage(content="lee el archivo")]}
+
+    with deadline_scope(1.0):
+        result = await agent._call_model(state, {"configurable": {"thread_id": "t1"}})
+
+    assert result["messages"][0].content == "respuesta de plain"
+    assert bound.seen == []
+    assert plain.seen[0][-1].content == _OUT_OF_TIME_NOTE
+
+
+@pytest.mark.asyncio
+async def test_normal_round_uses_bound_tools():
+    plain, bound = FakeModel(name="plain"), FakeModel(name="bound")
+    backend = Backend("http://fake-agent", plain, kind="ollama")
+    agent = _bare_agent(pool=BackendPool([backend]), llm_with_tools=bound)
+    state = {"messages": [SystemMessage(content="sys"), HumanMessage(content="lee el archivo")]}
+
+    result = await agent._call_model(state, {"configurable": {"thread_id": "t1"}})
+
+    assert result["messages"][0].content == "respuesta de bound"
+    assert plain.seen == []
+
+
+@pytest.mark.asyncio
+async def test_hedge_with_both_paths_failing_counts_no_winner():
+    async def fail(*args, **kwargs):
+        raise ConnectionError("backend caído")
+
+    agent = _bare_agent(hedge=HedgeBudget(enabled=True, max_inflight=1, per_minute=10))
+    agent._agent_turn = fail
+    agent._run_chat = fail
+    assert agent.hedge.try_acquire()
+
+    with pytest.raises(ConnectionError):
+        await agent._run_hedged("hola", "t1", "normal")
+
+    assert agent.hedge.stats()["failed"] == 1
+    assert agent.hedge.stats()["agent_won"] == 0
+    assert agent.hedge.stats()["inflight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_chat_path_respects_request_deadline():
+    cancelled = asyncio.Event()
+
+    async def slow_chat(stamped_input: str) -> str:
+        try:
+            await asyncio.sleep(30)
+        finally:
+            cancelled.set()
+        return "tarde"
+
+    agent = _bare_agent(_cfg=SimpleNamespace(chat="chat-model"))
+    agent._run_chat = slow_chat
+
+    t0 = time.monotonic()
+    with deadline_scope(0.2), pytest.raises(DeadlineExceeded):
+        await agent._route_turn("hola", "t-deadline", "normal", None, {})
+
+    assert time.monotonic() - t0 < 2
+    # Único llamador del flight: al irse, la llamada compartida se cancela.
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
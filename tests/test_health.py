@@ -0,0 +1,96 @@
+"""
+Tests de core.health: transiciones del circuit breaker, qué cuenta como caída y
+qué servicios degradan `/health`.
+"""
+import time
+
+import httpx
+import pytest
+
+from core.health import CLOSED, HALF_OPEN, OPEN, Breaker, CircuitOpen, HealthRegistry, is_outage
+
+
+def _open(breaker: Breaker) -> None:
+    for _ in range(breaker.failures_to_open):
+        breaker.record_failure(ConnectionError("caído"))
+
+
+def test_opens_after_consecutive_failures():
+    breaker = Breaker("svc", failures=3, open_s=60)
+    breaker.record_failure(ConnectionError("caído"))
+    breaker.record_failure(ConnectionError("caído"))
+    assert breaker.state == CLOSED
+
+    breaker.record_failure(ConnectionError("caído"))
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert breaker.counts["rejected"] == 1
+
+
+def test_success_resets_the_failure_streak():
+    breaker = Breaker("svc", failures=2, open_s=60)
+    breaker.record_failure(ConnectionError("caído"))
+    breaker.record_success()
+    breaker.record_failure(ConnectionError("caído"))
+
+    assert breaker.state == CLOSED
+
+
+def test_half_open_allows_a_single_trial():
+    breaker = Breaker("svc", failures=1, open_s=0.05)
+    _open(breaker)
+    time.sleep(0.08)
+
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()  # la prueba ya está reservada
+
+
+def test_half_open_closes_on_success_and_reopens_on_failure():
+    breaker = Breaker("svc", failures=1, open_s=0.05)
+    _open(breaker)
+    time.sleep(0.08)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+
+    _open(breaker)
+    time.sleep(0.08)
+    assert breaker.allow()
+    breaker.record_failure(ConnectionError("sigue caído"))
+    assert breaker.state == OPEN
+
+
+def test_guard_raises_when_open_and_ignores_application_errors():
+    breaker = Breaker("svc", failures=1, open_s=60)
+    with pytest.raises(ValueError), breaker.guard():
+        raise ValueError("respuesta inválida")  # el servicio respondió: no es caída
+    assert breaker.state == CLOSED
+
+    with pytest.raises(httpx.ConnectError), breaker.guard():
+        raise httpx.ConnectError("refused")
+    assert breaker.state == OPEN
+
+    with pytest.raises(CircuitOpen), breaker.guard():
+        pass
+
+
+def test_is_outage_classification():
+    request = httpx.Request("GET", "http://svc")
+
+    assert is_outage(httpx.ConnectError("refused"))
+    assert is_outage(httpx.HTTPStatusError("503", request=request, response=httpx.Response(503, request=request)))
+    assert not is_outage(httpx.HTTPStatusError("404", request=request, response=httpx.Response(404, request=request)))
+    assert not is_outage(ValueError("mal input"))
+
+
+def test_passive_services_do_not_degrade_health():
+    registry = HealthRegistry()
+    probed = registry.register("ollama", "http://ollama/api/version")
+    _open(registry.register("comfyui"))
+
+    assert registry.degraded() == []
+    assert registry.passive_unavailable() == ["comfyui"]
+
+    _open(probed)
+    assert registry.degraded() == ["ollama"]
@@ -0,0 +1,55 @@
+"""
+Tests de core.intents: fast-path por regex (solo órdenes inequívocas).
+"""
+import pytest
+
+from core import intents
+from core.intents import Intent, match_intent, render
+
+
+@pytest.fixture(autouse=True)
+def _fast_path_on(monkeypatch):
+    monkeypatch.setattr(intents, "_ENABLED", True)
+
+
+@pytest.mark.parametrize(("text", "name", "args"), [
+    ("Apaga las luces", "lights_off", {"action": "off"}),
+    ("oye, prende la luz por favor!", "lights_on", {"action": "on"}),
+    ("brillo al 40%", "lights_brightness", {"action": "brightness", "value": 40}),
+    ("pon las luces en azul", "lights_color", {"action": "color", "value": "azul"}),
+    ("escena de atardecer", "lights_scene", {"action": "scene", "value": "atardecer"}),
+    ("¿Qué hora es?", "datetime", {}),
+    ("saca una foto de la cámara c200", "camera_snapshot", {"action": "snapshot", "camera": "c200"}),
+    ("contexto de la página [Pregunta del usuario] apaga las luces", "lights_off", {"action": "off"}),
+])
+def test_unambiguous_commands_match(text, name, args):
+    intent = match_intent(text)
+
+    assert intent is not None
+    assert (intent.name, intent.args) == (name, args)
+
+
+@pytest.mark.parametrize("text", [
+    "apaga las luces y prende la tele",        # composición
+    "si llego tarde apaga las luces",          # condicional
+    "no apagues las luces",                    # negación
+    "apaga las luces en 5 minutos",            # temporizador
+    "brillo al 140%",                          # fuera de rango
+    "háblame de cómo funcionan las luces del ecosistema Amon",
+    "qué hora es en Tokio según el servidor de la oficina principal",
+])
+def test_ambiguous_messages_fall_through(text):
+    assert match_intent(text) is None
+
+
+def test_disabled_fast_path_never_matches(monkeypatch):
+    monkeypatch.setattr(intents, "_ENABLED", False)
+
+    assert match_intent("apaga las luces") is None
+
+
+def test_render_reports_tool_errors():
+    intent = Intent("lights_off", "amon_lights", {"action": "off"})
+
+    assert render(intent, {"ok": True}) == "Listo, apagué las luces."
+    assert "govee caído" in render(intent, {"ok": False, "error": "govee caído"})
@@ -0,0 +1,52 @@
+"""
+Tests de core.prefetch: matching sobre la pregunta y listado del vault fuera del loop.
+
+Requieren pytest + pytest-asyncio:
+    uv run --with pytest --with pytest-asyncio pytest tests
+"""
+import asyncio
+import threading
+
+import pytest
+from langchain_core.tools import StructuredTool
+
+from core import mcp_projectmap, prefetch
+from core.tool_exec import ParallelToolNode
+
+
+def test_guess_projects_matches_only_the_user_question():
+    text = "Contexto: estás en la página de Papier.\n[Pregunta del usuario] ¿qué hace Orobas?"
+
+    assert prefetch.guess_projects(text, ["Orobas", "Papier"]) == ["Orobas"]
+
+
+def test_guess_projects_caps_and_dedupes():
+    text = "compara orobas, papier y r-66 con Orobas"
+
+    assert prefetch.guess_projects(text, ["Orobas", "Papier", "R-66"]) == ["Orobas", "Papier"]
+
+
+@pytest.mark.asyncio
+async def test_vault_listing_runs_off_the_loop(monkeypatch):
+    loop_thread = threading.get_ident()
+    listed_in: list[int] = []
+    queried: list[str] = []
+
+    def fake_list() -> list[str]:
+        listed_in.append(threading.get_ident())
+        return ["Orobas"]
+
+    def project_map(query: str | None = None) -> dict:
+        queried.append(query)
+        return {"ok": True}
+
+    monkeypatch.setattr(mcp_projectmap, "_list_projects", fake_list)
+    monkeypatch.setattr(prefetch, "_ENABLED", True)
+    node = ParallelToolNode([StructuredTool.from_function(func=project_map, name="project_map", description="x")])
+
+    task = prefetch.start_prefetch("[Pregunta del usuario] háblame de orobas", node)
+    futures = await asyncio.wait_for(task, timeout=1)
+    await asyncio.wait_for(asyncio.gather(*futures), timeout=1)
+
+    assert listed_in and listed_in[0] != loop_thread
+    assert queried == ["Orobas"]
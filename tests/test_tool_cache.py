@@ -0,0 +1,93 @@
+"""
+Tests de core.tool_cache: TTL, invalidación por mtime (`depends_on`), predicado
+`when`, normalización de claves y tools con efectos secundarios.
+"""
+import os
+import time
+
+from langchain_core.tools import StructuredTool
+
+from core.tool_cache import CachePolicy, ToolResultCache, apply_cache_policies, make_key, memoize
+
+
+def _counting(calls: list):
+    def lookup(query: str, action: str = "read") -> str:
+        calls.append((query, action))
+        return f"resultado {len(calls)}"
+    return lookup
+
+
+def test_hit_within_ttl_and_miss_after_expiry():
+    calls: list = []
+    cache = ToolResultCache()
+    fn = memoize("lookup", _counting(calls), CachePolicy(ttl=0.05), cache)
+
+    assert fn("a") == fn("a") == "resultado 1"
+    time.sleep(0.08)
+    assert fn("a") == "resultado 2"
+    assert cache.stats()["hits"] == 1
+
+
+def test_depends_on_mtime_invalidates(tmp_path):
+    path = tmp_path / "nota.md"
+    path.write_text("v1", encoding="utf-8")
+    calls: list = []
+
+    def read(file_path: str) -> str:
+        calls.append(file_path)
+        return path.read_text(encoding="utf-8")
+
+    fn = memoize("read", read, CachePolicy(ttl=300, depends_on=lambda a: [a["file_path"]]), ToolResultCache())
+
+    assert fn(str(path)) == "v1"
+    assert fn(str(path)) == "v1"
+    path.write_text("v2", encoding="utf-8")
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert fn(str(path)) == "v2"
+    assert len(calls) == 2
+
+
+def test_when_predicate_skips_cache():
+    calls: list = []
+    policy = CachePolicy(ttl=300, when=lambda a: a["action"] == "read")
+    fn = memoize("lookup", _counting(calls), policy, ToolResultCache())
+
+    fn("a", action="read")
+    fn("a", action="read")
+    fn("a", action="create")
+    fn("a", action="create")
+
+    assert calls == [("a", "read"), ("a", "create"), ("a", "create")]
+
+
+def test_errors_are_not_cached():
+    calls: list = []
+
+    def flaky(query: str) -> dict:
+        calls.append(query)
+        return {"ok": False, "error": "backend caído"}
+
+    fn = memoize("flaky", flaky, CachePolicy(ttl=300), ToolResultCache())
+    fn("a")
+    fn("a")
+
+    assert len(calls) == 2
+
+
+def test_key_normalization_is_per_argument():
+    policy = CachePolicy(ttl=1, casefold=("query",), collapse=("query",))
+
+    assert make_key("t", {"query": "Hola   Mundo"}, policy) == make_key("t", {"query": "hola mundo"}, policy)
+    assert make_key("t", {"path": "a  b.txt"}, policy) != make_key("t", {"path": "a b.txt"}, policy)
+
+
+def test_side_effect_tools_are_never_wrapped():
+    calls: list = []
+    tool = StructuredTool.from_function(func=_counting(calls), name="write_file", description="x")
+
+    wrapped = apply_cache_policies([tool], {"write_file": CachePolicy(ttl=300)})[0]
+    wrapped.invoke({"query": "a"})
+    wrapped.invoke({"query": "a"})
+
+    assert len(calls) == 2
@@ -0,0 +1,107 @@
+"""
+Tests de core.tool_exec: orden de resultados y limpieza de despachos anticipados.
+
+Requieren pytest + pytest-asyncio:
+    uv run --with pytest --with pytest-asyncio pytest tests
+"""
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.tools import StructuredTool
+
+from core.tool_exec import ParallelToolNode
+
+# Las tools falsas no están en EARLY_DISPATCH: los tests declaran las suyas.
+_READ_ONLY = {"slow": None}
+
+
+def _fake_tool(name: str, delay: float, calls: list[str]) -> StructuredTool:
+    async def run(q: str) -> str:
+        calls.append(q)
+        await asyncio.sleep(delay)
+        return f"{name}:{q}"
+
+    return StructuredTool.from_function(coroutine=run, name=name, description=f"tool de prueba {name}")
+
+
+def _call(name: str, q: str, call_id: str) -> dict:
+    return {"name": name, "args": {"q": q}, "id": call_id, "type": "tool_call"}
+
+
+@pytest.mark.asyncio
+async def test_results_keep_call_order():
+    calls: list[str] = []
+    node = ParallelToolNode([_fake_tool("slow", 0.05, calls), _fake_tool("fast", 0.0, calls)])
+    message = AIMessage(content="", tool_calls=[
+        _call("slow", "a", "c1"), _call("fast", "b", "c2"), _call("slow", "c", "c3"),
+    ])
+
+    result = await node({"messages": [message]}, {})
+
+    assert [m.tool_call_id for m in result["messages"]] == ["c1", "c2", "c3"]
+    assert [m.content for m in result["messages"]] == ["slow:a", "fast:b", "slow:c"]
+
+
+@pytest.mark.asyncio
+async def test_early_dispatch_is_awaited_not_rerun():
+    calls: list[str] = []
+    node = ParallelToolNode([_fake_tool("slow", 0.02, calls)], early_dispatch=_READ_ONLY)
+    assert node.dispatch_early(_call("slow", "a", "c1"), {})
+
+    result = await node({"messages": [AIMessage(content="", tool_calls=[_call("slow", "a", "c1")])]}, {})
+
+    assert calls == ["a"]
+    assert result["messages"][0].content == "slow:a"
+
+
+@pytest.mark.asyncio
+async def test_turn_discards_unconsumed_early_dispatch():
+    calls: list[str] = []
+    node = ParallelToolNode([_fake_tool("slow", 10.0, calls)], early_dispatch=_READ_ONLY)
+    with node.turn():
+        assert node.dispatch_early(_call("slow", "a", "c1"), {})
+        task = node._early["c1"][1]
+        await asyncio.sleep(0)
+
+    await asyncio.wait([task], timeout=1)
+    assert node._early == {}
+    assert task.cancelled()
+
+
+@pytest.mark.asyncio
+async def test_unbound_tool_is_rejected():
+    calls: list[str] = []
+    tools = [_fake_tool("slow", 0.0, calls), _fake_tool("fast", 0.0, calls)]
+    node = ParallelToolNode(tools, allowed=lambda: frozenset({"fast"}), early_dispatch=_READ_ONLY)
+
+    result = await node({"messages": [AIMessage(content="", tool_calls=[_call("slow", "a", "c1")])]}, {})
+
+    assert result["messages"][0].status == "error"
+    assert "tool_not_bound" in result["messages"][0].content
+    assert calls == []
+    assert not node.can_dispatch_early("slow")
+
+
+def test_github_create_issue_is_never_dispatched_early():
+    def github_manager(action: str, repo_name: str | None = None, issue_title: str | None = None) -> str:
+        return action
+
+    tool = StructuredTool.from_function(func=github_manager, name="github_manager", description="github falso")
+    node = ParallelToolNode([tool])
+    create = {"name": "github_manager", "args": {"action": "create_issue", "repo_name": "r", "issue_title": "t"},
+              "id": "c1", "type": "tool_call"}
+    read = {"name": "github_manager", "args": {"action": "list_repos"}, "id": "c2", "type": "tool_call"}
+
+    assert not node.can_dispatch_early("github_manager", create["args"])
+    assert node.can_dispatch_early("github_manager", read["args"])
+    assert not node.dispatch_early(create, {})
+    assert node._early == {}
+
+
+def test_side_effect_tools_are_not_dispatched_early():
+    calls: list[str] = []
+    node = ParallelToolNode([_fake_tool("write_file", 0.0, calls), _fake_tool("run_command", 0.0, calls)])
+
+    assert not node.can_dispatch_early("write_file", {"q": "a"})
+    assert not node.can_dispatch_early("run_command", {"q": "a"})
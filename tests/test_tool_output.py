@@ -0,0 +1,43 @@
+"""
+Tests de core.tool_output: recorte con handle y handles ligados al thread.
+"""
+import re
+
+from core.tool_output import OutputStore, budget_chars, compact_output, read_output
+
+
+def _long_text(name: str) -> str:
+    return "\n".join(f"línea {i} secreto-{i}" for i in range(budget_chars(name) // 10))
+
+
+def _handle(trimmed: str) -> str:
+    return re.search(r"handle=(out-[0-9a-f]+)", trimmed).group(1)
+
+
+def test_trimmed_output_is_readable_from_the_same_thread():
+    text = _long_text("run_command")
+    trimmed = compact_output("run_command", text, scope="thread-a")
+    handle = _handle(trimmed)
+
+    assert len(trimmed) < len(text)
+    assert len(handle) == len("out-") + 16
+    page = read_output(handle, grep="secreto-42$", scope="thread-a")
+    assert "secreto-42" in page
+
+
+def test_handle_is_rejected_from_another_thread():
+    handle = _handle(compact_output("run_command", _long_text("run_command"), scope="thread-a"))
+
+    for scope in ("thread-b", None):
+        answer = read_output(handle, scope=scope)
+        assert "desconocido o expirado" in answer
+        assert "secreto" not in answer
+
+
+def test_store_evicts_oldest_handle():
+    store = OutputStore(max_entries=2)
+    first = store.put("t", "uno", "s")
+    store.put("t", "dos", "s")
+    store.put("t", "tres", "s")
+
+    assert store.get(first, "s") is None
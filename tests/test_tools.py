@@ -0,0 +1,34 @@
+"""
+Tests de core.tools: tope de lectura de read_file y su memoización.
+"""
+from dataclasses import replace
+
+from core import tools
+from core.tool_cache import _CACHE, apply_cache_policies
+
+
+def test_read_file_caps_bytes_read(tmp_path, monkeypatch):
+    monkeypatch.setattr(tools, "MAX_FILE_BYTES", 1000)
+    path = tmp_path / "grande.txt"
+    path.write_text("x" * 5000, encoding="utf-8")
+
+    out = tools.read_file.invoke({"file_path": str(path)})
+
+    assert out.startswith("x" * 1000)
+    assert "x" * 1001 not in out
+    assert "se leyeron 1000 de 5000 bytes" in out
+
+
+def test_read_file_does_not_cache_large_results(tmp_path):
+    assert tools._BASE_CACHE_POLICIES["read_file"].max_size == tools.MAX_CACHED_FILE_CHARS
+    policy = replace(tools._BASE_CACHE_POLICIES["read_file"], max_size=100)
+    wrapped = apply_cache_policies([tools.read_file], {"read_file": policy})[0]
+    small, big = tmp_path / "chico.txt", tmp_path / "grande.txt"
+    small.write_text("hola", encoding="utf-8")
+    big.write_text("y" * 500, encoding="utf-8")
+    _CACHE.clear()
+
+    wrapped.invoke({"file_path": str(small)})
+    wrapped.invoke({"file_path": str(big)})
+
+    assert _CACHE.stats()["entries"] == 1
@@ -4,15 +4,120 @@ Argos Core - Structured Logging Configuration Module
 This module provides a JSON-based structured logging system for the Argos Core project.
 It implements dual output (file + console) with exception handling and ISO 8601 timestamps.
 
+Logging is non-blocking for the caller: the argos_core logger only enqueues records
+(QueueHandler); a background QueueListener thread formats them as JSON and writes to
+the console and the log file. The asyncio event loop never touches the disk. The file
+rotates by size (or by time, see ARGOS_LOG_ROTATE_WHEN) and rotated files are gzipped.
+High-volume DEBUG lines can be sampled with ARGOS_LOG_DEBUG_SAMPLE.
+
+Environment overrides:
+    ARGOS_LOG_ASYNC          1 = queue + background writer (default), 0 = write inline
+    ARGOS_LOG_QUEUE          max queued records before new ones are dropped (10000)
+    ARGOS_LOG_MAX_BYTES      size-based rotation threshold (50 MB)
+    ARGOS_LOG_BACKUPS        rotated files kept (5)
+    ARGOS_LOG_ROTATE_WHEN    time-based rotation instead (e.g. "midnight", "H")
+    ARGOS_LOG_DEBUG_SAMPLE   fraction of DEBUG records kept (1.0 = all)
+
 English Code Rule: All code, comments, and documentation in English.
 """
 
+import atexit
+import gzip
 import logging
+import logging.handlers
 import json
+import os
+import queue
+import random
+import shutil
 import sys
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
+
+
+_ASYNC = os.getenv("ARGOS_LOG_ASYNC", "1") == "1"
+_QUEUE_SIZE = int(os.getenv("ARGOS_LOG_QUEUE", "10000"))
+_MAX_BYTES = int(os.getenv("ARGOS_LOG_MAX_BYTES", str(50 * 1024 * 1024)))
+_BACKUPS = int(os.getenv("ARGOS_LOG_BACKUPS", "5"))
+_ROTATE_WHEN = os.getenv("ARGOS_LOG_ROTATE_WHEN", "")
+_DEBUG_SAMPLE = float(os.getenv("ARGOS_LOG_DEBUG_SAMPLE", "1.0"))
+
+# Callables returning extra fields for the current execution context (e.g. the
+# trace ID of the request being served), or None when they have nothing to add.
+_context_providers: list[Callable[[], Optional[dict]]] = []
+
+# Background writer of the current configuration (None when logging inline).
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional["ArgosQueueHandler"] = None
+
+
+def add_log_context(provider: Callable[[], Optional[dict]]) -> None:
+    """
+    Register a provider of contextual fields for every log record.
+    
+    Providers run in the thread that emits the record (so ContextVars such as
+    the current trace ID resolve correctly) and their fields are merged into
+    the record's extra_fields. Fields passed explicitly via extra_fields win.
+    
+    Args:
+        provider: Callable returning a dict of fields, or None
+    """
+    _context_providers.append(provider)
+
+
+class ArgosContextFilter(logging.Filter):
+    """
+    Filter that stamps contextual fields (see add_log_context) onto each record.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """
+        Merge provider fields into record.extra_fields. Never drops a record.
+        
+        Args:
+            record: The log record being emitted
+        
+        Returns:
+            Always True
+        """
+        fields: dict = {}
+        for provider in _context_providers:
+            try:
+                extra = provider()
+            except Exception:
+                continue
+            if extra:
+                fields.update(extra)
+        if fields:
+            fields.update(getattr(record, 'extra_fields', None) or {})
+            record.extra_fields = fields
+        return True
+
+
+class DebugSampler(logging.Filter):
+    """
+    Filter that keeps only a fraction of DEBUG records. Other levels always pass.
+    
+    Runs on the logger, so a sampled-out record costs neither a queue slot nor
+    JSON formatting.
+    """
+
+    def __init__(self, rate: float) -> None:
+        super().__init__()
+        self.rate = max(0.0, min(1.0, rate))
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """
+        Decide whether to keep the record.
+        
+        Args:
+            record: The log record being emitted
+        
+        Returns:
+            False for DEBUG records outside the sample, True otherwise
+        """
+        return record.levelno != logging.DEBUG or random.random() < self.rate
 
 
 class ArgosStructuredFormatter(logging.Formatter):
@@ -20,25 +125,26 @@ class ArgosStructuredFormatter(logging.Formatter):
     Custom formatter that outputs logs in JSON format for structured ingestion.
     
     Each log entry includes:
-    - timestamp: ISO 8601 format UTC timestamp
+    - timestamp: ISO 8601 format UTC timestamp (when the record was created)
     - level: Log severity level (INFO, WARNING, ERROR, etc.)
     - module: Source module name
     - message: The actual log message
     - exception: Stack trace (if applicable)
     """
-    
+
     def format(self, record: logging.LogRecord) -> str:
         """
         Format a log record as a JSON string.
         
         Args:
             record: The log record to format
-            
+        
         Returns:
             JSON-formatted log string
         """
         log_record = {
-            "timestamp": datetime.now(timezone.utc).isoformat(),  # RFC 3339 compliant
+            # Creation time, not write time: records may wait in the queue.
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),  # RFC 3339 compliant
             "level": record.levelname,
             "module": record.module,
             "function": record.funcName,
@@ -46,9 +152,11 @@ class ArgosStructuredFormatter(logging.Formatter):
             "message": record.getMessage(),
         }
         
-        # Include exception information if present
+        # Include exception information if present (pre-rendered when queued)
         if record.exc_info:
             log_record["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            log_record["exception"] = record.exc_text
         
         # Include extra fields if provided
         if hasattr(record, 'extra_fields'):
@@ -57,11 +165,143 @@ class ArgosStructuredFormatter(logging.Formatter):
         return json.dumps(log_record, ensure_ascii=False)
 
 
+class ArgosQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler that never blocks the caller and keeps records structured.
+    
+    The stock QueueHandler.prepare() pre-formats the whole record into msg;
+    here only the message is merged with its args and the traceback rendered
+    to text, so the JSON formatter in the writer thread still emits separate
+    "message" and "exception" fields. When the queue is full the record is
+    dropped and counted instead of stalling the event loop.
+    """
+
+    def __init__(self, log_queue: queue.Queue) -> None:
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Make the record safe to hand to another thread (no args, no exc_info).
+        
+        Args:
+            record: The log record being emitted
+        
+        Returns:
+            A shallow copy of the record with message and traceback resolved
+        """
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """
+        Put the record on the queue without waiting.
+        
+        Args:
+            record: The prepared log record
+        """
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class ArgosQueueListener(logging.handlers.QueueListener):
+    """
+    Queue listener whose stop sentinel waits for room instead of failing.
+
+    With a bounded queue, the stock put_nowait() of the sentinel raises
+    queue.Full when the writer is behind at shutdown.
+    """
+
+    def enqueue_sentinel(self) -> None:
+        """
+        Block until the sentinel fits in the queue.
+        """
+        self.queue.put(self._sentinel)
+
+
+def _gzip_namer(name: str) -> str:
+    return f"{name}.gz"
+
+
+def _gzip_rotator(source: str, dest: str) -> None:
+    with open(source, "rb") as src, gzip.open(dest, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(source)
+
+
+def _build_file_handler(log_file: str, max_bytes: int, backup_count: int) -> logging.Handler:
+    """
+    Create the rotating file handler (size-based, or time-based if configured).
+    
+    Args:
+        log_file: Path to the log file
+        max_bytes: Rotation threshold in bytes (ignored for time-based rotation)
+        backup_count: Number of rotated, gzipped files to keep
+    
+    Returns:
+        File handler whose rotated files are compressed
+    """
+    handler: logging.handlers.BaseRotatingHandler
+    if _ROTATE_WHEN:
+        handler = logging.handlers.TimedRotatingFileHandler(
+            log_file, when=_ROTATE_WHEN, backupCount=backup_count, encoding='utf-8', utc=True
+        )
+    else:
+        handler = logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8'
+        )
+    handler.namer = _gzip_namer
+    handler.rotator = _gzip_rotator
+    return handler
+
+
+def stop_argos_logging() -> None:
+    """
+    Flush queued records and stop the background writer thread, if any.
+    
+    Registered with atexit; safe to call more than once.
+    """
+    global _listener, _queue_handler
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()  # drains the queue before returning
+        for handler in _listener.handlers:
+            handler.close()
+    _listener = None
+    _queue_handler = None
+
+
+def logging_stats() -> dict:
+    """
+    Report the state of the logging pipeline.
+    
+    Returns:
+        Whether logging is asynchronous, queued records and dropped records
+    """
+    if _queue_handler is None:
+        return {"async": False, "queued": 0, "dropped": 0}
+    return {
+        "async": True,
+        "queued": _queue_handler.queue.qsize(),
+        "dropped": _queue_handler.dropped,
+    }
+
+
 def setup_argos_logging(
     log_level: int = logging.INFO,
     log_file: str = "argos_system.log",
     enable_console: bool = True,
-    enable_file: bool = True
+    enable_file: bool = True,
+    use_queue: bool = _ASYNC,
+    max_bytes: int = _MAX_BYTES,
+    backup_count: int = _BACKUPS,
+    debug_sample_rate: float = _DEBUG_SAMPLE,
 ) -> logging.Logger:
     """
     Initialize and configure the Argos Core logging system.
@@ -71,46 +311,73 @@ def setup_argos_logging(
         log_file: Path to the log file (default: argos_system.log)
         enable_console: Enable console output (default: True)
         enable_file: Enable file output (default: True)
-        
+        use_queue: Format and write in a background thread (default: ARGOS_LOG_ASYNC)
+        max_bytes: Size-based rotation threshold (default: ARGOS_LOG_MAX_BYTES)
+        backup_count: Rotated files kept, gzipped (default: ARGOS_LOG_BACKUPS)
+        debug_sample_rate: Fraction of DEBUG records kept (default: ARGOS_LOG_DEBUG_SAMPLE)
+    
     Returns:
         Configured logger instance for argos_core
-        
+    
     Raises:
         IOError: If log file cannot be created or written to
     """
+    global _listener, _queue_handler
     logger = logging.getLogger("argos_core")
     logger.setLevel(log_level)
     
     # Prevent duplicate handlers if called multiple times
     if logger.hasHandlers():
         logger.handlers.clear()
+    stop_argos_logging()
+    for existing in [f for f in logger.filters if isinstance(f, (ArgosContextFilter, DebugSampler))]:
+        logger.removeFilter(existing)
+    if debug_sample_rate < 1.0:
+        logger.addFilter(DebugSampler(debug_sample_rate))
+    logger.addFilter(ArgosContextFilter())
     
     formatter = ArgosStructuredFormatter()
+    handlers: list[logging.Handler] = []
     
     # Console Handler for real-time monitoring
     if enable_console:
         console_handler = logging.StreamHandler(sys.stdout)
         console_handler.setFormatter(formatter)
         console_handler.setLevel(log_level)
-        logger.addHandler(console_handler)
+        handlers.append(console_handler)
     
-    # File Handler for persistent audit logs
+    # File Handler for persistent audit logs (rotated and gzipped)
+    file_error: Optional[Exception] = None
     if enable_file:
         try:
             # Ensure log directory exists
             log_path = Path(log_file)
             log_path.parent.mkdir(parents=True, exist_ok=True)
             
-            file_handler = logging.FileHandler(log_file, encoding='utf-8')
+            file_handler = _build_file_handler(log_file, max_bytes, backup_count)
             file_handler.setFormatter(formatter)
             file_handler.setLevel(log_level)
-            logger.addHandler(file_handler)
+            handlers.append(file_handler)
         except (IOError, OSError) as e:
             # If file logging fails, log to console and continue
-            if enable_console:
-                logger.error(f"Failed to initialize file logging: {e}")
-            else:
+            if not enable_console:
                 raise
+            file_error = e
+    
+    if use_queue and handlers:
+        # Callers only enqueue; formatting and I/O happen in the listener thread.
+        _queue_handler = ArgosQueueHandler(queue.Queue(maxsize=_QUEUE_SIZE))
+        logger.addHandler(_queue_handler)
+        _listener = ArgosQueueListener(
+            _queue_handler.queue, *handlers, respect_handler_level=True
+        )
+        _listener.start()
+    else:
+        for handler in handlers:
+            logger.addHandler(handler)
+    
+    if file_error is not None:
+        logger.error(f"Failed to initialize file logging: {file_error}")
     
     # Prevent propagation to root logger
     logger.propagate = False
@@ -118,6 +385,9 @@ def setup_argos_logging(
     return logger
 
 
+atexit.register(stop_argos_logging)
+
+
 def get_argos_logger() -> logging.Logger:
     """
     Get the configured Argos logger instance.